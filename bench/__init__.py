@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pacote de dados sintéticos e benchmark dos ETLs de KPI.
+
+Uso: python -m bench generate --scale 50k
+     python -m bench run
+"""
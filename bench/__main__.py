@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Linha de comando dos dados sintéticos e do benchmark dos ETLs.
+
+Exemplos:
+    python -m bench generate --scale 50k --end-date 2026-06-30
+    python -m bench generate --scale 500k --drop
+    python -m bench run
+    python -m bench run --kpi receita_cliente,fechamento_farmer_m_passado --repeat 5
+    python -m bench compare logs/bench_base.json logs/bench_novo.json
+"""
+
+import argparse
+import sys
+import traceback
+
+from etl.orchestrator import KPIS, resolve_kpis, setup_logging
+from bench.synthetic_data import SCALES, DEFAULT_MONTHS, DEFAULT_SEED, generate_gammadata
+from bench.runner import DEFAULT_REPEAT, DEFAULT_SAMPLE_ROWS, run_benchmark, compare_reports, load_report
+
+LOG_LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+
+def parse_arguments(argv=None):
+    """
+    Analisa os argumentos da linha de comando.
+
+    Args:
+        argv (list, optional): Argumentos a analisar; se None, usa sys.argv
+
+    Returns:
+        argparse.Namespace: Argumentos analisados
+    """
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Dados sintéticos e benchmark dos ETLs de KPI')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help='Recria o schema gammadata com dados sintéticos')
+    generate_parser.add_argument(
+        '--scale',
+        type=str,
+        choices=list(SCALES),
+        default='1k',
+        help='Quantidade de clientes (default: 1k)'
+    )
+    generate_parser.add_argument(
+        '--months',
+        type=int,
+        default=DEFAULT_MONTHS,
+        help=f'Meses de histórico antes do mês da data final (default: {DEFAULT_MONTHS})'
+    )
+    generate_parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Semente dos números aleatórios (default: {DEFAULT_SEED})'
+    )
+    generate_parser.add_argument(
+        '--end-date',
+        type=str,
+        default=None,
+        help='Data final dos dados, YYYY-MM-DD; fixe-a para datasets reprodutíveis (default: hoje)'
+    )
+    generate_parser.add_argument(
+        '--positivador-step',
+        type=int,
+        default=None,
+        help='Intervalo em dias úteis entre os dias do positivador (default: o da escala)'
+    )
+    generate_parser.add_argument(
+        '--drop',
+        action='store_true',
+        help='Apaga os schemas gammadata e analysis existentes'
+    )
+    generate_parser.add_argument(
+        '--allow-remote',
+        action='store_true',
+        help='Permite um DB_HOST que não seja local'
+    )
+    generate_parser.add_argument(
+        '--no-indexes',
+        action='store_true',
+        help='Não cria os índices das tabelas de origem'
+    )
+    generate_parser.add_argument(
+        '--log-level',
+        type=str,
+        choices=LOG_LEVELS,
+        default='INFO',
+        help='Nível de logging (default: INFO)'
+    )
+
+    run_parser = subparsers.add_parser('run', help='Mede as tabelas derivadas, client_responsibility e os KPIs')
+    run_parser.add_argument(
+        '--kpi',
+        type=str,
+        default='all',
+        help=f"'all' ou KPIs separados por vírgula: {', '.join(KPIS)} (default: all)"
+    )
+    run_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f'Repetições de cada medida (default: {DEFAULT_REPEAT})'
+    )
+    run_parser.add_argument(
+        '--sample-rows',
+        type=int,
+        default=DEFAULT_SAMPLE_ROWS,
+        help=f'Linhas da amostra de client_responsibility (default: {DEFAULT_SAMPLE_ROWS})'
+    )
+    run_parser.add_argument(
+        '--months-back',
+        type=int,
+        default=None,
+        help='Número de meses para trás dos KPIs de meses anteriores (default: padrão de cada KPI)'
+    )
+    run_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Paralelismo interno dos KPIs que o suportam (default: padrão de cada KPI)'
+    )
+    run_parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='Arquivo do relatório JSON (default: logs/bench_<data>_<commit>.json)'
+    )
+    run_parser.add_argument(
+        '--kpi-log-level',
+        type=str,
+        choices=LOG_LEVELS,
+        default='WARNING',
+        help='Nível de logging dos KPIs durante as medidas (default: WARNING)'
+    )
+    run_parser.add_argument(
+        '--log-level',
+        type=str,
+        choices=LOG_LEVELS,
+        default='INFO',
+        help='Nível de logging (default: INFO)'
+    )
+
+    compare_parser = subparsers.add_parser('compare', help='Compara as medianas de dois relatórios')
+    compare_parser.add_argument('base', type=str, help='Relatório de referência')
+    compare_parser.add_argument('novo', type=str, help='Relatório comparado')
+
+    return parser.parse_args(argv)
+
+def print_comparison(linhas):
+    """
+    Imprime a comparação de dois relatórios, uma medida por linha.
+
+    Args:
+        linhas (list): Linhas de compare_reports
+    """
+    largura = max((len(medida) for medida, *_ in linhas), default=10)
+    print(f"{'Medida':<{largura}}  {'Base (s)':>10}  {'Novo (s)':>10}  {'Variação':>9}")
+    for medida, base, novo, variacao in linhas:
+        texto = f"{variacao:+.1%}" if variacao is not None else '-'
+        print(f"{medida:<{largura}}  {base:10.3f}  {novo:10.3f}  {texto:>9}")
+
+def main(argv=None):
+    """
+    Função principal do benchmark.
+
+    Returns:
+        int: Código de saída (0 em caso de sucesso)
+    """
+    args = parse_arguments(argv)
+
+    if args.command == 'compare':
+        print_comparison(compare_reports(load_report(args.base), load_report(args.novo)))
+        return 0
+
+    logger = setup_logging(args.log_level)
+
+    try:
+        if args.command == 'generate':
+            generate_gammadata(
+                scale=args.scale,
+                months=args.months,
+                seed=args.seed,
+                end_date=args.end_date,
+                positivador_step=args.positivador_step,
+                drop=args.drop,
+                allow_remote=args.allow_remote,
+                create_indexes=not args.no_indexes
+            )
+            return 0
+
+        relatorio, _ = run_benchmark(
+            kpis=resolve_kpis(args.kpi),
+            repeat=args.repeat,
+            sample_rows=args.sample_rows,
+            months_back=args.months_back,
+            workers=args.workers,
+            kpi_log_level=args.kpi_log_level,
+            output=args.output
+        )
+        falhas = [kpi for kpi, resultado in relatorio['kpis'].items() if not resultado['success']]
+        if falhas:
+            logger.error(f"Benchmark concluído com erros nos KPIs: {', '.join(falhas)}")
+            return 1
+        return 0
+
+    except Exception as e:
+        logger.error(f"Erro na execução do benchmark: {str(e)}")
+        logger.error(traceback.format_exc())
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
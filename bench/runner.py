@@ -0,0 +1,473 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark ponta a ponta dos ETLs de KPI sobre o gammadata sintético.
+
+Mede, no processo atual e com repetições:
+
+    - a montagem completa das tabelas derivadas (positivador_month_end,
+      client_farmer_periods e fact_client_month), que em seguida ficam prontas
+      para os KPIs, de modo que os tempos dos KPIs não incluem essa montagem
+    - as funções de utils.client_responsibility (consulta dos períodos,
+      construção do ResponsibilityIndex, filtro e enriquecimento de uma amostra)
+    - cada KPI, separado em extract/transform/load: as funções que o main.py
+      importa dos seus módulos extract, transform e load são instrumentadas
+      durante a execução; o tempo restante do run() aparece como 'other'.
+      Geradores (extrações em streaming) são contados na fase que os consome
+
+O resultado é um relatório JSON com o commit, o ambiente, os parâmetros do
+dataset sintético (bench.synthetic_data) e mínimo/mediana/máximo de cada
+medida, comparável entre commits com compare_reports.
+"""
+
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+import numpy as np
+import pandas as pd
+from etl.orchestrator import BASE_DIR, KPIS, KPI_SUBMODULES, load_kpi_module, build_kpi_argv
+from utils.db_connection import get_connection
+from utils.client_responsibility import (
+    ResponsibilityIndex,
+    refresh_client_farmer_periods,
+    ensure_client_farmer_periods,
+    get_client_farmer_periods,
+    filter_data_by_responsibility,
+    add_responsible_farmer_info,
+    clear_periods_cache
+)
+from utils.positivador_month_end import refresh_positivador_month_end, ensure_positivador_month_end
+from utils.fact_client_month import month_list, refresh_fact_client_month, ensure_fact_client_month
+from bench.synthetic_data import GAMMADATA_TABLES, get_dataset_info
+
+logger = logging.getLogger(__name__)
+
+# Versão do formato do relatório; incrementada quando campos mudam de significado
+REPORT_VERSION = 1
+
+DEFAULT_REPEAT = 3
+DEFAULT_SAMPLE_ROWS = 1_000_000
+
+PHASES = KPI_SUBMODULES + ('other',)
+
+def _stats(tempos):
+    """
+    Resume os tempos de uma medida.
+
+    Args:
+        tempos (list): Tempos em segundos, um por repetição
+
+    Returns:
+        dict: runs, min, median, max (segundos)
+    """
+    return {
+        'runs': len(tempos),
+        'min': round(min(tempos), 4),
+        'median': round(statistics.median(tempos), 4),
+        'max': round(max(tempos), 4),
+    }
+
+def _timed(func, *args, **kwargs):
+    """
+    Executa uma função e retorna (resultado, segundos).
+    """
+    inicio = time.perf_counter()
+    resultado = func(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+def _repeat(func, repeat, *args, **kwargs):
+    """
+    Executa uma função repeat vezes.
+
+    Returns:
+        tuple: (resultado da última execução, estatísticas dos tempos)
+    """
+    tempos = []
+    resultado = None
+    for _ in range(repeat):
+        resultado, segundos = _timed(func, *args, **kwargs)
+        tempos.append(segundos)
+    return resultado, _stats(tempos)
+
+class PhaseTimer:
+    """
+    Acumula o tempo gasto nas funções de extract/transform/load de um KPI.
+
+    Substitui, no módulo main.py do KPI, as funções importadas dos módulos
+    KPI_SUBMODULES por versões cronometradas. Chamadas aninhadas (ex.: uma
+    função de transform chamada dentro de outra) são contadas só uma vez, no
+    nível mais externo, por thread; KPIs que paralelizam internamente somam o
+    tempo de todas as threads.
+    """
+
+    def __init__(self, module):
+        """
+        Args:
+            module (module): Módulo main.py carregado por load_kpi_module
+        """
+        self.module = module
+        self.totais = dict.fromkeys(KPI_SUBMODULES, 0.0)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._originais = {}
+
+    def _wrap(self, func, fase):
+        @wraps(func)
+        def cronometrada(*args, **kwargs):
+            profundidade = getattr(self._local, 'profundidade', 0)
+            if profundidade:
+                return func(*args, **kwargs)
+            self._local.profundidade = 1
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                segundos = time.perf_counter() - inicio
+                self._local.profundidade = 0
+                with self._lock:
+                    self.totais[fase] += segundos
+        return cronometrada
+
+    def __enter__(self):
+        for nome, valor in vars(self.module).items():
+            fase = getattr(valor, '__module__', None)
+            if callable(valor) and fase in KPI_SUBMODULES:
+                self._originais[nome] = valor
+        for nome, func in self._originais.items():
+            setattr(self.module, nome, self._wrap(func, func.__module__))
+        return self
+
+    def __exit__(self, *exc):
+        for nome, func in self._originais.items():
+            setattr(self.module, nome, func)
+        self._originais.clear()
+        return False
+
+def get_commit():
+    """
+    Commit do repositório (git rev-parse HEAD), com sufixo '-dirty' se houver alterações.
+
+    Returns:
+        str or None: Hash do commit, ou None fora de um repositório git
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        alterado = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BASE_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        return f"{commit}-dirty" if alterado else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def get_environment(conn):
+    """
+    Versões do Python, das bibliotecas e do PostgreSQL usados no benchmark.
+
+    Args:
+        conn (psycopg2.connection): Conexão com o banco de dados
+
+    Returns:
+        dict: Descrição do ambiente
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT version()")
+        postgres = cursor.fetchone()[0]
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'postgres': postgres,
+    }
+
+def get_dataset(conn):
+    """
+    Parâmetros do dataset sintético e contagem atual das tabelas de origem.
+
+    Args:
+        conn (psycopg2.connection): Conexão com o banco de dados
+
+    Returns:
+        dict: Dataset carregado; 'synthetic' é None se o banco não foi gerado por bench.synthetic_data
+    """
+    contagens = {}
+    with conn.cursor() as cursor:
+        for table in GAMMADATA_TABLES:
+            cursor.execute(f"SELECT COUNT(*) FROM gammadata.{table}")
+            contagens[table] = cursor.fetchone()[0]
+    return {'synthetic': get_dataset_info(conn), 'row_counts': contagens}
+
+def _count_rows(table):
+    """
+    Quantidade de registros de uma tabela (None se não existir).
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+            if not cursor.fetchone()[0]:
+                return None
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+    finally:
+        if conn:
+            conn.rollback()
+            conn.close()
+
+def _source_months(conn):
+    """
+    Meses cobertos pelo positivador (primeiro ao último record_date).
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT MIN(record_date), MAX(record_date) FROM gammadata.positivador_historical")
+        inicio, fim = cursor.fetchone()
+    if inicio is None:
+        return []
+    return month_list(inicio, fim)
+
+def bench_derived_tables(meses):
+    """
+    Mede a montagem completa das tabelas derivadas e as deixa prontas para os KPIs.
+
+    Args:
+        meses (list): Meses montados em fact_client_month
+
+    Returns:
+        dict: Segundos por tabela derivada
+    """
+    resultado = {}
+    _, resultado['positivador_month_end'] = _timed(refresh_positivador_month_end, full_refresh=True)
+    _, resultado['client_farmer_periods'] = _timed(refresh_client_farmer_periods, full_refresh=True)
+    _, resultado['fact_client_month'] = _timed(refresh_fact_client_month, meses, full_refresh=True)
+
+    # Marca as tabelas como atualizadas no processo (as verificações incrementais
+    # não encontram nada a fazer) para que não entrem no tempo do primeiro KPI
+    ensure_positivador_month_end()
+    ensure_client_farmer_periods()
+    ensure_fact_client_month(meses)
+
+    for nome, segundos in resultado.items():
+        logger.info(f"Tabela derivada {nome}: {segundos:.2f}s")
+    return {nome: round(segundos, 4) for nome, segundos in resultado.items()}
+
+def bench_client_responsibility(repeat, sample_rows, seed):
+    """
+    Mede as funções de utils.client_responsibility.
+
+    filter_data_by_responsibility e add_responsible_farmer_info são medidas sobre
+    uma amostra sintética de (client_id, data) sorteada dos períodos carregados,
+    com o índice já construído.
+
+    Args:
+        repeat (int): Repetições de cada medida
+        sample_rows (int): Linhas da amostra
+        seed (int): Semente da amostra
+
+    Returns:
+        dict: Estatísticas por função
+    """
+    resultado = {}
+    periodos, resultado['get_client_farmer_periods'] = _repeat(get_client_farmer_periods, repeat, use_cache=False)
+    index, resultado['ResponsibilityIndex'] = _repeat(ResponsibilityIndex, repeat, periodos)
+
+    if periodos.empty:
+        logger.warning("Nenhum período de responsabilidade: amostra de client_responsibility não medida")
+        return resultado
+
+    rng = np.random.default_rng(seed)
+    inicio = pd.Timestamp(periodos['start_date'].min())
+    dias = max((pd.Timestamp.now().normalize() - inicio).days, 1)
+    amostra = pd.DataFrame({
+        'client_id': rng.choice(periodos['client_id'].unique(), sample_rows),
+        'data': inicio + pd.to_timedelta(rng.integers(0, dias, sample_rows), unit='D'),
+    })
+    farmer_id = int(pd.to_numeric(periodos['farmer_id']).mode().iloc[0])
+
+    _, resultado['filter_data_by_responsibility'] = _repeat(
+        filter_data_by_responsibility, repeat, amostra, 'data', index=index
+    )
+    _, resultado['filter_data_by_responsibility_farmer'] = _repeat(
+        filter_data_by_responsibility, repeat, amostra, 'data', farmer_id=farmer_id, index=index
+    )
+    _, resultado['add_responsible_farmer_info'] = _repeat(
+        add_responsible_farmer_info, repeat, amostra, 'data', index=index
+    )
+    resultado['sample_rows'] = sample_rows
+    resultado['periods'] = len(periodos)
+
+    for nome, stats in resultado.items():
+        if isinstance(stats, dict):
+            logger.info(f"client_responsibility {nome}: mediana {stats['median']:.3f}s")
+    return resultado
+
+def bench_kpi(kpi, repeat, log_level='WARNING', months_back=None, workers=None):
+    """
+    Executa um KPI repeat vezes e mede o total e as fases extract/transform/load.
+
+    Args:
+        kpi (str): Nome do KPI em KPIS
+        repeat (int): Repetições
+        log_level (str): Nível de logging repassado ao KPI
+        months_back (int, optional): Meses para trás dos KPIs que o suportam
+        workers (int, optional): Paralelismo interno dos KPIs que o suportam
+
+    Returns:
+        dict: Estatísticas por fase e total, registros na tabela de destino e sucesso
+    """
+    module = load_kpi_module(kpi)
+    argv = build_kpi_argv(kpi, months_back=months_back, full_refresh=True, log_level=log_level, workers=workers)
+    args = module.parse_arguments(argv)
+    kpi_logger = logging.getLogger(module.__name__)
+
+    tempos = {fase: [] for fase in PHASES + ('total',)}
+    sucesso = True
+    for execucao in range(repeat):
+        # Os períodos são recarregados a cada execução, como numa execução isolada do KPI
+        clear_periods_cache()
+        with PhaseTimer(module) as timer:
+            codigo, total = _timed(module.run, args, kpi_logger)
+        if codigo != 0:
+            logger.error(f"KPI {kpi} terminou com código {codigo} (execução {execucao + 1})")
+            sucesso = False
+            break
+        for fase in KPI_SUBMODULES:
+            tempos[fase].append(timer.totais[fase])
+        tempos['other'].append(max(total - sum(timer.totais.values()), 0.0))
+        tempos['total'].append(total)
+        logger.info(f"KPI {kpi} execução {execucao + 1}/{repeat}: {total:.2f}s "
+                    f"({', '.join(f'{fase} {timer.totais[fase]:.2f}s' for fase in KPI_SUBMODULES)})")
+
+    resultado = {'success': sucesso, 'argv': argv, 'rows': _count_rows(KPIS[kpi]['tabela'])}
+    if tempos['total']:
+        resultado.update({fase: _stats(valores) for fase, valores in tempos.items()})
+    return resultado
+
+def run_benchmark(kpis=None, repeat=DEFAULT_REPEAT, sample_rows=DEFAULT_SAMPLE_ROWS, months_back=None,
+                  workers=None, kpi_log_level='WARNING', output=None, seed=0):
+    """
+    Executa o benchmark completo e grava o relatório JSON.
+
+    Args:
+        kpis (list, optional): KPIs medidos (padrão: todos, na ordem de KPIS)
+        repeat (int): Repetições de cada medida
+        sample_rows (int): Linhas da amostra de client_responsibility
+        months_back (int, optional): Meses para trás dos KPIs que o suportam
+        workers (int, optional): Paralelismo interno dos KPIs que o suportam
+        kpi_log_level (str): Nível de logging dos KPIs durante as medidas
+        output (str, optional): Caminho do relatório (padrão: logs/bench_<data>_<commit>.json)
+        seed (int): Semente da amostra de client_responsibility
+
+    Returns:
+        tuple: (relatório, caminho do arquivo gravado)
+    """
+    kpis = kpis or list(KPIS)
+    commit = get_commit()
+
+    conn = None
+    try:
+        conn = get_connection()
+        ambiente = get_environment(conn)
+        dataset = get_dataset(conn)
+        meses = _source_months(conn)
+        conn.rollback()
+    finally:
+        if conn:
+            conn.close()
+
+    if not meses:
+        raise RuntimeError("gammadata.positivador_historical está vazio; gere os dados com 'python -m bench generate'")
+    if dataset['synthetic'] is None:
+        logger.warning("Banco sem gammadata.synthetic_dataset: os resultados não são comparáveis por escala")
+
+    logger.info(f"Benchmark: commit {commit}, KPIs {', '.join(kpis)}, {repeat} repetição(ões)")
+    relatorio = {
+        'schema_version': REPORT_VERSION,
+        'commit': commit,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': ambiente,
+        'dataset': dataset,
+        'parameters': {
+            'kpis': kpis,
+            'repeat': repeat,
+            'sample_rows': sample_rows,
+            'months_back': months_back,
+            'workers': workers,
+            'seed': seed,
+        },
+        'derived_tables': bench_derived_tables(meses),
+        'client_responsibility': bench_client_responsibility(repeat, sample_rows, seed),
+        'kpis': {},
+    }
+    for kpi in kpis:
+        try:
+            relatorio['kpis'][kpi] = bench_kpi(kpi, repeat, kpi_log_level, months_back, workers)
+        except Exception as e:
+            logger.error(f"Erro no benchmark do KPI {kpi}: {str(e)}")
+            relatorio['kpis'][kpi] = {'success': False, 'error': str(e)}
+
+    if output is None:
+        sufixo = (commit or 'nogit')[:7]
+        output = os.path.join(BASE_DIR, 'logs', f"bench_{datetime.now():%Y%m%d_%H%M%S}_{sufixo}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False, default=str)
+
+    logger.info(f"Relatório do benchmark gravado em {output}")
+    return relatorio, output
+
+def _medians(relatorio):
+    """
+    Medianas do relatório por medida (ex.: 'kpis.receita_cliente.extract').
+    """
+    medianas = {}
+    for nome, segundos in relatorio.get('derived_tables', {}).items():
+        medianas[f"derived_tables.{nome}"] = segundos
+    for nome, stats in relatorio.get('client_responsibility', {}).items():
+        if isinstance(stats, dict):
+            medianas[f"client_responsibility.{nome}"] = stats['median']
+    for kpi, resultado in relatorio.get('kpis', {}).items():
+        for fase in PHASES + ('total',):
+            if fase in resultado:
+                medianas[f"kpis.{kpi}.{fase}"] = resultado[fase]['median']
+    return medianas
+
+def compare_reports(base, novo):
+    """
+    Compara as medianas de dois relatórios do benchmark.
+
+    Args:
+        base (dict): Relatório de referência
+        novo (dict): Relatório comparado
+
+    Returns:
+        list: Linhas (medida, base, novo, variação relativa) das medidas presentes em ambos
+    """
+    if base.get('dataset', {}).get('synthetic') != novo.get('dataset', {}).get('synthetic'):
+        logger.warning("Os relatórios foram gerados com datasets diferentes")
+
+    medianas_base, medianas_novo = _medians(base), _medians(novo)
+    linhas = []
+    for medida, valor_base in medianas_base.items():
+        if medida not in medianas_novo:
+            continue
+        valor_novo = medianas_novo[medida]
+        variacao = (valor_novo - valor_base) / valor_base if valor_base else None
+        linhas.append((medida, valor_base, valor_novo, variacao))
+    return linhas
+
+def load_report(path):
+    """
+    Lê um relatório JSON do benchmark.
+    """
+    with open(path, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
@@ -0,0 +1,678 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Gerador de dados sintéticos do schema gammadata para benchmark dos ETLs.
+
+Cria as tabelas de origem lidas pelos KPIs (employees, clients,
+client_transfers, positivador_historical, coe, operacoes_estruturadas,
+revenue_records_historical e compensation) num Postgres local e as preenche
+via COPY (utils.bulk_load), em blocos, com valores monetários gerados em
+centavos (utils.money).
+
+Os dados seguem o formato usado pelas consultas dos KPIs:
+
+    - clients.farmer_id em texto (as consultas fazem CAST AS INTEGER)
+    - transferências de farmer encadeadas, terminando no farmer atual do cliente
+    - positivador diário (dias úteis) com receitas, churn e captação acumulados
+      no mês, de modo que o snapshot do último dia do mês tem o total do mês
+    - COE e operações estruturadas com parte dos registros liquidados/cancelados
+    - revenue_records_historical com categorias e produtos (alguns nulos)
+
+A geração é determinística para a mesma escala, semente e data final; os
+parâmetros ficam registrados em gammadata.synthetic_dataset e são repetidos
+no relatório do benchmark (bench.runner).
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from utils.db_connection import get_connection
+from utils.bulk_load import copy_dataframe
+from utils.source_indexes import ensure_source_indexes
+
+logger = logging.getLogger(__name__)
+
+# Escalas predefinidas: quantidade de clientes e intervalo (em dias úteis) entre
+# os dias do positivador; o último dia útil de cada mês é sempre gerado
+SCALES = {
+    '1k': {'clients': 1_000, 'positivador_step': 1},
+    '50k': {'clients': 50_000, 'positivador_step': 1},
+    '500k': {'clients': 500_000, 'positivador_step': 5},
+}
+
+DEFAULT_MONTHS = 24
+DEFAULT_SEED = 42
+
+# Hosts aceitos sem --allow-remote: o gerador apaga e recria o schema gammadata
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+# Clientes por farmer e taxas mensais por cliente
+CLIENTS_PER_FARMER = 250
+TRANSFER_RATE = 0.10
+COE_MONTHLY_RATE = 0.02
+OP_MONTHLY_RATE = 0.03
+REVENUE_RECORDS_PER_MONTH = 2.0
+
+# Linhas por COPY nas tabelas grandes
+COPY_BATCH_ROWS = 500_000
+
+POSITIVADOR_REVENUE_COLUMNS = [
+    'bovespa_revenue', 'futures_revenue', 'bank_fixed_income_revenue',
+    'private_fixed_income_revenue', 'public_fixed_income_revenue', 'rent_revenue'
+]
+
+# (categoria, produto) dos registros de receita; None exercita o COALESCE 'OUTROS'
+REVENUE_PRODUCTS = [
+    ('RENDA VARIÁVEL', 'Bovespa'),
+    ('RENDA VARIÁVEL', 'BM&F'),
+    ('RENDA FIXA', 'CDB'),
+    ('RENDA FIXA', 'Tesouro Direto'),
+    ('RENDA FIXA', 'Crédito Privado'),
+    ('FUNDOS', 'Fundos de Investimento'),
+    ('PREVIDÊNCIA', 'Previdência Privada'),
+    (None, None),
+]
+
+GAMMADATA_DDL = """
+CREATE SCHEMA IF NOT EXISTS gammadata;
+
+CREATE TABLE gammadata.employees (
+    employee_id INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    hierarchy_level VARCHAR(50),
+    status VARCHAR(20),
+    group_id INTEGER
+);
+
+CREATE TABLE gammadata.clients (
+    client_id BIGINT PRIMARY KEY,
+    name VARCHAR(255),
+    farmer_id VARCHAR(20),
+    creation_date DATE
+);
+
+CREATE TABLE gammadata.client_transfers (
+    transfer_id SERIAL PRIMARY KEY,
+    client_id BIGINT NOT NULL,
+    old_farmer_id VARCHAR(20),
+    new_farmer_id VARCHAR(20),
+    transfer_date DATE NOT NULL,
+    transfer_type VARCHAR(20) NOT NULL
+);
+
+CREATE TABLE gammadata.positivador_historical (
+    record_date DATE NOT NULL,
+    client_id BIGINT NOT NULL,
+    bovespa_revenue NUMERIC(15,2),
+    futures_revenue NUMERIC(15,2),
+    bank_fixed_income_revenue NUMERIC(15,2),
+    private_fixed_income_revenue NUMERIC(15,2),
+    public_fixed_income_revenue NUMERIC(15,2),
+    rent_revenue NUMERIC(15,2),
+    churn NUMERIC(15,2),
+    patrimony NUMERIC(15,2),
+    net_capture NUMERIC(15,2)
+);
+
+CREATE TABLE gammadata.coe (
+    coe_id SERIAL PRIMARY KEY,
+    client_id BIGINT NOT NULL,
+    date DATE NOT NULL,
+    financial_value NUMERIC(15,2),
+    commission_percentage NUMERIC(5,2),
+    status VARCHAR(30)
+);
+
+CREATE TABLE gammadata.operacoes_estruturadas (
+    operacao_id SERIAL PRIMARY KEY,
+    client_id BIGINT NOT NULL,
+    data DATE NOT NULL,
+    comissao NUMERIC(15,2),
+    status_operacao VARCHAR(30)
+);
+
+CREATE TABLE gammadata.revenue_records_historical (
+    record_id SERIAL PRIMARY KEY,
+    record_date DATE NOT NULL,
+    client_id BIGINT NOT NULL,
+    category VARCHAR(255),
+    product VARCHAR(255),
+    gross_revenue NUMERIC(15,2),
+    net_revenue NUMERIC(15,2),
+    gross_commission NUMERIC(15,2)
+);
+
+CREATE TABLE gammadata.compensation (
+    employee_id INTEGER NOT NULL,
+    target_date DATE NOT NULL,
+    target_churn NUMERIC(15,2),
+    target_net_capture NUMERIC(15,2),
+    target_revenue NUMERIC(15,2),
+    junior_churn_bonus NUMERIC(5,2),
+    pleno_churn_bonus NUMERIC(5,2),
+    junior_referral_bonus NUMERIC(5,2),
+    pleno_referral_bonus NUMERIC(5,2),
+    junior_revenue_bonus NUMERIC(5,2),
+    pleno_revenue_bonus NUMERIC(5,2),
+    PRIMARY KEY (employee_id, target_date)
+);
+
+CREATE TABLE gammadata.synthetic_dataset (
+    scale VARCHAR(20) NOT NULL,
+    clients INTEGER NOT NULL,
+    months INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    positivador_step INTEGER NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    row_counts JSONB,
+    generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+GAMMADATA_TABLES = [
+    'employees', 'clients', 'client_transfers', 'positivador_historical', 'coe',
+    'operacoes_estruturadas', 'revenue_records_historical', 'compensation'
+]
+
+def _random_dates(rng, inicio, fim, size):
+    """
+    Sorteia datas uniformes em [inicio, fim].
+
+    Args:
+        rng (numpy.random.Generator): Gerador de números aleatórios
+        inicio (pandas.Timestamp): Primeira data
+        fim (pandas.Timestamp): Última data
+        size (int): Quantidade de datas
+
+    Returns:
+        numpy.ndarray: Datas (datetime64[D])
+    """
+    dias = (fim - inicio).days + 1
+    return np.datetime64(inicio.date(), 'D') + rng.integers(0, dias, size)
+
+def _business_day_in_month(rng, meses, fim):
+    """
+    Sorteia um dia útil dentro de cada mês informado, sem passar da data final.
+
+    Args:
+        rng (numpy.random.Generator): Gerador de números aleatórios
+        meses (numpy.ndarray): Primeiros dias dos meses (datetime64[D])
+        fim (pandas.Timestamp): Data final dos dados
+
+    Returns:
+        numpy.ndarray: Datas (datetime64[D])
+    """
+    limite = np.datetime64(fim.date(), 'D')
+    proximo_mes = (meses.astype('datetime64[M]') + 1).astype('datetime64[D]')
+    dias_uteis = np.busday_count(meses, np.minimum(proximo_mes, limite + 1))
+    deslocamento = np.floor(rng.random(len(meses)) * np.maximum(dias_uteis, 1)).astype(np.int64)
+    return np.minimum(np.busday_offset(meses, deslocamento, roll='forward'), limite)
+
+def positivador_days(inicio, fim, step=1):
+    """
+    Dias do positivador: dias úteis a cada step, mais o último dia útil de cada mês.
+
+    Args:
+        inicio (pandas.Timestamp): Primeira data
+        fim (pandas.Timestamp): Última data
+        step (int): Intervalo entre os dias gerados, em dias úteis
+
+    Returns:
+        pandas.DatetimeIndex: Dias gerados, em ordem
+    """
+    dias = pd.bdate_range(inicio, fim)
+    ultimos = dias.to_series().groupby(dias.to_period('M')).max()
+    return dias[::step].union(pd.DatetimeIndex(ultimos.values))
+
+class SyntheticGammadata:
+    """
+    Gera as tabelas do schema gammadata para uma escala e uma semente.
+
+    Os atributos guardam o que é compartilhado entre as tabelas (farmers e
+    clientes); cada método generate_* retorna ou produz em blocos os
+    DataFrames de uma tabela, com valores monetários em centavos.
+    """
+
+    def __init__(self, scale='1k', months=DEFAULT_MONTHS, seed=DEFAULT_SEED, end_date=None, positivador_step=None):
+        """
+        Args:
+            scale (str): Escala em SCALES
+            months (int): Meses de histórico antes do mês da data final
+            seed (int): Semente dos números aleatórios
+            end_date (datetime, optional): Data final dos dados (padrão: hoje)
+            positivador_step (int, optional): Intervalo em dias úteis do positivador
+                (padrão: o da escala)
+        """
+        if scale not in SCALES:
+            raise ValueError(f"Escala inválida: {scale}. Disponíveis: {', '.join(SCALES)}")
+
+        self.scale = scale
+        self.months = months
+        self.seed = seed
+        self.n_clients = SCALES[scale]['clients']
+        self.positivador_step = positivador_step or SCALES[scale]['positivador_step']
+        self.end_date = pd.Timestamp(end_date or datetime.now()).normalize()
+        self.start_date = self.end_date.replace(day=1) - pd.DateOffset(months=months)
+        self.rng = np.random.default_rng(seed)
+
+        self.employees = self._build_employees()
+        self.clients = self._build_clients()
+
+    def _build_employees(self):
+        """
+        Farmers (junior/pleno, grupo 1, alguns inativos) e demais funcionários.
+        """
+        n_farmers = max(4, self.n_clients // CLIENTS_PER_FARMER)
+        n_outros = max(2, n_farmers // 20)
+        total = n_farmers + n_outros
+        farmer = np.arange(total) < n_farmers
+
+        return pd.DataFrame({
+            'employee_id': np.arange(1, total + 1, dtype=np.int64),
+            'name': [f"{'Farmer' if f else 'Assessor'} {i:05d}" for i, f in zip(range(1, total + 1), farmer)],
+            'hierarchy_level': np.where(
+                farmer,
+                self.rng.choice(['junior', 'pleno'], total, p=[0.6, 0.4]),
+                self.rng.choice(['senior', 'gestor'], total)
+            ),
+            'status': np.where(self.rng.random(total) < 0.92, 'active', 'inactive'),
+            'group_id': np.where(farmer, 1, 2),
+        })
+
+    def _build_clients(self):
+        """
+        Clientes com farmer atual (pesos desiguais entre farmers) e data de criação.
+        """
+        farmers = self.employees.loc[self.employees['group_id'] == 1, 'employee_id'].to_numpy()
+        pesos = self.rng.pareto(1.5, len(farmers)) + 1
+        farmer_atual = self.rng.choice(farmers, self.n_clients, p=pesos / pesos.sum())
+
+        # 80% criados antes do período gerado, 20% ao longo dele
+        antigos = self.rng.random(self.n_clients) < 0.8
+        criacao = np.where(
+            antigos,
+            _random_dates(self.rng, self.start_date - pd.DateOffset(years=5), self.start_date - pd.Timedelta(days=1), self.n_clients),
+            _random_dates(self.rng, self.start_date, self.end_date, self.n_clients)
+        )
+
+        client_ids = np.arange(100_001, 100_001 + self.n_clients, dtype=np.int64)
+        return pd.DataFrame({
+            'client_id': client_ids,
+            'name': [f"Cliente {i}" for i in client_ids],
+            'farmer_id': farmer_atual.astype(str),
+            'creation_date': pd.to_datetime(criacao),
+        })
+
+    def _month_starts(self):
+        """
+        Primeiros dias dos meses gerados (datetime64[D]).
+        """
+        return pd.date_range(self.start_date, self.end_date, freq='MS').to_numpy().astype('datetime64[D]')
+
+    def _monthly_events(self, rate):
+        """
+        Sorteia eventos mensais por cliente (Poisson), a partir do mês de criação.
+
+        Args:
+            rate (float): Média de eventos por cliente e mês
+
+        Returns:
+            tuple: (client_id, data) dos eventos, em arrays
+        """
+        meses = self._month_starts()
+        criacao = self.clients['creation_date'].to_numpy().astype('datetime64[D]')
+        ids, datas = [], []
+        for mes in meses:
+            ativos = np.flatnonzero(criacao < mes.astype('datetime64[M]') + 1)
+            quantidade = self.rng.poisson(rate, len(ativos))
+            clientes = np.repeat(ativos, quantidade)
+            if not len(clientes):
+                continue
+            dias = _business_day_in_month(self.rng, np.full(len(clientes), mes), self.end_date)
+            dias = np.maximum(dias, criacao[clientes])
+            ids.append(self.clients['client_id'].to_numpy()[clientes])
+            datas.append(dias)
+        if not ids:
+            return np.array([], dtype=np.int64), np.array([], dtype='datetime64[D]')
+        return np.concatenate(ids), np.concatenate(datas)
+
+    def generate_transfers(self):
+        """
+        Transferências de farmer (uma ou duas por cliente transferido, terminando no
+        farmer atual) e algumas de outro tipo, ignoradas pelos KPIs.
+
+        Returns:
+            pandas.DataFrame: Registros de client_transfers
+        """
+        farmers = self.employees.loc[self.employees['group_id'] == 1, 'employee_id'].to_numpy()
+        transferidos = np.flatnonzero(self.rng.random(self.n_clients) < TRANSFER_RATE)
+        client_ids = self.clients['client_id'].to_numpy()
+        farmer_atual = self.clients['farmer_id'].to_numpy()
+        criacao = self.clients['creation_date'].to_numpy()
+
+        registros = []
+        for i in transferidos:
+            inicio = max(pd.Timestamp(criacao[i]), self.start_date) + pd.Timedelta(days=1)
+            if inicio >= self.end_date:
+                continue
+            quantidade = 1 if self.rng.random() < 0.8 else 2
+            datas = sorted(pd.to_datetime(_random_dates(self.rng, inicio, self.end_date, quantidade)))
+            # Cadeia de farmers: anteriores sorteados, o último é o atual do cliente
+            cadeia = [str(f) for f in self.rng.choice(farmers, quantidade)] + [farmer_atual[i]]
+            for j, data in enumerate(datas):
+                registros.append((client_ids[i], cadeia[j], cadeia[j + 1], data, 'FARMER'))
+
+        outros = self.rng.choice(self.n_clients, max(1, self.n_clients // 50), replace=False)
+        datas = pd.to_datetime(_random_dates(self.rng, self.start_date, self.end_date, len(outros)))
+        for i, data in zip(outros, datas):
+            registros.append((client_ids[i], None, None, data, 'HUNTER'))
+
+        return pd.DataFrame(registros, columns=['client_id', 'old_farmer_id', 'new_farmer_id', 'transfer_date', 'transfer_type'])
+
+    def generate_positivador(self):
+        """
+        Gera o positivador diário em blocos.
+
+        Receitas, churn e captação são acumulados no mês (zerados na virada) e o
+        patrimônio segue um passeio aleatório; cada dia tem uma linha por cliente
+        já criado.
+
+        Yields:
+            pandas.DataFrame: Blocos de positivador_historical (valores em centavos)
+        """
+        n = self.n_clients
+        client_ids = self.clients['client_id'].to_numpy()
+        criacao = self.clients['creation_date'].to_numpy().astype('datetime64[D]')
+
+        # Receita média diária por cliente e produto (centavos); parte dos clientes
+        # não opera cada produto
+        taxas = self.rng.lognormal(mean=7.0, sigma=1.2, size=(n, len(POSITIVADOR_REVENUE_COLUMNS)))
+        taxas *= self.rng.random((n, len(POSITIVADOR_REVENUE_COLUMNS))) < [0.5, 0.1, 0.6, 0.3, 0.4, 0.1]
+        patrimonio = self.rng.lognormal(mean=12.0, sigma=1.3, size=n) * 100
+
+        receitas = np.zeros((n, len(POSITIVADOR_REVENUE_COLUMNS)), dtype=np.int64)
+        churn = np.zeros(n, dtype=np.int64)
+        captacao = np.zeros(n, dtype=np.int64)
+
+        mes_atual = None
+        dia_anterior = None
+        blocos, linhas = [], 0
+        for dia in positivador_days(self.start_date, self.end_date, self.positivador_step):
+            if dia.month != mes_atual:
+                receitas[:] = 0
+                churn[:] = 0
+                captacao[:] = 0
+                mes_atual = dia.month
+            # Dias úteis desde o último dia gerado (o positivador pode pular dias)
+            dias = 1 if dia_anterior is None else int(np.busday_count(dia_anterior.date(), dia.date()))
+            dia_anterior = dia
+
+            receitas += np.rint(taxas * dias * self.rng.gamma(0.5, 2.0, taxas.shape)).astype(np.int64)
+            fluxo = self.rng.normal(0, 0.002, n) * patrimonio * dias
+            saidas = (self.rng.random(n) < 0.0005 * dias) * patrimonio * self.rng.uniform(0.1, 0.6, n)
+            captacao += np.rint(fluxo).astype(np.int64)
+            churn += np.rint(saidas).astype(np.int64)
+            patrimonio = np.maximum(patrimonio * (1 + self.rng.normal(0.0003, 0.004, n) * dias) + fluxo - saidas, 0)
+
+            ativos = criacao <= np.datetime64(dia.date(), 'D')
+            df = pd.DataFrame({'record_date': dia, 'client_id': client_ids[ativos]})
+            for k, col in enumerate(POSITIVADOR_REVENUE_COLUMNS):
+                df[col] = receitas[ativos, k]
+            df['churn'] = churn[ativos]
+            df['patrimony'] = np.rint(patrimonio[ativos]).astype(np.int64)
+            df['net_capture'] = captacao[ativos]
+
+            blocos.append(df)
+            linhas += len(df)
+            if linhas >= COPY_BATCH_ROWS:
+                yield pd.concat(blocos, ignore_index=True)
+                blocos, linhas = [], 0
+        if blocos:
+            yield pd.concat(blocos, ignore_index=True)
+
+    def generate_coe(self):
+        """
+        Returns:
+            pandas.DataFrame: Registros de coe (financial_value em centavos)
+        """
+        ids, datas = self._monthly_events(COE_MONTHLY_RATE)
+        n = len(ids)
+        return pd.DataFrame({
+            'client_id': ids,
+            'date': pd.to_datetime(datas),
+            'financial_value': np.rint(self.rng.lognormal(mean=10.5, sigma=0.9, size=n) * 100).astype(np.int64),
+            'commission_percentage': self.rng.choice([1.0, 1.5, 2.0, 2.5, 3.0, 4.0], n),
+            'status': self.rng.choice(['Liquidada', 'Pendente', 'Cancelada'], n, p=[0.85, 0.10, 0.05]),
+        })
+
+    def generate_operacoes_estruturadas(self):
+        """
+        Returns:
+            pandas.DataFrame: Registros de operacoes_estruturadas (comissao em centavos)
+        """
+        ids, datas = self._monthly_events(OP_MONTHLY_RATE)
+        n = len(ids)
+        return pd.DataFrame({
+            'client_id': ids,
+            'data': pd.to_datetime(datas),
+            'comissao': np.rint(self.rng.lognormal(mean=6.0, sigma=1.1, size=n) * 100).astype(np.int64),
+            'status_operacao': self.rng.choice(['Executado', 'Cancelado'], n, p=[0.9, 0.1]),
+        })
+
+    def generate_revenue_records(self):
+        """
+        Gera os registros de receita por produto em blocos.
+
+        Yields:
+            pandas.DataFrame: Blocos de revenue_records_historical (valores em centavos)
+        """
+        ids, datas = self._monthly_events(REVENUE_RECORDS_PER_MONTH)
+        for inicio in range(0, len(ids), COPY_BATCH_ROWS):
+            bloco_ids = ids[inicio:inicio + COPY_BATCH_ROWS]
+            n = len(bloco_ids)
+            produtos = self.rng.choice(len(REVENUE_PRODUCTS), n, p=[0.2, 0.05, 0.2, 0.15, 0.1, 0.15, 0.1, 0.05])
+            bruta = np.rint(self.rng.lognormal(mean=7.0, sigma=1.4, size=n) * 100).astype(np.int64)
+            yield pd.DataFrame({
+                'record_date': pd.to_datetime(datas[inicio:inicio + COPY_BATCH_ROWS]),
+                'client_id': bloco_ids,
+                'category': [REVENUE_PRODUCTS[p][0] for p in produtos],
+                'product': [REVENUE_PRODUCTS[p][1] for p in produtos],
+                'gross_revenue': bruta,
+                'net_revenue': np.rint(bruta * self.rng.uniform(0.80, 0.95, n)).astype(np.int64),
+                'gross_commission': np.rint(bruta * self.rng.uniform(0.40, 0.60, n)).astype(np.int64),
+            })
+
+    def generate_compensation(self):
+        """
+        Metas e percentuais de bônus por farmer e mês, proporcionais à carteira.
+
+        Returns:
+            pandas.DataFrame: Registros de compensation (metas em centavos)
+        """
+        farmers = self.employees.loc[self.employees['group_id'] == 1, 'employee_id'].to_numpy()
+        carteira = self.clients['farmer_id'].astype(int).value_counts().reindex(farmers, fill_value=0).to_numpy()
+        meses = pd.to_datetime(self._month_starts())
+
+        df = pd.DataFrame({
+            'employee_id': np.tile(farmers, len(meses)),
+            'target_date': np.repeat(meses, len(farmers)),
+        })
+        clientes = np.tile(carteira, len(meses))
+        n = len(df)
+        df['target_churn'] = np.rint(clientes * self.rng.uniform(5_000, 15_000, n) * 100).astype(np.int64)
+        df['target_net_capture'] = np.rint(clientes * self.rng.uniform(10_000, 40_000, n) * 100).astype(np.int64)
+        df['target_revenue'] = np.rint(clientes * self.rng.uniform(300, 900, n) * 100).astype(np.int64)
+        for meta in ['churn', 'referral', 'revenue']:
+            df[f'junior_{meta}_bonus'] = self.rng.choice([1.0, 1.5, 2.0, 2.5], n)
+            df[f'pleno_{meta}_bonus'] = self.rng.choice([2.0, 2.5, 3.0, 3.5], n)
+        return df
+
+def _copy(cursor, blocos, table, cents_columns=()):
+    """
+    Carrega um DataFrame (ou blocos) por COPY e retorna a quantidade de linhas.
+    """
+    if isinstance(blocos, pd.DataFrame):
+        blocos = [blocos]
+    total = 0
+    for df in blocos:
+        total += copy_dataframe(cursor, df, f"gammadata.{table}", list(df.columns), cents_columns=cents_columns)
+    logger.info(f"gammadata.{table}: {total} registros")
+    return total
+
+def _check_target(drop, allow_remote):
+    """
+    Verifica se o banco configurado pode receber os dados sintéticos.
+
+    Args:
+        drop (bool): Permite apagar os schemas gammadata e analysis existentes
+        allow_remote (bool): Permite um host fora de LOCAL_HOSTS
+
+    Returns:
+        bool: True se o schema gammadata já existe (e será recriado)
+    """
+    host = os.getenv('DB_HOST', '')
+    if host not in LOCAL_HOSTS and not allow_remote:
+        raise RuntimeError(f"DB_HOST={host} não é local; os dados sintéticos apagam o schema gammadata. "
+                           f"Use --allow-remote para um banco de teste remoto")
+
+    conn = None
+    try:
+        conn = get_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regnamespace('gammadata') IS NOT NULL")
+            existe = cursor.fetchone()[0]
+        conn.commit()
+    finally:
+        if conn:
+            conn.close()
+
+    if existe and not drop:
+        raise RuntimeError("O schema gammadata já existe; use --drop para recriá-lo (apaga também o schema analysis)")
+    return existe
+
+def generate_gammadata(scale='1k', months=DEFAULT_MONTHS, seed=DEFAULT_SEED, end_date=None,
+                       positivador_step=None, drop=False, allow_remote=False, create_indexes=True):
+    """
+    Recria o schema gammadata com dados sintéticos.
+
+    Com drop, os schemas gammadata e analysis existentes são apagados (as
+    tabelas derivadas de analysis dependem dos dados de origem). Cada tabela é
+    carregada e confirmada em sequência; ao final, os índices das tabelas de
+    origem (utils.source_indexes) são criados e as estatísticas atualizadas.
+
+    Args:
+        scale (str): Escala em SCALES
+        months (int): Meses de histórico antes do mês da data final
+        seed (int): Semente dos números aleatórios
+        end_date (datetime, optional): Data final dos dados (padrão: hoje)
+        positivador_step (int, optional): Intervalo em dias úteis do positivador
+        drop (bool): Apaga os schemas gammadata e analysis existentes
+        allow_remote (bool): Permite um DB_HOST que não seja local
+        create_indexes (bool): Cria os índices usados pelas extrações
+
+    Returns:
+        dict: Quantidade de registros por tabela
+    """
+    existe = _check_target(drop, allow_remote)
+    gerador = SyntheticGammadata(scale, months, seed, end_date, positivador_step)
+    logger.info(f"Gerando gammadata sintético: escala {scale} ({gerador.n_clients} clientes), "
+                f"{gerador.start_date:%Y-%m-%d} a {gerador.end_date:%Y-%m-%d}, semente {seed}, "
+                f"positivador a cada {gerador.positivador_step} dia(s) útil(eis)")
+
+    contagens = {}
+    conn = None
+    try:
+        conn = get_connection()
+        with conn.cursor() as cursor:
+            if existe:
+                logger.warning("Apagando os schemas gammadata e analysis existentes")
+                cursor.execute("DROP SCHEMA IF EXISTS gammadata CASCADE; DROP SCHEMA IF EXISTS analysis CASCADE;")
+            cursor.execute(GAMMADATA_DDL)
+            conn.commit()
+
+            contagens['employees'] = _copy(cursor, gerador.employees, 'employees')
+            contagens['clients'] = _copy(cursor, gerador.clients, 'clients')
+            contagens['client_transfers'] = _copy(cursor, gerador.generate_transfers(), 'client_transfers')
+            conn.commit()
+
+            contagens['positivador_historical'] = _copy(
+                cursor, gerador.generate_positivador(), 'positivador_historical',
+                cents_columns=POSITIVADOR_REVENUE_COLUMNS + ['churn', 'patrimony', 'net_capture']
+            )
+            conn.commit()
+
+            contagens['coe'] = _copy(cursor, gerador.generate_coe(), 'coe', cents_columns=['financial_value'])
+            contagens['operacoes_estruturadas'] = _copy(
+                cursor, gerador.generate_operacoes_estruturadas(), 'operacoes_estruturadas', cents_columns=['comissao']
+            )
+            contagens['revenue_records_historical'] = _copy(
+                cursor, gerador.generate_revenue_records(), 'revenue_records_historical',
+                cents_columns=['gross_revenue', 'net_revenue', 'gross_commission']
+            )
+            contagens['compensation'] = _copy(
+                cursor, gerador.generate_compensation(), 'compensation',
+                cents_columns=['target_churn', 'target_net_capture', 'target_revenue']
+            )
+
+            cursor.execute("""
+            INSERT INTO gammadata.synthetic_dataset
+                (scale, clients, months, seed, positivador_step, start_date, end_date, row_counts)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, (scale, gerador.n_clients, months, seed, gerador.positivador_step,
+                  gerador.start_date.date(), gerador.end_date.date(), json.dumps(contagens)))
+            conn.commit()
+
+        if create_indexes:
+            ensure_source_indexes(create=True)
+
+        # Estatísticas atualizadas para que os planos reflitam os dados gerados
+        with conn.cursor() as cursor:
+            for table in GAMMADATA_TABLES:
+                cursor.execute(f"ANALYZE gammadata.{table}")
+        conn.commit()
+
+        logger.info(f"gammadata sintético gerado: {sum(contagens.values())} registros")
+        return contagens
+
+    except Exception as e:
+        logger.error(f"Erro ao gerar gammadata sintético: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+def get_dataset_info(conn):
+    """
+    Lê os parâmetros do dataset sintético carregado (gammadata.synthetic_dataset).
+
+    Args:
+        conn (psycopg2.connection): Conexão com o banco de dados
+
+    Returns:
+        dict or None: Parâmetros e contagens, ou None se o banco não tiver dados sintéticos
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('gammadata.synthetic_dataset') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return None
+        cursor.execute("""
+        SELECT scale, clients, months, seed, positivador_step, start_date, end_date, row_counts, generated_at
+        FROM gammadata.synthetic_dataset
+        ORDER BY generated_at DESC
+        LIMIT 1
+        """)
+        linha = cursor.fetchone()
+    if linha is None:
+        return None
+    colunas = ['scale', 'clients', 'months', 'seed', 'positivador_step', 'start_date', 'end_date', 'row_counts', 'generated_at']
+    info = dict(zip(colunas, linha))
+    for col in ['start_date', 'end_date', 'generated_at']:
+        info[col] = info[col].isoformat()
+    return info
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pacote de orquestração dos ETLs de KPI.
+
+Uso: python -m etl run --kpi all
+"""
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Linha de comando do orquestrador de ETLs.
+
+Exemplos:
+    python -m etl run --kpi all
+    python -m etl run --kpi all --workers 4
+    python -m etl run --kpi receita_cliente,receita_farmer_m_passado --farmer-id 42
+    python -m etl list
+    python -m etl indexes --create
+"""
+
+import argparse
+import sys
+import traceback
+
+from etl.orchestrator import KPIS, resolve_kpis, run_pipeline, setup_logging
+from utils.source_indexes import ensure_source_indexes
+
+def parse_arguments(argv=None):
+    """
+    Analisa os argumentos da linha de comando.
+
+    Args:
+        argv (list, optional): Argumentos a analisar; se None, usa sys.argv
+
+    Returns:
+        argparse.Namespace: Argumentos analisados
+    """
+    parser = argparse.ArgumentParser(prog='python -m etl', description='Orquestrador dos ETLs de KPI')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Executa um ou mais KPIs no processo atual')
+    run_parser.add_argument(
+        '--kpi',
+        type=str,
+        default='all',
+        help=f"'all' ou KPIs separados por vírgula: {', '.join(KPIS)} (default: all)"
+    )
+    run_parser.add_argument(
+        '--farmer-id',
+        type=int,
+        default=None,
+        help='ID do farmer para filtrar (default: None - processa todos)'
+    )
+    run_parser.add_argument(
+        '--months-back',
+        type=int,
+        default=None,
+        help='Número de meses para trás dos KPIs de meses anteriores (default: padrão de cada KPI)'
+    )
+    run_parser.add_argument(
+        '--load-mode',
+        type=str,
+        choices=['replace', 'merge'],
+        default=None,
+        help='Modo de carga dos KPIs que o suportam (default: padrão de cada KPI)'
+    )
+    run_parser.add_argument(
+        '--full-refresh',
+        action='store_true',
+        help='Reprocessa todos os meses dos KPIs incrementais'
+    )
+    run_parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Máximo de tarefas simultâneas; use no máximo o orçamento de conexões do banco (default: 1 - sequencial)'
+    )
+    run_parser.add_argument(
+        '--no-shared-periods',
+        action='store_true',
+        help='Não compartilha os períodos de responsabilidade entre os KPIs'
+    )
+    run_parser.add_argument(
+        '--log-level',
+        type=str,
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='INFO',
+        help='Nível de logging (default: INFO)'
+    )
+
+    subparsers.add_parser('list', help='Lista os KPIs disponíveis')
+
+    indexes_parser = subparsers.add_parser('indexes', help='Verifica os índices das tabelas de origem usados pelas extrações')
+    indexes_parser.add_argument(
+        '--create',
+        action='store_true',
+        help='Cria os índices ausentes e recria os inválidos (default: apenas reporta)'
+    )
+    indexes_parser.add_argument(
+        '--log-level',
+        type=str,
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='INFO',
+        help='Nível de logging (default: INFO)'
+    )
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Função principal do orquestrador.
+
+    Returns:
+        int: Código de saída (0 se todos os KPIs foram concluídos com sucesso)
+    """
+    args = parse_arguments(argv)
+
+    if args.command == 'list':
+        for nome, kpi in KPIS.items():
+            print(f"{nome:<30} {kpi['descricao']}")
+        return 0
+
+    logger = setup_logging(args.log_level)
+
+    if args.command == 'indexes':
+        try:
+            resultado = ensure_source_indexes(create=args.create)
+        except Exception as e:
+            logger.error(f"Erro na verificação de índices: {str(e)}")
+            return 1
+        # Sem --create, índices ausentes ou inválidos resultam em código de saída 1
+        pendentes = len(resultado['missing']) + len(resultado['invalid']) - len(resultado['created'])
+        return 1 if pendentes else 0
+
+    try:
+        kpis = resolve_kpis(args.kpi)
+        logger.info(f"Iniciando orquestrador de ETLs. KPIs: {', '.join(kpis)}")
+
+        resultados = run_pipeline(
+            kpis,
+            farmer_id=args.farmer_id,
+            months_back=args.months_back,
+            load_mode=args.load_mode,
+            full_refresh=args.full_refresh,
+            log_level=args.log_level,
+            share_periods=not args.no_shared_periods,
+            workers=args.workers
+        )
+
+        falhas = [r['kpi'] for r in resultados if not r['success']]
+        if falhas:
+            logger.error(f"ETL concluído com erros nos KPIs: {', '.join(falhas)}")
+            return 1
+        logger.info("ETL concluído com sucesso")
+        return 0
+
+    except Exception as e:
+        logger.error(f"Erro na execução do orquestrador: {str(e)}")
+        logger.error(traceback.format_exc())
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
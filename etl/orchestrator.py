@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Orquestrador dos ETLs de KPI em um único processo.
+
+Substitui a execução sequencial de um processo Python por KPI (run_etl.ps1):
+cada KPI é importado e executado em processo, compartilhando o pool de
+conexões, o índice de períodos de responsabilidade farmer-cliente e os meses
+já montados da tabela fato analysis.fact_client_month, e o tempo de execução
+de cada KPI é registrado ao final. As etapas dos KPIs são executadas pelo
+agendador de etl.scheduler, opcionalmente em paralelo.
+"""
+
+import importlib.util
+import logging
+import os
+import sys
+import time
+import traceback
+from datetime import datetime
+
+# Caminho absoluto para o diretório raiz do projeto
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from utils.db_connection import get_pool, log_pool_stats
+from utils.client_responsibility import enable_shared_index, disable_shared_index, log_periods_cache_stats
+from utils.fact_client_month import reset_fact_client_month_state
+from etl.scheduler import DagScheduler, Task, STATUS_OK
+
+logger = logging.getLogger(__name__)
+
+# KPIs na ordem de execução de "all": diretório do main.py, tabela carregada e opções repassadas
+KPIS = {
+    'receita_farmer_m_passado': {
+        'path': 'kpis/farmer/receita/kpi_receita_farmer_m_passado',
+        'tabela': 'analysis.receita_farmer_m_passado',
+        'descricao': 'Receitas por Farmer (Meses Anteriores)',
+        'opcoes': ('months_back', 'load_mode', 'full_refresh'),
+    },
+    'receita_farmer_m_presente': {
+        'path': 'kpis/farmer/receita/kpi_receita_farmer_m_presente',
+        'tabela': 'analysis.receita_farmer_m_presente',
+        'descricao': 'Receita por Farmer (Mês Atual)',
+        'opcoes': ('load_mode',),
+    },
+    'receita_cliente': {
+        'path': 'kpis/farmer/receita/kpi_receita_cliente',
+        'tabela': 'analysis.receita_cliente',
+        'descricao': 'Receita por Cliente',
+        'opcoes': ('months_back',),
+    },
+    'receita_produto_f_m_passado': {
+        'path': 'kpis/farmer/receita/kpi_receita_produto_f_m_passado',
+        'tabela': 'analysis.receita_produto_f_m_passado',
+        'descricao': 'Receita por Produto (Meses Anteriores)',
+        'opcoes': ('months_back', 'load_mode', 'full_refresh'),
+    },
+    'fechamento_farmer_m_passado': {
+        'path': 'kpis/farmer/comissao/kpi_fechamento_m_passado',
+        'tabela': 'analysis.fechamento_farmer_m_passado',
+        'descricao': 'Comissão por Farmer (Meses Anteriores)',
+        'opcoes': ('months_back', 'workers'),
+    },
+    'fechamento_farmer_m_presente': {
+        'path': 'kpis/farmer/comissao/kpi_fechamento_m_presente',
+        'tabela': 'analysis.fechamento_farmer_m_presente',
+        'descricao': 'Comissão por Farmer (Mês Atual)',
+        'opcoes': (),
+    },
+}
+
+# Módulos com nomes genéricos presentes em todos os diretórios de KPI
+KPI_SUBMODULES = ('extract', 'transform', 'load')
+
+def resolve_kpis(kpi):
+    """
+    Converte o argumento --kpi em uma lista de KPIs.
+
+    Args:
+        kpi (str): 'all' ou nomes de KPI separados por vírgula
+
+    Returns:
+        list: Nomes dos KPIs, na ordem de KPIS
+    """
+    if kpi == 'all':
+        return list(KPIS)
+
+    nomes = [nome.strip() for nome in kpi.split(',') if nome.strip()]
+    desconhecidos = [nome for nome in nomes if nome not in KPIS]
+    if desconhecidos:
+        raise ValueError(f"KPI desconhecido: {', '.join(desconhecidos)} (disponíveis: {', '.join(KPIS)})")
+    return [nome for nome in KPIS if nome in nomes]
+
+def load_kpi_module(kpi):
+    """
+    Importa o main.py de um KPI com seus módulos extract/transform/load.
+
+    Os diretórios de KPI usam os mesmos nomes de módulo (extract, transform,
+    load); para que cada KPI enxergue os seus, eles são removidos de
+    sys.modules antes e depois da importação. As funções importadas pelo
+    main.py continuam referenciando os módulos corretos.
+
+    Args:
+        kpi (str): Nome do KPI em KPIS
+
+    Returns:
+        module: Módulo main.py do KPI, com parse_arguments() e run()
+    """
+    kpi_dir = os.path.join(BASE_DIR, KPIS[kpi]['path'])
+    nome_modulo = f"etl_kpi_{kpi}"
+
+    for nome in KPI_SUBMODULES:
+        sys.modules.pop(nome, None)
+    sys.path.insert(0, kpi_dir)
+    try:
+        spec = importlib.util.spec_from_file_location(nome_modulo, os.path.join(kpi_dir, 'main.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[nome_modulo] = module
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(nome_modulo, None)
+        raise
+    finally:
+        sys.path.remove(kpi_dir)
+        for nome in KPI_SUBMODULES:
+            sys.modules.pop(nome, None)
+
+    return module
+
+def build_kpi_argv(kpi, farmer_id=None, months_back=None, load_mode=None, full_refresh=False, log_level='INFO',
+                   workers=None):
+    """
+    Monta a lista de argumentos de linha de comando de um KPI.
+
+    Apenas as opções suportadas pelo KPI (KPIS[kpi]['opcoes']) são repassadas.
+
+    Args:
+        kpi (str): Nome do KPI
+        farmer_id (int, optional): ID do farmer para filtrar
+        months_back (int, optional): Número de meses para trás
+        load_mode (str, optional): Modo de carga ('replace' ou 'merge')
+        full_refresh (bool): Ignora o estado incremental
+        log_level (str): Nível de logging
+        workers (int, optional): Paralelismo interno do KPI (meses processados em paralelo)
+
+    Returns:
+        list: Argumentos para parse_arguments() do KPI
+    """
+    opcoes = KPIS[kpi]['opcoes']
+    argv = ['--log-level', log_level]
+    if farmer_id:
+        argv += ['--farmer-id', str(farmer_id)]
+    if months_back is not None and 'months_back' in opcoes:
+        argv += ['--months-back', str(months_back)]
+    if load_mode and 'load_mode' in opcoes:
+        argv += ['--load-mode', load_mode]
+    if full_refresh and 'full_refresh' in opcoes:
+        argv.append('--full-refresh')
+    if workers and workers > 1 and 'workers' in opcoes:
+        argv += ['--workers', str(workers)]
+    return argv
+
+def build_kpi_tasks(scheduler, kpi, argv):
+    """
+    Registra no agendador as tarefas de um KPI.
+
+    KPIs que expõem run_extract()/run_load() viram duas tarefas (extração ->
+    carga) e apenas a carga reserva a tabela de destino; os demais viram uma
+    única tarefa com run(), que reserva a tabela durante toda a execução.
+    KPIs cuja extração é feita em streaming (streams_extract(args) verdadeiro)
+    também viram uma única tarefa: run_extract() apenas prepara um iterador, e
+    a leitura aconteceria dentro da carga.
+
+    Args:
+        scheduler (DagScheduler): Agendador
+        kpi (str): Nome do KPI
+        argv (list): Argumentos de linha de comando do KPI
+
+    Returns:
+        list: Nomes das tarefas criadas
+    """
+    logger.info(f"Preparando ETL de {KPIS[kpi]['descricao']} ({kpi}): {' '.join(argv)}")
+    module = load_kpi_module(kpi)
+    args = module.parse_arguments(argv)
+    kpi_logger = logging.getLogger(module.__name__)
+    tabela = (KPIS[kpi]['tabela'],)
+
+    streaming = hasattr(module, 'streams_extract') and module.streams_extract(args)
+    if hasattr(module, 'run_extract') and hasattr(module, 'run_load') and not streaming:
+        extract = scheduler.add(Task(
+            f"{kpi}.extract",
+            lambda: module.run_extract(args, kpi_logger)
+        ))
+        load = scheduler.add(Task(
+            f"{kpi}.load",
+            lambda dados: module.run_load(args, dados, kpi_logger),
+            deps=[extract.name],
+            resources=tabela
+        ))
+        return [extract.name, load.name]
+
+    task = scheduler.add(Task(kpi, lambda: module.run(args, kpi_logger) == 0, resources=tabela))
+    return [task.name]
+
+def summarize_kpis(tarefas_kpi, resultados_tarefas):
+    """
+    Consolida o resultado das tarefas por KPI.
+
+    Args:
+        tarefas_kpi (dict): KPI -> nomes das tarefas (None se o KPI não pôde ser preparado)
+        resultados_tarefas (dict): Tarefa -> TaskResult
+
+    Returns:
+        list: Por KPI, dict com kpi, success e tempo (do início da primeira tarefa ao fim da última)
+    """
+    resultados = []
+    for kpi, tarefas in tarefas_kpi.items():
+        if tarefas is None:
+            resultados.append({'kpi': kpi, 'success': False, 'tempo': 0.0})
+            continue
+        execucoes = [resultados_tarefas[nome] for nome in tarefas]
+        inicios = [r.inicio for r in execucoes if r.inicio is not None]
+        fins = [r.fim for r in execucoes if r.fim is not None]
+        resultados.append({
+            'kpi': kpi,
+            'success': all(r.status == STATUS_OK for r in execucoes),
+            'tempo': max(fins) - min(inicios) if inicios else 0.0
+        })
+    return resultados
+
+def log_summary(resultados, tempo_total):
+    """
+    Registra o resumo da execução com o tempo de cada KPI.
+
+    Args:
+        resultados (list): Resultados de summarize_kpis()
+        tempo_total (float): Tempo total da execução em segundos
+    """
+    largura = max([len(r['kpi']) for r in resultados] + [len('Total')])
+    logger.info("Resumo da execução:")
+    for r in resultados:
+        logger.info(f"  {r['kpi']:<{largura}}  {'OK' if r['success'] else 'ERRO':<4}  {r['tempo']:8.1f}s")
+    logger.info(f"  {'Total':<{largura}}  {'':<4}  {tempo_total:8.1f}s")
+
+def run_pipeline(kpis, farmer_id=None, months_back=None, load_mode=None, full_refresh=False,
+                 log_level='INFO', share_periods=True, workers=1):
+    """
+    Executa uma lista de KPIs no processo atual.
+
+    Com workers > 1, as extrações de KPIs diferentes rodam em paralelo; cargas
+    na mesma tabela nunca rodam ao mesmo tempo. Com workers=1, os KPIs rodam
+    em sequência, na ordem informada.
+
+    Args:
+        kpis (list): Nomes dos KPIs, na ordem de execução
+        farmer_id (int, optional): ID do farmer para filtrar
+        months_back (int, optional): Número de meses para trás; se None, cada KPI usa o seu padrão
+        load_mode (str, optional): Modo de carga para os KPIs que o suportam
+        full_refresh (bool): Ignora o estado incremental
+        log_level (str): Nível de logging repassado aos KPIs
+        share_periods (bool): Compartilha os períodos de responsabilidade entre os KPIs
+        workers (int): Máximo de tarefas simultâneas (limita as conexões em uso)
+
+    Returns:
+        list: Resultados por KPI (kpi, success, tempo)
+    """
+    inicio = time.perf_counter()
+    pool = get_pool()
+    if workers > pool.max_size:
+        logger.warning(f"workers={workers} maior que o pool de conexões (max: {pool.max_size}); "
+                       f"tarefas aguardarão conexões livres")
+    pool.prefill()
+    if share_periods:
+        enable_shared_index()
+    # Cada execução verifica os meses da tabela fato uma vez, na primeira leitura,
+    # e recalcula apenas os que mudaram na origem
+    reset_fact_client_month_state()
+
+    try:
+        # Importação dos KPIs no thread principal (load_kpi_module altera sys.modules)
+        scheduler = DagScheduler(max_workers=workers)
+        tarefas_kpi = {}
+        for kpi in kpis:
+            argv = build_kpi_argv(kpi, farmer_id, months_back, load_mode, full_refresh, log_level, workers)
+            try:
+                tarefas_kpi[kpi] = build_kpi_tasks(scheduler, kpi, argv)
+            except SystemExit as e:
+                # argparse encerra com SystemExit em argumentos inválidos
+                logger.error(f"Argumentos inválidos para o KPI {kpi}: {e}")
+                tarefas_kpi[kpi] = None
+            except Exception as e:
+                logger.error(f"Erro ao preparar o KPI {kpi}: {str(e)}")
+                logger.error(traceback.format_exc())
+                tarefas_kpi[kpi] = None
+
+        logger.info(f"Executando {len(scheduler.tasks)} tarefas com até {workers} em paralelo")
+        resultados = summarize_kpis(tarefas_kpi, scheduler.run())
+    finally:
+        if share_periods:
+            disable_shared_index()
+
+    log_summary(resultados, time.perf_counter() - inicio)
+    log_pool_stats()
+    log_periods_cache_stats()
+    return resultados
+
+def setup_logging(log_level='INFO'):
+    """
+    Configura o sistema de logging.
+
+    Args:
+        log_level (str): Nível de logging (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+    """
+    # Criando o diretório de logs se não existir
+    log_dir = os.path.join(BASE_DIR, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+
+    # Nome do arquivo de log com data
+    log_filename = f"etl_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    log_path = os.path.join(log_dir, log_filename)
+
+    # Configurando o logger
+    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    logging.basicConfig(
+        level=getattr(logging, log_level),
+        format=log_format,
+        handlers=[
+            logging.FileHandler(log_path),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    return logging.getLogger(__name__)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Agendador de tarefas com dependências (DAG) para os ETLs de KPI.
+
+As tarefas rodam em um pool de threads com concorrência limitada (as
+etapas de extração são dominadas por espera de I/O no PostgreSQL). Uma
+tarefa só começa quando todas as suas dependências terminaram com sucesso
+e nenhuma outra tarefa em execução detém um dos seus recursos (por
+exemplo, a tabela analysis.* que ela carrega).
+"""
+
+import logging
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+# Estados possíveis de uma tarefa ao final da execução
+STATUS_OK = 'ok'
+STATUS_ERRO = 'erro'
+STATUS_IGNORADA = 'ignorada'
+
+class Task:
+    """
+    Tarefa do DAG.
+
+    func recebe, na ordem de deps, os valores retornados pelas dependências.
+    Se func retornar False ou lançar exceção, a tarefa falha e as tarefas
+    que dependem dela são ignoradas.
+    """
+
+    def __init__(self, name, func, deps=(), resources=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.resources = frozenset(resources)
+
+class TaskResult:
+    """
+    Resultado da execução de uma tarefa.
+    """
+
+    def __init__(self, status, value=None, inicio=None, fim=None, erro=None):
+        self.status = status
+        self.value = value
+        self.inicio = inicio
+        self.fim = fim
+        self.erro = erro
+
+    @property
+    def tempo(self):
+        if self.inicio is None or self.fim is None:
+            return 0.0
+        return self.fim - self.inicio
+
+class DagScheduler:
+    """
+    Executa um conjunto de tarefas respeitando dependências, recursos exclusivos
+    e um limite de tarefas simultâneas.
+
+    Entre as tarefas prontas, a ordem de inclusão define a prioridade; com
+    max_workers=1 a execução é sequencial, na ordem de inclusão.
+    """
+
+    def __init__(self, max_workers=4):
+        if max_workers < 1:
+            raise ValueError("max_workers deve ser maior ou igual a 1")
+        self.max_workers = max_workers
+        self.tasks = {}
+
+    def add(self, task):
+        """
+        Inclui uma tarefa no DAG.
+
+        Args:
+            task (Task): Tarefa a incluir
+
+        Returns:
+            Task: A própria tarefa
+        """
+        if task.name in self.tasks:
+            raise ValueError(f"Tarefa duplicada: {task.name}")
+        self.tasks[task.name] = task
+        return task
+
+    def _validate(self):
+        """
+        Verifica dependências inexistentes e ciclos.
+        """
+        for task in self.tasks.values():
+            faltantes = [dep for dep in task.deps if dep not in self.tasks]
+            if faltantes:
+                raise ValueError(f"Tarefa {task.name} depende de tarefas inexistentes: {', '.join(faltantes)}")
+
+        # Ordenação topológica (Kahn) apenas para detectar ciclos
+        pendentes = {name: set(task.deps) for name, task in self.tasks.items()}
+        while pendentes:
+            prontas = [name for name, deps in pendentes.items() if not deps]
+            if not prontas:
+                raise ValueError(f"Ciclo de dependências entre as tarefas: {', '.join(sorted(pendentes))}")
+            for name in prontas:
+                del pendentes[name]
+            for deps in pendentes.values():
+                deps.difference_update(prontas)
+
+    def _execute(self, task, args):
+        inicio = time.perf_counter()
+        try:
+            value = task.func(*args)
+            status = STATUS_ERRO if value is False else STATUS_OK
+            return TaskResult(status, value, inicio, time.perf_counter())
+        except Exception as e:
+            logger.error(f"Erro na tarefa {task.name}: {str(e)}")
+            logger.error(traceback.format_exc())
+            return TaskResult(STATUS_ERRO, None, inicio, time.perf_counter(), e)
+
+    def run(self):
+        """
+        Executa todas as tarefas.
+
+        Returns:
+            dict: Nome da tarefa -> TaskResult, na ordem de inclusão
+        """
+        self._validate()
+
+        resultados = {}
+        pendentes = list(self.tasks)
+        em_execucao = {}        # future -> nome da tarefa
+        recursos_em_uso = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='etl') as executor:
+            while pendentes or em_execucao:
+                for name in list(pendentes):
+                    task = self.tasks[name]
+                    status_deps = [resultados[dep].status if dep in resultados else None for dep in task.deps]
+
+                    # Dependência falhou ou foi ignorada: a tarefa não roda
+                    if any(status in (STATUS_ERRO, STATUS_IGNORADA) for status in status_deps):
+                        pendentes.remove(name)
+                        resultados[name] = TaskResult(STATUS_IGNORADA)
+                        logger.warning(f"Tarefa {name} ignorada: dependência não concluída")
+                        continue
+
+                    if len(em_execucao) >= self.max_workers:
+                        break
+                    if None in status_deps or task.resources & recursos_em_uso:
+                        continue
+
+                    pendentes.remove(name)
+                    recursos_em_uso |= task.resources
+                    args = [resultados[dep].value for dep in task.deps]
+                    logger.debug(f"Iniciando tarefa {name}")
+                    em_execucao[executor.submit(self._execute, task, args)] = name
+
+                if not em_execucao:
+                    # Nada em execução e nada pôde iniciar: só resta o que foi ignorado
+                    continue
+
+                concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for future in concluidas:
+                    name = em_execucao.pop(future)
+                    resultados[name] = future.result()
+                    recursos_em_uso -= self.tasks[name].resources
+                    logger.info(f"Tarefa {name} finalizada em {resultados[name].tempo:.1f}s ({resultados[name].status})")
+
+        return {name: resultados[name] for name in self.tasks}
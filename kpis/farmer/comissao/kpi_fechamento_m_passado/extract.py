@@ -2,83 +2,188 @@
 # -*- coding: utf-8 -*-
 
 """
-Módulo de extração de dados para o KPI de Receitas dos meses anteriores.
+Módulo de extração de dados para o KPI de Fechamento de Comissão (meses passados).
+
+Os fechamentos de todos os meses do período são calculados em uma única
+query: a tabela fato analysis.fact_client_month (utils.fact_client_month) é
+lida uma vez no intervalo de meses e agregada por (farmer, mês), em vez de uma
+query completa por mês.
 """
 
 import logging
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from utils.db_connection import get_connection
-from utils.client_responsibility import filter_data_by_responsibility
+from utils.commission_rules import COMPENSATION_COLUMNS_SQL, apply_commission_rules
+from utils.client_responsibility import ensure_client_farmer_periods
+from utils.typed_fetch import fetch_dataframe
+from utils.fact_client_month import ensure_fact_client_month, month_list, FONTES_COMISSAO
 
 logger = logging.getLogger(__name__)
 
-def extract_meses_anteriores(farmer_id=None, months_back=11):
+# Tipos aplicados na leitura (ver utils.typed_fetch); metas em centavos, agregados
+# realizados como texto exato do NUMERIC (arredondados por apply_commission_rules só
+# depois da comparação com as metas e do cálculo dos bônus), percentuais como float64
+FECHAMENTO_SCHEMA = {
+    'farmer_id': 'int32',
+    'farmer_name': 'category',
+    'hierarchy_level': 'category',
+    'mes': 'datetime64[ns]',
+    'data_positivador': 'datetime64[ns]',
+    'churn_total': 'numeric_text',
+    'meta_churn': 'cents',
+    'captacao_total': 'numeric_text',
+    'meta_captacao': 'cents',
+    'receita_total': 'numeric_text',
+    'meta_receita': 'cents',
+    'comissao_bruta_total': 'numeric_text',
+}
+
+# Agregados de fechamento por (mês, farmer) para todos os meses entre mes_inicio e mes_fim.
+# Mesma lógica de churn/captação/receita de kpi_fechamento_m_presente; os bônus são
+# calculados depois por apply_commission_rules.
+FECHAMENTO_PERIODO_QUERY = """
+WITH meses AS (
+    SELECT generate_series(%(mes_inicio)s::date, %(mes_fim)s::date, INTERVAL '1 month')::date AS mes
+),
+ultima_data_mes AS (
+    SELECT mes, MAX(record_date) AS ultima_data
+    FROM analysis.fact_client_month
+    WHERE fonte = 'positivador'
+      AND mes BETWEEN %(mes_inicio)s::date AND %(mes_fim)s::date
+    GROUP BY mes
+),
+-- Receita, comissão, captação e churn por (farmer, mês) da tabela fato; a receita
+-- só é considerada nos meses em que o farmer tem dados no positivador
+fatos_farmer AS (
+    SELECT
+        f.farmer_id,
+        f.mes,
+        CASE WHEN BOOL_OR(f.fonte = 'positivador') THEN SUM(f.receita_bruta) END as receita_total,
+        CASE WHEN BOOL_OR(f.fonte = 'positivador') THEN SUM(f.comissao_bruta) END as comissao_bruta_total,
+        SUM(f.net_capture) as total_net_capture,
+        SUM(f.churn) as total_churn
+    FROM analysis.fact_client_month f
+    WHERE f.fonte = ANY(%(fontes)s)
+      AND f.mes BETWEEN %(mes_inicio)s::date AND %(mes_fim)s::date
+    GROUP BY f.farmer_id, f.mes
+),
+-- O período de responsabilidade não depende do mês: agregado uma vez por farmer
+periodo_farmer AS (
+    SELECT
+        farmer_id,
+        MIN(start_date) as inicio,
+        MAX(end_date) as fim
+    FROM analysis.client_farmer_periods
+    GROUP BY farmer_id
+)
+SELECT
+    m.mes,
+    e.employee_id as farmer_id,
+    e.name as farmer_name,
+    e.hierarchy_level,
+    udm.ultima_data as data_positivador,
+    ARRAY[
+        pf.inicio,
+        COALESCE(pf.fim, CURRENT_DATE)
+    ] as periodo_responsabilidade,
+    ff.total_churn as churn_total,
+    ff.total_net_capture as captacao_total,
+    ff.receita_total,
+    ff.comissao_bruta_total,""" + COMPENSATION_COLUMNS_SQL + """
+FROM gammadata.employees e
+CROSS JOIN meses m
+LEFT JOIN ultima_data_mes udm ON udm.mes = m.mes
+LEFT JOIN gammadata.compensation comp
+    ON comp.employee_id = e.employee_id
+    AND comp.target_date = m.mes
+LEFT JOIN fatos_farmer ff ON ff.farmer_id = e.employee_id AND ff.mes = m.mes
+LEFT JOIN periodo_farmer pf ON pf.farmer_id = e.employee_id
+WHERE
+    e.hierarchy_level IN ('junior', 'pleno')
+    AND e.status = 'active'
+    AND (
+        (%(employee_name)s = '2. Farmers' AND e.group_id = 1)
+        OR (%(employee_name)s = '1. Gamma Capital')
+        OR (e.name = %(employee_name)s)
+    )
+"""
+
+def _primeiro_dia(data):
+    """
+    Normaliza uma data para o primeiro dia do mês.
+
+    Args:
+        data (datetime): Data qualquer do mês
+
+    Returns:
+        datetime: Primeiro dia do mês, sem horário
+    """
+    return datetime(data.year, data.month, 1)
+
+def extract_fechamento_periodo(mes_inicio, mes_fim, farmer_id=None, employee_name=None):
     """
-    Extrai dados de receita e comissão para meses anteriores.
-    
+    Extrai os dados de fechamento de todos os meses entre mes_inicio e mes_fim
+    (inclusive) em uma única query.
+
     Args:
-        farmer_id (int, optional): ID do farmer para filtrar. Se None, traz todos.
-        months_back (int): Quantidade de meses para trás a serem considerados
-        
+        mes_inicio (datetime): Primeiro mês do período
+        mes_fim (datetime): Último mês do período
+        farmer_id (int, optional): ID do farmer para filtrar
+        employee_name (str, optional): Nome do employee para filtrar
+
     Returns:
-        pandas.DataFrame: DataFrame com os dados de receita e comissão dos meses anteriores
+        pandas.DataFrame: Uma linha por (mes, farmer_id) com os dados de fechamento
     """
+    conn = None
     try:
+        mes_inicio, mes_fim = _primeiro_dia(mes_inicio), _primeiro_dia(mes_fim)
+        ensure_fact_client_month(month_list(mes_inicio, mes_fim))
+        ensure_client_farmer_periods()
         conn = get_connection()
-        logger.info(f"Extraindo dados de meses anteriores para farmer_id: {farmer_id if farmer_id else 'Todos'}")
-        
-        query = """
-        SELECT 
-            DATE_TRUNC('month', record_date) AS mes,
-            CAST(c.farmer_id AS INTEGER) AS farmer_id,
-            e.name AS employee_name,
-            SUM(gross_revenue) AS receita_bruta,
-            SUM(net_revenue) AS receita_liquida,
-            SUM(gross_commission) AS comissao_bruta,
-            SUM(gross_commission * (1 - 0.195)) AS comissao_liquida
-        FROM gammadata.revenue_records_historical rrh
-        JOIN gammadata.clients c ON rrh.client_id = c.client_id
-        JOIN gammadata.employees e ON CAST(c.farmer_id AS INTEGER) = e.employee_id
-        WHERE 
-            record_date >= DATE_TRUNC('month', NOW()) - INTERVAL '%s months'
-            AND DATE_TRUNC('month', record_date) < DATE_TRUNC('month', NOW())
-        """
-        
-        params = [months_back]
-        
+        logger.info(f"Extraindo fechamento de {mes_inicio.strftime('%Y-%m')} a {mes_fim.strftime('%Y-%m')} "
+                    f"(farmer_id: {farmer_id if farmer_id else 'Todos'})")
+
+        query = FECHAMENTO_PERIODO_QUERY
+        params = {
+            'mes_inicio': mes_inicio,
+            'mes_fim': mes_fim,
+            'employee_name': employee_name,
+            'fontes': list(FONTES_COMISSAO)
+        }
+
+        # Adicionando filtros opcionais
         if farmer_id:
-            query += " AND CAST(c.farmer_id AS INTEGER) = %s"
-            params.append(farmer_id)
-            
-        query += " GROUP BY DATE_TRUNC('month', record_date), c.farmer_id, e.name"
-        
-        df = pd.read_sql(query, conn, params=params)
-        
-        # Converter colunas de data para datetime
-        if not df.empty:
-            df['mes'] = pd.to_datetime(df['mes'])
-            
-            # Converter colunas numéricas
-            for col in ['farmer_id', 'receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                    
-            # Aplicar filtro de responsabilidade se necessário
-            if farmer_id:
-                # Defina o período para filtrar a responsabilidade
-                start_date = (datetime.now() - timedelta(days=30 * months_back)).replace(day=1)
-                end_date = datetime.now().replace(day=1) - timedelta(days=1)
-                
-                df = filter_data_by_responsibility(df, 'mes', farmer_id, (start_date, end_date))
-        
-        logger.info(f"Dados extraídos com sucesso. Registros: {len(df)}")
-        
+            query += " AND e.employee_id = %(farmer_id)s"
+            params['farmer_id'] = farmer_id
+
+        query += " ORDER BY m.mes, e.employee_id"
+
+        df = fetch_dataframe(conn, query, params, FECHAMENTO_SCHEMA)
+
+        # Status, percentuais e bônus de todos os meses de uma vez
+        df = apply_commission_rules(df)
+
+        logger.info(f"Dados de fechamento extraídos com sucesso. Registros: {len(df)}")
         return df
-    
+
     except Exception as e:
-        logger.error(f"Erro ao extrair dados de meses anteriores: {str(e)}")
+        logger.error(f"Erro ao extrair dados de fechamento: {str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+def extract_fechamento_passado(mes_referencia, farmer_id=None, employee_name=None):
+    """
+    Extrai os dados de fechamento de um único mês passado.
+
+    Args:
+        mes_referencia (datetime): Mês de referência
+        farmer_id (int, optional): ID do farmer para filtrar
+        employee_name (str, optional): Nome do employee para filtrar
+
+    Returns:
+        pandas.DataFrame: DataFrame com os dados de fechamento do mês
+    """
+    return extract_fechamento_periodo(mes_referencia, mes_referencia, farmer_id, employee_name)
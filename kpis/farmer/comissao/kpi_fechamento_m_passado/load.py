@@ -2,93 +2,101 @@
 # -*- coding: utf-8 -*-
 
 """
-Módulo de carregamento de dados para o KPI de Receitas dos meses anteriores.
+Módulo de carregamento de dados para o KPI de Fechamento de Comissão (meses passados).
+
+Cada chamada carrega um único mês em sua própria conexão e transação, de modo
+que a falha de um mês processado em paralelo não desfaz os outros. O mês é
+substituído por troca da partição mensal (utils.month_partitions), e as trocas
+da tabela são serializadas: as cargas dos meses esperam umas pelas outras.
 """
 
 import logging
 import pandas as pd
 from datetime import datetime
 from utils.db_connection import DatabaseConnection
-from utils.db_schema_farmer.db_schema_receita import create_receita_farmer_m_passado_table
+from utils.db_schema_farmer.db_schema_comissao import create_fechamento_farmer_m_passado_table
+from utils.month_partitions import swap_month_partitions
 
 logger = logging.getLogger(__name__)
 
-def load_receita_farmer_m_passado(df_meses_anteriores, farmer_id=None):
+FECHAMENTO_COLUMNS = [
+    'mes', 'mes_formatado', 'farmer_id', 'farmer_name', 'hierarchy_level',
+    'data_positivador', 'periodo_responsabilidade_inicio', 'periodo_responsabilidade_fim',
+    'churn_total', 'meta_churn', 'status_churn', 'porcentagem_churn', 'bonus_churn',
+    'captacao_total', 'meta_captacao', 'status_captacao', 'porcentagem_captacao', 'bonus_captacao',
+    'receita_total', 'meta_receita', 'status_receita', 'porcentagem_receita', 'bonus_receita',
+    'comissao_bruta_total', 'bonus_total', 'is_current_month', 'created_at', 'updated_at'
+]
+
+# Colunas monetárias em centavos (utils.money)
+FECHAMENTO_MONEY_COLUMNS = [
+    'churn_total', 'meta_churn', 'bonus_churn',
+    'captacao_total', 'meta_captacao', 'bonus_captacao',
+    'receita_total', 'meta_receita', 'bonus_receita',
+    'comissao_bruta_total', 'bonus_total'
+]
+
+def load_fechamento_comissao_farmer(df_fechamento, farmer_id=None, mes_referencia=None):
     """
-    Carrega os dados de receita e comissão na tabela de destino.
-    
+    Carrega os dados de fechamento de comissão de um mês na tabela de destino.
+
     Args:
-        df_meses_anteriores (pandas.DataFrame): DataFrame com dados dos meses anteriores
+        df_fechamento (pandas.DataFrame): DataFrame com dados de fechamento de um único mês
         farmer_id (int, optional): ID do farmer para filtrar dados na carga
-        
+        mes_referencia (datetime, optional): Mês carregado; obrigatório quando df_fechamento
+            está vazio, para que os registros antigos do mês sejam removidos
+
     Returns:
         bool: True se o carregamento foi bem-sucedido, False caso contrário
     """
     try:
-        # Verificando se há dados para carregar
-        if df_meses_anteriores.empty:
-            logger.warning("DataFrame vazio, nenhum dado para carregar")
-            return True
-        
-        # Usando o gerenciador de contexto para uma única conexão
+        if mes_referencia is None:
+            if df_fechamento.empty:
+                logger.warning("DataFrame vazio, nenhum dado para carregar")
+                return True
+            mes_referencia = pd.Timestamp(df_fechamento['mes'].min())
+        mes = mes_referencia.replace(day=1).strftime('%Y-%m-%d')
+
+        # Uma conexão (e uma transação) por mês
         with DatabaseConnection() as conn:
             # Garante que a tabela existe com a estrutura correta
-            if not create_receita_farmer_m_passado_table(conn):
-                logger.error("Falha ao criar/verificar tabela de receita por farmer (meses anteriores)")
+            if not create_fechamento_farmer_m_passado_table(conn):
+                logger.error("Falha ao criar/verificar tabela de fechamento de comissão por farmer (meses passados)")
                 return False
-                
-            logger.info(f"Carregando dados de receita por farmer (meses anteriores) para farmer_id: {farmer_id if farmer_id else 'Todos'}")
-            
+
+            logger.info(f"Carregando dados de fechamento de comissão para farmer_id: {farmer_id if farmer_id else 'Todos'}, mês: {mes[:7]}")
+
+            # Se um farmer_id foi especificado para carga, filtra os dados
+            df_carga = df_fechamento
+            if farmer_id and not df_carga.empty:
+                df_carga = df_carga[df_carga['farmer_id'] == farmer_id]
+
+            df_carga = df_carga.assign(created_at=datetime.now(), updated_at=datetime.now())
+            for col in ['periodo_responsabilidade_inicio', 'periodo_responsabilidade_fim']:
+                if col not in df_carga.columns:
+                    df_carga = df_carga.assign(**{col: None})
+
             with conn.cursor() as cursor:
-                # Apaga os registros existentes
-                if farmer_id:
-                    cursor.execute("""
-                    DELETE FROM analysis.receita_farmer_m_passado 
-                    WHERE farmer_id = %s
-                    """, (farmer_id,))
-                else:
-                    cursor.execute("DELETE FROM analysis.receita_farmer_m_passado")
-                    
-                # Contando quantos registros foram deletados
-                deleted_count = cursor.rowcount
-                logger.info(f"Registros deletados: {deleted_count}")
-                
-                # Preparando os dados dos meses anteriores
-                data_to_insert = []
-                for _, row in df_meses_anteriores.iterrows():
-                    # Se um farmer_id foi especificado para carga, filtra os dados
-                    if farmer_id and row['farmer_id'] != farmer_id:
-                        continue
-                        
-                    data_to_insert.append((
-                        row['mes'],
-                        row['mes_formatado'] if 'mes_formatado' in row else row['mes'].strftime('%m/%Y'),
-                        row['farmer_id'] if 'farmer_id' in row else None,
-                        row['employee_name'] if 'employee_name' in row else None,
-                        row['receita_bruta'] if 'receita_bruta' in row and pd.notna(row['receita_bruta']) else 0,
-                        row['receita_liquida'] if 'receita_liquida' in row and pd.notna(row['receita_liquida']) else 0,
-                        row['comissao_bruta'] if 'comissao_bruta' in row and pd.notna(row['comissao_bruta']) else 0,
-                        row['comissao_liquida'] if 'comissao_liquida' in row and pd.notna(row['comissao_liquida']) else 0,
-                        'historical',  # Fonte dos dados
-                        datetime.now(),
-                        datetime.now()
-                    ))
-                
-                # Executando a inserção em massa
-                if data_to_insert:
-                    cursor.executemany("""
-                    INSERT INTO analysis.receita_farmer_m_passado
-                    (mes, mes_formatado, farmer_id, employee_name, receita_bruta, receita_liquida, comissao_bruta, comissao_liquida, fonte, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, data_to_insert)
-                    
-                    # Contando quantos registros foram inseridos
-                    inserted_count = len(data_to_insert)
-                    logger.info(f"Registros históricos inseridos: {inserted_count}")
-            
-        logger.info("Carregamento de dados de receita por farmer (meses anteriores) concluído com sucesso")
+                # Troca a partição do mês; com farmer_id, os registros dos demais
+                # farmers são preservados na partição nova
+                inserted_count, replaced_count = swap_month_partitions(
+                    cursor,
+                    [df_carga],
+                    'analysis.fechamento_farmer_m_passado',
+                    FECHAMENTO_COLUMNS,
+                    [mes],
+                    keep_sql='farmer_id IS DISTINCT FROM %s' if farmer_id else None,
+                    keep_params=(farmer_id,) if farmer_id else None,
+                    cents_columns=FECHAMENTO_MONEY_COLUMNS
+                )
+
+                logger.info(f"Registros substituídos ({mes[:7]}): {replaced_count}")
+                if inserted_count:
+                    logger.info(f"Registros inseridos ({mes[:7]}): {inserted_count}")
+
+        logger.info(f"Carregamento de dados de fechamento de comissão de {mes[:7]} concluído com sucesso")
         return True
-    
+
     except Exception as e:
-        logger.error(f"Erro ao carregar dados de receita por farmer (meses anteriores): {str(e)}")
-        return False
\ No newline at end of file
+        logger.error(f"Erro ao carregar dados de fechamento de comissão: {str(e)}")
+        return False
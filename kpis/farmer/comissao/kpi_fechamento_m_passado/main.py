@@ -14,6 +14,7 @@ import os
 import sys
 from datetime import datetime, timedelta
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 # Caminho absoluto para o diretório raiz do projeto
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../../'))
@@ -23,9 +24,10 @@ sys.path.append(BASE_DIR)
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Importando módulos do ETL
-from extract import extract_fechamento_passado
+from extract import extract_fechamento_periodo, extract_fechamento_passado
 from transform import prepare_fechamento_dataset
 from load import load_fechamento_comissao_farmer
+from utils.db_connection import get_pool
 
 # Configurando logging
 def setup_logging(log_level='INFO'):
@@ -57,10 +59,13 @@ def setup_logging(log_level='INFO'):
     return logging.getLogger(__name__)
 
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """
     Analisa os argumentos da linha de comando.
     
+    Args:
+        argv (list, optional): Argumentos a analisar; se None, usa sys.argv
+        
     Returns:
         argparse.Namespace: Argumentos analisados
     """
@@ -94,6 +99,13 @@ def parse_arguments():
         help='Mês específico no formato YYYY-MM (default: None - processa vários meses)'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Número de meses processados em paralelo; limitado pelo pool de conexões (default: 1)'
+    )
+    
     parser.add_argument(
         '--log-level',
         type=str,
@@ -102,10 +114,10 @@ def parse_arguments():
         help='Nível de logging (default: INFO)'
     )
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def process_mes_fechamento(mes_referencia, farmer_id, employee_name, logger):
+def process_mes_fechamento(mes_referencia, farmer_id, employee_name, logger, df_fechamento=None):
     """
     Processa os dados de fechamento para um mês específico.
     
@@ -114,6 +126,8 @@ def process_mes_fechamento(mes_referencia, farmer_id, employee_name, logger):
         farmer_id (int, optional): ID do farmer para filtrar
         employee_name (str, optional): Nome do employee para filtrar
         logger (logging.Logger): Logger configurado
+        df_fechamento (pandas.DataFrame, optional): Dados do mês já extraídos; se None,
+            o mês é extraído isoladamente
         
     Returns:
         bool: True se o processamento foi bem-sucedido
@@ -121,14 +135,14 @@ def process_mes_fechamento(mes_referencia, farmer_id, employee_name, logger):
     logger.info(f"Processando fechamento para {mes_referencia.strftime('%Y-%m')}")
     
     try:
-        # Extração direta dos dados de fechamento (usando a query otimizada)
-        df_fechamento = extract_fechamento_passado(mes_referencia, farmer_id, employee_name)
+        if df_fechamento is None:
+            df_fechamento = extract_fechamento_passado(mes_referencia, farmer_id, employee_name)
         
         # Transformação básica para preparar para carregamento
         df_final = prepare_fechamento_dataset(df_fechamento, mes_referencia)
         
-        # Carregamento
-        success = load_fechamento_comissao_farmer(df_final, farmer_id)
+        # Carregamento (transação própria do mês)
+        success = load_fechamento_comissao_farmer(df_final, farmer_id, mes_referencia)
         
         return success
     
@@ -137,6 +151,76 @@ def process_mes_fechamento(mes_referencia, farmer_id, employee_name, logger):
         return False
 
 
+def split_fechamento_por_mes(df_fechamento, meses):
+    """
+    Separa o resultado da extração de vários meses em um DataFrame por mês.
+    
+    Args:
+        df_fechamento (pandas.DataFrame): Resultado de extract_fechamento_periodo
+        meses (list): Meses de referência
+        
+    Returns:
+        dict: Mês (datetime) -> DataFrame com as linhas daquele mês
+    """
+    if df_fechamento.empty:
+        return {mes: df_fechamento for mes in meses}
+    
+    grupos = {mes_df.strftime('%Y-%m'): df_mes for mes_df, df_mes in df_fechamento.groupby('mes')}
+    vazio = df_fechamento.iloc[0:0]
+    return {mes: grupos.get(mes.strftime('%Y-%m'), vazio) for mes in meses}
+
+
+def process_meses_fechamento(meses, farmer_id, employee_name, logger, workers=1):
+    """
+    Processa vários meses de fechamento, opcionalmente em paralelo.
+    
+    Todos os meses são extraídos em uma única query; em seguida cada mês é
+    transformado e carregado de forma independente, com sua própria transação:
+    a falha de um mês não impede nem desfaz os demais.
+    
+    Args:
+        meses (list): Meses de referência
+        farmer_id (int, optional): ID do farmer para filtrar
+        employee_name (str, optional): Nome do employee para filtrar
+        logger (logging.Logger): Logger configurado
+        workers (int): Número máximo de meses processados ao mesmo tempo
+        
+    Returns:
+        dict: Mês (YYYY-MM) -> True/False conforme o sucesso do processamento
+    """
+    if not meses:
+        return {}
+    
+    try:
+        df_fechamento = extract_fechamento_periodo(min(meses), max(meses), farmer_id, employee_name)
+    except Exception as e:
+        logger.error(f"Erro ao extrair fechamento dos meses: {str(e)}")
+        return {mes.strftime('%Y-%m'): False for mes in meses}
+    
+    dados_por_mes = split_fechamento_por_mes(df_fechamento, meses)
+    
+    if workers <= 1 or len(meses) <= 1:
+        return {
+            mes.strftime('%Y-%m'): process_mes_fechamento(mes, farmer_id, employee_name, logger, df_mes)
+            for mes, df_mes in dados_por_mes.items()
+        }
+    
+    # Cada mês usa ao menos uma conexão; acima do tamanho do pool, as threads só aguardariam conexões
+    pool_max = get_pool().max_size
+    if workers > pool_max:
+        logger.warning(f"workers={workers} maior que o pool de conexões (max: {pool_max}); usando {pool_max}")
+        workers = pool_max
+    
+    logger.info(f"Processando {len(meses)} meses com {workers} workers")
+    with ThreadPoolExecutor(max_workers=min(workers, len(meses)), thread_name_prefix='fechamento') as executor:
+        futures = {
+            mes.strftime('%Y-%m'): executor.submit(process_mes_fechamento, mes, farmer_id, employee_name, logger, df_mes)
+            for mes, df_mes in dados_por_mes.items()
+        }
+        # process_mes_fechamento já trata suas exceções e retorna False em caso de erro
+        return {mes: future.result() for mes, future in futures.items()}
+
+
 def main():
     """
     Função principal que coordena a execução do ETL.
@@ -147,9 +231,23 @@ def main():
     # Configurando logging
     logger = setup_logging(args.log_level)
     
+    return run(args, logger)
+
+
+def run(args, logger):
+    """
+    Executa o ETL com os argumentos já analisados (usado também pelo orquestrador etl).
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
+        
+    Returns:
+        int: Código de saída (0 em caso de sucesso)
+    """
     try:
         logger.info("Iniciando ETL do KPI de Fechamento de Comissão (meses passados)")
-        logger.info(f"Parâmetros: farmer_id={args.farmer_id}, employee_name={args.employee_name}, months_back={args.months_back}, specific_month={args.specific_month}")
+        logger.info(f"Parâmetros: farmer_id={args.farmer_id}, employee_name={args.employee_name}, months_back={args.months_back}, specific_month={args.specific_month}, workers={args.workers}")
         
         # Determinar quais meses processar
         meses_a_processar = []
@@ -180,16 +278,17 @@ def main():
                 
                 meses_a_processar.append(mes_ref)
         
-        # Processar cada mês
-        success_overall = True
-        for mes in meses_a_processar:
-            success = process_mes_fechamento(mes, args.farmer_id, args.employee_name, logger)
-            
-            if not success:
-                logger.error(f"Falha no processamento do mês {mes.strftime('%Y-%m')}")
-                success_overall = False
+        # Processar os meses (em paralelo com --workers > 1)
+        resultados = process_meses_fechamento(
+            meses_a_processar, args.farmer_id, args.employee_name, logger, args.workers
+        )
+        
+        meses_com_falha = [mes for mes, success in resultados.items() if not success]
+        for mes in meses_com_falha:
+            logger.error(f"Falha no processamento do mês {mes}")
+        logger.info(f"Meses processados: {len(resultados) - len(meses_com_falha)} com sucesso, {len(meses_com_falha)} com falha")
         
-        if success_overall:
+        if not meses_com_falha:
             logger.info("ETL do KPI de Fechamento de Comissão (meses passados) concluído com sucesso")
             return 0
         else:
@@ -2,55 +2,87 @@
 # -*- coding: utf-8 -*-
 
 """
-Módulo de transformação de dados para o KPI de Receitas dos meses anteriores.
+Módulo de transformação de dados para o KPI de Fechamento de Comissão (meses passados).
 """
 
 import logging
 import pandas as pd
-import numpy as np
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def transform_meses_anteriores(df_meses_anteriores):
+def _periodo_limite(periodo, posicao):
     """
-    Transforma os dados de meses anteriores.
-    
+    Obtém o início (posicao=0) ou o fim (posicao=1) do período de responsabilidade.
+
     Args:
-        df_meses_anteriores (pandas.DataFrame): DataFrame com dados extraídos
-        
+        periodo (list): Array [início, fim] retornado pela query
+        posicao (int): Posição no array
+
+    Returns:
+        datetime or None: Data do limite do período
+    """
+    if isinstance(periodo, (list, tuple)) and len(periodo) > posicao:
+        return periodo[posicao]
+    return None
+
+def prepare_fechamento_dataset(df_fechamento, mes_referencia):
+    """
+    Prepara o dataset final de fechamento de comissão de um mês passado.
+
+    Args:
+        df_fechamento (pandas.DataFrame): DataFrame com dados de fechamento
+        mes_referencia (datetime): Mês de referência
+
     Returns:
-        pandas.DataFrame: DataFrame com dados transformados
+        pandas.DataFrame: DataFrame final formatado
     """
     try:
-        logger.info("Transformando dados de meses anteriores")
-        
-        if df_meses_anteriores.empty:
-            logger.warning("DataFrame de meses anteriores está vazio")
-            return pd.DataFrame(columns=['mes', 'farmer_id', 'employee_name', 'receita_bruta', 
-                                     'receita_liquida', 'comissao_bruta', 'comissao_liquida'])
-        
-        # Garantir que as colunas de data sejam datetime
-        if 'mes' in df_meses_anteriores.columns:
-            df_meses_anteriores['mes'] = pd.to_datetime(df_meses_anteriores['mes'])
-        
-        # Convertendo valores para numéricos se necessário
-        for col in ['farmer_id', 'receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
-            if col in df_meses_anteriores.columns:
-                df_meses_anteriores[col] = pd.to_numeric(df_meses_anteriores[col], errors='coerce')
-        
-        # Arredondando valores para 2 casas decimais
-        for col in ['receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
-            if col in df_meses_anteriores.columns:
-                df_meses_anteriores[col] = df_meses_anteriores[col].round(2)
-        
-        # Adicionando coluna de mês formatada (MM/YYYY)
-        df_meses_anteriores['mes_formatado'] = df_meses_anteriores['mes'].dt.strftime('%m/%Y')
-        
-        logger.info("Transformação de meses anteriores concluída com sucesso")
-        
-        return df_meses_anteriores
-    
+        logger.info(f"Preparando dataset final de fechamento para {mes_referencia.strftime('%Y-%m')}")
+
+        if df_fechamento.empty:
+            logger.warning("DataFrame de fechamento está vazio")
+            return pd.DataFrame()
+
+        # Adicionando informações do mês
+        df_final = df_fechamento.copy()
+        df_final['mes'] = mes_referencia.replace(day=1)  # Primeiro dia do mês
+        df_final['mes_formatado'] = mes_referencia.strftime('%m/%Y')
+        df_final['is_current_month'] = False  # Fechamento de mês já encerrado
+
+        # A tabela de meses passados guarda o período de responsabilidade em duas colunas
+        if 'periodo_responsabilidade' in df_final.columns:
+            df_final['periodo_responsabilidade_inicio'] = pd.to_datetime(
+                df_final['periodo_responsabilidade'].map(lambda p: _periodo_limite(p, 0))
+            )
+            df_final['periodo_responsabilidade_fim'] = pd.to_datetime(
+                df_final['periodo_responsabilidade'].map(lambda p: _periodo_limite(p, 1))
+            )
+
+        # Valores monetários em centavos (utils.money): nulos viram 0, sem arredondamento
+        colunas_monetarias = [
+            'churn_total', 'meta_churn', 'bonus_churn',
+            'captacao_total', 'meta_captacao', 'bonus_captacao',
+            'receita_total', 'meta_receita', 'bonus_receita',
+            'comissao_bruta_total', 'bonus_total'
+        ]
+        colunas_percentual = ['porcentagem_churn', 'porcentagem_captacao', 'porcentagem_receita']
+
+        for col in colunas_monetarias:
+            if col in df_final.columns:
+                df_final[col] = df_final[col].fillna(0)
+
+        for col in colunas_percentual:
+            if col in df_final.columns:
+                df_final[col] = pd.to_numeric(df_final[col], errors='coerce').fillna(0).round(2)
+
+        # Adicionando timestamp da atualização
+        df_final['created_at'] = datetime.now()
+        df_final['updated_at'] = datetime.now()
+
+        logger.info(f"Dataset final preparado com sucesso. Total: {len(df_final)} registros")
+        return df_final
+
     except Exception as e:
-        logger.error(f"Erro ao transformar dados de meses anteriores: {str(e)}")
-        raise
\ No newline at end of file
+        logger.error(f"Erro ao preparar dataset final: {str(e)}")
+        raise
@@ -17,9 +17,27 @@ sys.path.append(BASE_DIR)
 
 from utils.db_connection import DatabaseConnection
 from utils.db_schema_farmer.db_schema_comissao import create_fechamento_farmer_m_presente_table
+from utils.bulk_load import copy_dataframe
 
 logger = logging.getLogger(__name__)
 
+FECHAMENTO_COLUMNS = [
+    'mes', 'mes_formatado', 'farmer_id', 'farmer_name', 'hierarchy_level',
+    'data_positivador', 'periodo_responsabilidade',
+    'churn_total', 'meta_churn', 'status_churn', 'porcentagem_churn', 'bonus_churn',
+    'captacao_total', 'meta_captacao', 'status_captacao', 'porcentagem_captacao', 'bonus_captacao',
+    'receita_total', 'meta_receita', 'status_receita', 'porcentagem_receita', 'bonus_receita',
+    'comissao_bruta_total', 'bonus_total', 'is_current_month', 'created_at', 'updated_at'
+]
+
+# Colunas monetárias em centavos (utils.money)
+FECHAMENTO_MONEY_COLUMNS = [
+    'churn_total', 'meta_churn', 'bonus_churn',
+    'captacao_total', 'meta_captacao', 'bonus_captacao',
+    'receita_total', 'meta_receita', 'bonus_receita',
+    'comissao_bruta_total', 'bonus_total'
+]
+
 def load_fechamento_comissao_farmer(df_fechamento, farmer_id=None):
     """
     Carrega os dados de fechamento de comissão na tabela de destino.
@@ -71,58 +89,23 @@ def load_fechamento_comissao_farmer(df_fechamento, farmer_id=None):
                 deleted_count = cursor.rowcount
                 logger.info(f"Registros deletados: {deleted_count}")
                 
-                # Preparando os dados para inserção
-                data_to_insert = []
-                for _, row in df_fechamento.iterrows():
-                    # Se um farmer_id foi especificado para carga, filtra os dados
-                    if farmer_id and row['farmer_id'] != farmer_id:
-                        continue
-                        
-                    data_to_insert.append((
-                        row['mes'],
-                        row['mes_formatado'],
-                        row['farmer_id'],
-                        row['farmer_name'],
-                        row['hierarchy_level'],
-                        row['data_positivador'] if pd.notna(row['data_positivador']) else None,
-                        row['periodo_responsabilidade'],
-                        row['churn_total'],
-                        row['meta_churn'],
-                        row['status_churn'],
-                        row['porcentagem_churn'],
-                        row['bonus_churn'],
-                        row['captacao_total'],
-                        row['meta_captacao'],
-                        row['status_captacao'],
-                        row['porcentagem_captacao'],
-                        row['bonus_captacao'],
-                        row['receita_total'],
-                        row['meta_receita'],
-                        row['status_receita'],
-                        row['porcentagem_receita'],
-                        row['bonus_receita'],
-                        row['comissao_bruta_total'],
-                        row['bonus_total'],
-                        row['is_current_month'],
-                        datetime.now(),
-                        datetime.now()
-                    ))
+                # Se um farmer_id foi especificado para carga, filtra os dados
+                df_carga = df_fechamento
+                if farmer_id:
+                    df_carga = df_carga[df_carga['farmer_id'] == farmer_id]
+                
+                df_carga = df_carga.assign(created_at=datetime.now(), updated_at=datetime.now())
                 
-                # Executando a inserção em massa
-                if data_to_insert:
-                    cursor.executemany("""
-                    INSERT INTO analysis.fechamento_farmer_m_presente
-                    (mes, mes_formatado, farmer_id, farmer_name, hierarchy_level, 
-                    data_positivador, periodo_responsabilidade,
-                    churn_total, meta_churn, status_churn, porcentagem_churn, bonus_churn,
-                    captacao_total, meta_captacao, status_captacao, porcentagem_captacao, bonus_captacao,
-                    receita_total, meta_receita, status_receita, porcentagem_receita, bonus_receita,
-                    comissao_bruta_total, bonus_total, is_current_month, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, data_to_insert)
-                    
-                    # Contando quantos registros foram inseridos
-                    inserted_count = len(data_to_insert)
+                # Carga em massa via COPY
+                inserted_count = copy_dataframe(
+                    cursor,
+                    df_carga,
+                    'analysis.fechamento_farmer_m_presente',
+                    FECHAMENTO_COLUMNS,
+                    cents_columns=FECHAMENTO_MONEY_COLUMNS
+                )
+                
+                if inserted_count:
                     logger.info(f"Registros inseridos: {inserted_count}")
             
         logger.info("Carregamento de dados de fechamento de comissão concluído com sucesso")
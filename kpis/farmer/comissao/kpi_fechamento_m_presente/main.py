@@ -54,10 +54,13 @@ def setup_logging(log_level='INFO'):
     return logging.getLogger(__name__)
 
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """
     Analisa os argumentos da linha de comando.
     
+    Args:
+        argv (list, optional): Argumentos a analisar; se None, usa sys.argv
+        
     Returns:
         argparse.Namespace: Argumentos analisados
     """
@@ -85,7 +88,7 @@ def parse_arguments():
         help='Nível de logging (default: INFO)'
     )
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def main():
@@ -98,18 +101,60 @@ def main():
     # Configurando logging
     logger = setup_logging(args.log_level)
     
-    try:
-        logger.info("Iniciando ETL do KPI de Fechamento de Comissão (mês atual)")
-        logger.info(f"Parâmetros: farmer_id={args.farmer_id}, employee_name={args.employee_name}")
+    return run(args, logger)
+
+
+def run_extract(args, logger):
+    """
+    Executa a extração e a transformação do ETL (etapa usada pelo agendador etl).
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
         
-        # Extração direta dos dados de fechamento (usando a query otimizada)
-        df_fechamento = extract_fechamento_presente(args.farmer_id, args.employee_name)
+    Returns:
+        pandas.DataFrame: Dados de fechamento prontos para run_load()
+    """
+    logger.info("Iniciando ETL do KPI de Fechamento de Comissão (mês atual)")
+    logger.info(f"Parâmetros: farmer_id={args.farmer_id}, employee_name={args.employee_name}")
+    
+    # Extração direta dos dados de fechamento (usando a query otimizada)
+    df_fechamento = extract_fechamento_presente(args.farmer_id, args.employee_name)
+    
+    # Transformação básica para preparar para carregamento
+    return prepare_fechamento_dataset(df_fechamento, datetime.now())
+
+
+def run_load(args, dados, logger):
+    """
+    Executa a carga do ETL a partir do resultado de run_extract().
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        dados (pandas.DataFrame): Resultado de run_extract()
+        logger (logging.Logger): Logger configurado
         
-        # Transformação básica para preparar para carregamento
-        df_final = prepare_fechamento_dataset(df_fechamento, datetime.now())
+    Returns:
+        bool: True se o carregamento foi bem-sucedido
+    """
+    # Carregamento
+    return load_fechamento_comissao_farmer(dados, args.farmer_id)
+
+
+def run(args, logger):
+    """
+    Executa o ETL com os argumentos já analisados (usado também pelo orquestrador etl).
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
         
-        # Carregamento
-        success = load_fechamento_comissao_farmer(df_final, args.farmer_id)
+    Returns:
+        int: Código de saída (0 em caso de sucesso)
+    """
+    try:
+        df_final = run_extract(args, logger)
+        success = run_load(args, df_final, logger)
         
         if success:
             logger.info("ETL do KPI de Fechamento de Comissão (mês atual) concluído com sucesso")
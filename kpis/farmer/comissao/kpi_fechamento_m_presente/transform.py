@@ -35,15 +35,20 @@ def prepare_fechamento_dataset(df_fechamento, mes_referencia):
         df_final['mes_formatado'] = mes_referencia.strftime('%m/%Y')
         df_final['is_current_month'] = True  # Este é um fechamento do mês atual
         
-        # Garantindo que as colunas numéricas estejam no formato correto
-        colunas_numericas = [
-            'churn_total', 'meta_churn', 'porcentagem_churn', 'bonus_churn',
-            'captacao_total', 'meta_captacao', 'porcentagem_captacao', 'bonus_captacao',
-            'receita_total', 'meta_receita', 'porcentagem_receita', 'bonus_receita',
+        # Valores monetários em centavos (utils.money): nulos viram 0, sem arredondamento
+        colunas_monetarias = [
+            'churn_total', 'meta_churn', 'bonus_churn',
+            'captacao_total', 'meta_captacao', 'bonus_captacao',
+            'receita_total', 'meta_receita', 'bonus_receita',
             'comissao_bruta_total', 'bonus_total'
         ]
+        colunas_percentual = ['porcentagem_churn', 'porcentagem_captacao', 'porcentagem_receita']
         
-        for col in colunas_numericas:
+        for col in colunas_monetarias:
+            if col in df_final.columns:
+                df_final[col] = df_final[col].fillna(0)
+        
+        for col in colunas_percentual:
             if col in df_final.columns:
                 df_final[col] = pd.to_numeric(df_final[col], errors='coerce').fillna(0).round(2)
         
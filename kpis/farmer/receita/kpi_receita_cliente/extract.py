@@ -19,10 +19,123 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
 sys.path.append(BASE_DIR)
 
 from utils.db_connection import get_connection
-from utils.client_responsibility import filter_data_by_responsibility, add_responsible_farmer_info
+from utils.stream_extract import stream_query, DEFAULT_CHUNK_SIZE
+from utils.typed_fetch import fetch_dataframe
+from utils.positivador_month_end import ensure_positivador_month_end
+from utils.fact_client_month import ensure_fact_client_month, month_list
+from utils.client_responsibility import (
+    filter_data_by_responsibility,
+    add_responsible_farmer_info,
+    ensure_client_farmer_periods,
+    responsibility_filter_sql
+)
 
 logger = logging.getLogger(__name__)
 
+# Positivador por cliente a partir da tabela fato (utils.fact_client_month): uma
+# linha por cliente e mês, com os valores do snapshot de fim de mês
+DETALHAMENTO_POSITIVADOR_QUERY = """
+SELECT
+    'Positivador' AS tipo_operacao,
+    f.record_date AS data_operacao,
+    c.client_id,
+    c.name AS nome_cliente,
+    f.farmer_id,
+    e.name AS nome_farmer,
+    CAST(0 AS numeric) AS valor_financeiro,
+    CAST(0 AS numeric) AS percentual_comissao,
+    f.receita_bruta,
+    f.comissao_bruta,
+    f.comissao_liquida,
+    CAST(NULL AS text) AS status,
+    f.churn,
+    f.patrimony,
+    f.net_capture
+FROM analysis.fact_client_month f
+JOIN gammadata.clients c ON f.client_id = c.client_id
+JOIN gammadata.employees e ON f.farmer_id = e.employee_id
+WHERE f.fonte = 'positivador'
+  AND f.record_date BETWEEN %s AND %s
+
+"""
+
+DETALHAMENTO_COE_QUERY = """
+SELECT
+    'COE' AS tipo_operacao,
+    c.date AS data_operacao,
+    cl.client_id,
+    cl.name AS nome_cliente,
+    CAST(cl.farmer_id AS INTEGER) AS farmer_id,
+    e.name AS nome_farmer,
+    CAST(c.financial_value AS numeric) AS valor_financeiro,
+    CAST(c.commission_percentage AS numeric) AS percentual_comissao,
+    CAST((c.financial_value * c.commission_percentage/100) AS numeric) AS receita_bruta,
+    CAST((c.financial_value * c.commission_percentage/100) * 0.95 AS numeric) AS comissao_bruta,
+    CAST((c.financial_value * c.commission_percentage/100) * 0.95 * 0.805 AS numeric) AS comissao_liquida,
+    c.status,
+    NULL::numeric AS churn,
+    NULL::numeric AS patrimony,
+    NULL::numeric AS net_capture
+FROM gammadata.coe c
+JOIN gammadata.clients cl ON c.client_id = cl.client_id
+JOIN gammadata.employees e ON CAST(cl.farmer_id AS INTEGER) = e.employee_id
+WHERE c.status = 'Liquidada'
+AND c.date BETWEEN %s AND %s
+
+"""
+
+DETALHAMENTO_OP_ESTRUTURADAS_QUERY = """
+SELECT
+    'Operação Estruturada' AS tipo_operacao,
+    oe.data AS data_operacao,
+    cl.client_id,
+    cl.name AS nome_cliente,
+    CAST(cl.farmer_id AS INTEGER) AS farmer_id,
+    e.name AS nome_farmer,
+    CAST(0 AS numeric) AS valor_financeiro,
+    CAST(0 AS numeric) AS percentual_comissao,
+    CAST(oe.comissao AS numeric) AS receita_bruta,
+    CAST(oe.comissao * 0.95 AS numeric) AS comissao_bruta,
+    CAST(oe.comissao * 0.95 * 0.805 AS numeric) AS comissao_liquida,
+    oe.status_operacao AS status,
+    NULL::numeric AS churn,
+    NULL::numeric AS patrimony,
+    NULL::numeric AS net_capture
+FROM gammadata.operacoes_estruturadas oe
+JOIN gammadata.clients cl ON oe.client_id = cl.client_id
+JOIN gammadata.employees e ON CAST(cl.farmer_id AS INTEGER) = e.employee_id
+WHERE oe.data BETWEEN %s AND %s
+AND oe.status_operacao != 'Cancelado'
+
+"""
+
+# Tipos do detalhamento por cliente, aplicados na leitura (ver utils.typed_fetch);
+# valores monetários em centavos (ver utils.money)
+DETALHAMENTO_SCHEMA = {
+    'tipo_operacao': 'category',
+    'data_operacao': 'datetime64[ns]',
+    'client_id': 'int64',
+    'nome_cliente': 'category',
+    'farmer_id': 'int32',
+    'nome_farmer': 'category',
+    'valor_financeiro': 'cents',
+    'percentual_comissao': 'float64',
+    'receita_bruta': 'cents',
+    'comissao_bruta': 'cents',
+    'comissao_liquida': 'cents',
+    'status': 'category',
+    'churn': 'cents',
+    'patrimony': 'cents',
+    'net_capture': 'cents',
+}
+
+# Fontes do detalhamento: (nome, consulta, coluna do cliente, coluna de data)
+FONTES_DETALHAMENTO = [
+    ('positivador', DETALHAMENTO_POSITIVADOR_QUERY, 'f.client_id', 'f.record_date'),
+    ('COE', DETALHAMENTO_COE_QUERY, 'c.client_id', 'c.date'),
+    ('operações estruturadas', DETALHAMENTO_OP_ESTRUTURADAS_QUERY, 'oe.client_id', 'oe.data'),
+]
+
 def extract_ultimas_datas_meses(months_back=11):
     """
     Extrai as últimas datas disponíveis para cada mês no positivador_historical.
@@ -33,7 +146,9 @@ def extract_ultimas_datas_meses(months_back=11):
     Returns:
         pandas.DataFrame: DataFrame com as últimas datas de cada mês
     """
+    conn = None
     try:
+        ensure_positivador_month_end()
         conn = get_connection()
         logger.info(f"Extraindo últimas datas dos meses (months_back: {months_back})")
         
@@ -47,20 +162,16 @@ def extract_ultimas_datas_meses(months_back=11):
         )
         SELECT 
             m.mes,
-            MAX(ph.record_date) AS ultima_data
+            MAX(pme.record_date) AS ultima_data
         FROM meses m
-        LEFT JOIN gammadata.positivador_historical ph 
-            ON DATE_TRUNC('month', ph.record_date) = m.mes
+        LEFT JOIN analysis.positivador_month_end pme 
+            ON pme.mes = m.mes
         GROUP BY m.mes
         ORDER BY m.mes
         """
         
-        df = pd.read_sql(query, conn, params=(months_back,))
-        
-        # Converter colunas de data para datetime
-        if not df.empty:
-            df['mes'] = pd.to_datetime(df['mes'])
-            df['ultima_data'] = pd.to_datetime(df['ultima_data'])
+        # Colunas de data já chegam como datetime64
+        df = fetch_dataframe(conn, query, (months_back,))
         
         logger.info(f"Datas extraídas com sucesso. Registros: {len(df)}")
         return df
@@ -72,111 +183,111 @@ def extract_ultimas_datas_meses(months_back=11):
         if conn:
             conn.close()
 
-def extract_detalhamento_positivador(data_inicio, data_fim, farmer_id=None):
+def _build_detalhamento_query(query, client_column, date_column, data_inicio, data_fim, farmer_id, filtrar_no_banco):
     """
-    Extrai dados detalhados do positivador por cliente.
+    Monta a consulta de uma fonte do detalhamento e os seus parâmetros.
     
     Args:
+        query (str): Consulta base da fonte (filtra o período com dois %s)
+        client_column (str): Coluna do cliente usada no filtro de responsabilidade
+        date_column (str): Coluna de data usada no filtro de responsabilidade
         data_inicio (datetime): Data inicial para busca
         data_fim (datetime): Data final para busca
         farmer_id (int, optional): ID do farmer para filtrar dados
+        filtrar_no_banco (bool): Aplica o filtro de responsabilidade na própria query
         
     Returns:
-        pandas.DataFrame: DataFrame com detalhes do positivador por cliente
+        tuple: (query, params)
+    """
+    params = [data_inicio, data_fim]
+    
+    # Por padrão não filtramos por farmer_id na query, para permitir o filtro por
+    # responsabilidade depois; no modo server-side o filtro é feito no banco
+    if filtrar_no_banco:
+        ensure_client_farmer_periods()
+        query += " AND " + responsibility_filter_sql(client_column, date_column)
+        params.append(farmer_id)
+    
+    return query, params
+
+def _ajustar_detalhamento(df, data_inicio, data_fim, farmer_id, filtrar_no_banco):
+    """
+    Aplica o filtro de responsabilidade em pandas ao detalhamento já tipado.
+    
+    Args:
+        df (pandas.DataFrame): Dados extraídos (DataFrame completo ou bloco)
+        data_inicio (datetime): Data inicial da busca
+        data_fim (datetime): Data final da busca
+        farmer_id (int, optional): ID do farmer para filtrar dados
+        filtrar_no_banco (bool): Se o filtro de responsabilidade já foi feito no banco
+        
+    Returns:
+        pandas.DataFrame: Dados filtrados
     """
+    # Filtrar por responsabilidade do farmer, se especificado e não filtrado no banco
+    if not df.empty and farmer_id and not filtrar_no_banco:
+        df = filter_data_by_responsibility(df, 'data_operacao', farmer_id, (data_inicio, data_fim))
+    
+    return df
+
+def _extract_detalhamento(fonte, data_inicio, data_fim, farmer_id, server_side_filter):
+    """
+    Extrai uma fonte do detalhamento por cliente em um único DataFrame.
+    
+    Args:
+        fonte (tuple): Item de FONTES_DETALHAMENTO
+        data_inicio (datetime): Data inicial para busca
+        data_fim (datetime): Data final para busca
+        farmer_id (int, optional): ID do farmer para filtrar dados
+        server_side_filter (bool): Aplica o filtro de responsabilidade na própria query
+        
+    Returns:
+        pandas.DataFrame: Detalhes da fonte por cliente
+    """
+    nome, query, client_column, date_column = fonte
+    filtrar_no_banco = bool(farmer_id) and server_side_filter
+    
+    conn = None
     try:
+        if nome == 'positivador':
+            ensure_fact_client_month(month_list(data_inicio, data_fim))
         conn = get_connection()
-        logger.info(f"Extraindo detalhamento do positivador (início: {data_inicio}, fim: {data_fim}, farmer_id: {farmer_id if farmer_id else 'Todos'})")
+        logger.info(f"Extraindo detalhamento de {nome} (início: {data_inicio}, fim: {data_fim}, farmer_id: {farmer_id if farmer_id else 'Todos'})")
         
-        # Subquery para obter as últimas datas de cada mês
-        ultima_data_subquery = """
-        WITH ultima_data_mes AS (
-            SELECT DISTINCT 
-                DATE_TRUNC('month', record_date) AS mes,
-                MAX(record_date) OVER (PARTITION BY DATE_TRUNC('month', record_date)) AS ultima_data
-            FROM gammadata.positivador_historical
-            WHERE record_date BETWEEN %s AND %s
+        query, params = _build_detalhamento_query(
+            query, client_column, date_column, data_inicio, data_fim, farmer_id, filtrar_no_banco
         )
-        """
         
-        # Query principal
-        query = ultima_data_subquery + """
-        SELECT 
-            'Positivador' AS tipo_operacao,
-            ph.record_date AS data_operacao,
-            c.client_id,
-            c.name AS nome_cliente,
-            CAST(c.farmer_id AS INTEGER) AS farmer_id,
-            e.name AS nome_farmer,
-            CAST(0 AS numeric) AS valor_financeiro,
-            CAST(0 AS numeric) AS percentual_comissao,
-            CAST(
-                COALESCE(ph.bovespa_revenue, 0) + 
-                COALESCE(ph.futures_revenue, 0) +
-                COALESCE(ph.bank_fixed_income_revenue, 0) +
-                COALESCE(ph.private_fixed_income_revenue, 0) +
-                COALESCE(ph.public_fixed_income_revenue, 0) +
-                COALESCE(ph.rent_revenue, 0)
-            AS numeric) AS receita_bruta,
-            CAST(
-                (COALESCE(ph.bovespa_revenue, 0) * 0.665) +
-                (COALESCE(ph.futures_revenue, 0) * 0.665) +
-                (COALESCE(ph.bank_fixed_income_revenue, 0) * 0.475) +
-                (COALESCE(ph.private_fixed_income_revenue, 0) * 0.475) +
-                (COALESCE(ph.public_fixed_income_revenue, 0) * 0.475) +
-                (COALESCE(ph.rent_revenue, 0) * 0.475)
-            AS numeric) AS comissao_bruta,
-            CAST(
-                ((COALESCE(ph.bovespa_revenue, 0) * 0.665) +
-                (COALESCE(ph.futures_revenue, 0) * 0.665) +
-                (COALESCE(ph.bank_fixed_income_revenue, 0) * 0.475) +
-                (COALESCE(ph.private_fixed_income_revenue, 0) * 0.475) +
-                (COALESCE(ph.public_fixed_income_revenue, 0) * 0.475) +
-                (COALESCE(ph.rent_revenue, 0) * 0.475)) * 0.805
-            AS numeric) AS comissao_liquida,
-            CAST(NULL AS text) AS status,
-            ph.churn AS churn,
-            ph.patrimony AS patrimony,
-            ph.net_capture AS net_capture
-        FROM ultima_data_mes udm
-        JOIN gammadata.positivador_historical ph ON udm.ultima_data = ph.record_date
-        JOIN gammadata.clients c ON ph.client_id = c.client_id
-        JOIN gammadata.employees e ON CAST(c.farmer_id AS INTEGER) = e.employee_id
-        WHERE ph.record_date BETWEEN %s AND %s
-        """
-        
-        params = [data_inicio, data_fim, data_inicio, data_fim]
-        
-        # Na query SQL, não filtramos por farmer_id para permitir o filtro por responsabilidade depois
-        
-        df = pd.read_sql(query, conn, params=params)
-        
-        # Converter coluna de data para datetime
-        if not df.empty:
-            df['data_operacao'] = pd.to_datetime(df['data_operacao'])
-            
-            # Também converter colunas numéricas explicitamente
-            for col in ['farmer_id', 'client_id', 'valor_financeiro', 'percentual_comissao', 
-                       'receita_bruta', 'comissao_bruta', 'comissao_liquida',
-                       'churn', 'patrimony', 'net_capture']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Filtrar por responsabilidade do farmer, se especificado
-            if farmer_id:
-                df = filter_data_by_responsibility(df, 'data_operacao', farmer_id, (data_inicio, data_fim))
+        df = fetch_dataframe(conn, query, params, DETALHAMENTO_SCHEMA)
+        df = _ajustar_detalhamento(df, data_inicio, data_fim, farmer_id, filtrar_no_banco)
         
-        logger.info(f"Dados do positivador extraídos com sucesso. Registros: {len(df)}")
+        logger.info(f"Dados de {nome} extraídos com sucesso. Registros: {len(df)}")
         return df
     
     except Exception as e:
-        logger.error(f"Erro ao extrair detalhamento do positivador: {str(e)}")
+        logger.error(f"Erro ao extrair detalhamento de {nome}: {str(e)}")
         raise
     finally:
         if conn:
             conn.close()
 
-def extract_detalhamento_coe(data_inicio, data_fim, farmer_id=None):
+def extract_detalhamento_positivador(data_inicio, data_fim, farmer_id=None, server_side_filter=False):
+    """
+    Extrai dados detalhados do positivador por cliente.
+    
+    Args:
+        data_inicio (datetime): Data inicial para busca
+        data_fim (datetime): Data final para busca
+        farmer_id (int, optional): ID do farmer para filtrar dados
+        server_side_filter (bool): Se True e farmer_id informado, aplica o filtro de
+            responsabilidade na própria query, trazendo apenas os registros do farmer
+        
+    Returns:
+        pandas.DataFrame: DataFrame com detalhes do positivador por cliente
+    """
+    return _extract_detalhamento(FONTES_DETALHAMENTO[0], data_inicio, data_fim, farmer_id, server_side_filter)
+
+def extract_detalhamento_coe(data_inicio, data_fim, farmer_id=None, server_side_filter=False):
     """
     Extrai dados detalhados de COE por cliente.
     
@@ -184,69 +295,15 @@ def extract_detalhamento_coe(data_inicio, data_fim, farmer_id=None):
         data_inicio (datetime): Data inicial para busca
         data_fim (datetime): Data final para busca
         farmer_id (int, optional): ID do farmer para filtrar dados
+        server_side_filter (bool): Se True e farmer_id informado, aplica o filtro de
+            responsabilidade na própria query, trazendo apenas os registros do farmer
         
     Returns:
         pandas.DataFrame: DataFrame com detalhes de COE por cliente
     """
-    try:
-        conn = get_connection()
-        logger.info(f"Extraindo detalhamento de COE (início: {data_inicio}, fim: {data_fim}, farmer_id: {farmer_id if farmer_id else 'Todos'})")
-        
-        query = """
-        SELECT 
-            'COE' AS tipo_operacao,
-            c.date AS data_operacao,
-            cl.client_id,
-            cl.name AS nome_cliente,
-            CAST(cl.farmer_id AS INTEGER) AS farmer_id,
-            e.name AS nome_farmer,
-            CAST(c.financial_value AS numeric) AS valor_financeiro,
-            CAST(c.commission_percentage AS numeric) AS percentual_comissao,
-            CAST((c.financial_value * c.commission_percentage/100) AS numeric) AS receita_bruta,
-            CAST((c.financial_value * c.commission_percentage/100) * 0.95 AS numeric) AS comissao_bruta,
-            CAST((c.financial_value * c.commission_percentage/100) * 0.95 * 0.805 AS numeric) AS comissao_liquida,
-            c.status,
-            NULL::numeric AS churn,
-            NULL::numeric AS patrimony,
-            NULL::numeric AS net_capture
-        FROM gammadata.coe c
-        JOIN gammadata.clients cl ON c.client_id = cl.client_id
-        JOIN gammadata.employees e ON CAST(cl.farmer_id AS INTEGER) = e.employee_id
-        WHERE c.status = 'Liquidada'
-        AND c.date BETWEEN %s AND %s
-        """
-        
-        params = [data_inicio, data_fim]
-        
-        # Na query SQL, não filtramos por farmer_id para permitir o filtro por responsabilidade depois
-        
-        df = pd.read_sql(query, conn, params=params)
-        
-        # Converter coluna de data para datetime
-        if not df.empty:
-            df['data_operacao'] = pd.to_datetime(df['data_operacao'])
-            
-            # Também converter colunas numéricas explicitamente
-            for col in ['farmer_id', 'client_id', 'valor_financeiro', 'percentual_comissao', 
-                       'receita_bruta', 'comissao_bruta', 'comissao_liquida']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Filtrar por responsabilidade do farmer, se especificado
-            if farmer_id:
-                df = filter_data_by_responsibility(df, 'data_operacao', farmer_id, (data_inicio, data_fim))
-        
-        logger.info(f"Dados de COE extraídos com sucesso. Registros: {len(df)}")
-        return df
-    
-    except Exception as e:
-        logger.error(f"Erro ao extrair detalhamento de COE: {str(e)}")
-        raise
-    finally:
-        if conn:
-            conn.close()
+    return _extract_detalhamento(FONTES_DETALHAMENTO[1], data_inicio, data_fim, farmer_id, server_side_filter)
 
-def extract_detalhamento_op_estruturadas(data_inicio, data_fim, farmer_id=None):
+def extract_detalhamento_op_estruturadas(data_inicio, data_fim, farmer_id=None, server_side_filter=False):
     """
     Extrai dados detalhados de operações estruturadas por cliente.
     
@@ -254,64 +311,48 @@ def extract_detalhamento_op_estruturadas(data_inicio, data_fim, farmer_id=None):
         data_inicio (datetime): Data inicial para busca
         data_fim (datetime): Data final para busca
         farmer_id (int, optional): ID do farmer para filtrar dados
+        server_side_filter (bool): Se True e farmer_id informado, aplica o filtro de
+            responsabilidade na própria query, trazendo apenas os registros do farmer
         
     Returns:
         pandas.DataFrame: DataFrame com detalhes de operações estruturadas por cliente
     """
-    try:
-        conn = get_connection()
-        logger.info(f"Extraindo detalhamento de operações estruturadas (início: {data_inicio}, fim: {data_fim}, farmer_id: {farmer_id if farmer_id else 'Todos'})")
-        
-        query = """
-        SELECT 
-            'Operação Estruturada' AS tipo_operacao,
-            oe.data AS data_operacao,
-            cl.client_id,
-            cl.name AS nome_cliente,
-            CAST(cl.farmer_id AS INTEGER) AS farmer_id,
-            e.name AS nome_farmer,
-            CAST(0 AS numeric) AS valor_financeiro,
-            CAST(0 AS numeric) AS percentual_comissao,
-            CAST(oe.comissao AS numeric) AS receita_bruta,
-            CAST(oe.comissao * 0.95 AS numeric) AS comissao_bruta,
-            CAST(oe.comissao * 0.95 * 0.805 AS numeric) AS comissao_liquida,
-            oe.status_operacao AS status,
-            NULL::numeric AS churn,
-            NULL::numeric AS patrimony,
-            NULL::numeric AS net_capture
-        FROM gammadata.operacoes_estruturadas oe
-        JOIN gammadata.clients cl ON oe.client_id = cl.client_id
-        JOIN gammadata.employees e ON CAST(cl.farmer_id AS INTEGER) = e.employee_id
-        WHERE oe.data BETWEEN %s AND %s
-        AND oe.status_operacao != 'Cancelado'
-        """
-        
-        params = [data_inicio, data_fim]
-        
-        # Na query SQL, não filtramos por farmer_id para permitir o filtro por responsabilidade depois
+    return _extract_detalhamento(FONTES_DETALHAMENTO[2], data_inicio, data_fim, farmer_id, server_side_filter)
+
+def stream_detalhamento_cliente(data_inicio, data_fim, farmer_id=None, server_side_filter=False,
+                                chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Extrai o detalhamento por cliente das três fontes em blocos (cursor server-side).
+    
+    As fontes são lidas em sequência (positivador, COE e operações estruturadas),
+    com uma conexão por vez, e cada bloco tem no máximo chunk_size linhas.
+    
+    Args:
+        data_inicio (datetime): Data inicial para busca
+        data_fim (datetime): Data final para busca
+        farmer_id (int, optional): ID do farmer para filtrar dados
+        server_side_filter (bool): Se True e farmer_id informado, aplica o filtro de
+            responsabilidade na própria query
+        chunk_size (int): Quantidade máxima de linhas por bloco
         
-        df = pd.read_sql(query, conn, params=params)
+    Yields:
+        pandas.DataFrame: Blocos tipados e filtrados do detalhamento por cliente
+    """
+    ensure_fact_client_month(month_list(data_inicio, data_fim))
+    filtrar_no_banco = bool(farmer_id) and server_side_filter
+    
+    for nome, query, client_column, date_column in FONTES_DETALHAMENTO:
+        logger.info(f"Extraindo detalhamento de {nome} em blocos de {chunk_size} (início: {data_inicio}, fim: {data_fim}, farmer_id: {farmer_id if farmer_id else 'Todos'})")
+        query, params = _build_detalhamento_query(
+            query, client_column, date_column, data_inicio, data_fim, farmer_id, filtrar_no_banco
+        )
         
-        # Converter coluna de data para datetime
-        if not df.empty:
-            df['data_operacao'] = pd.to_datetime(df['data_operacao'])
-            
-            # Também converter colunas numéricas explicitamente
-            for col in ['farmer_id', 'client_id', 'valor_financeiro', 'percentual_comissao', 
-                       'receita_bruta', 'comissao_bruta', 'comissao_liquida']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Filtrar por responsabilidade do farmer, se especificado
-            if farmer_id:
-                df = filter_data_by_responsibility(df, 'data_operacao', farmer_id, (data_inicio, data_fim))
+        registros = 0
+        for chunk in stream_query(query, params, chunk_size, DETALHAMENTO_SCHEMA):
+            chunk = _ajustar_detalhamento(chunk, data_inicio, data_fim, farmer_id, filtrar_no_banco)
+            if chunk.empty:
+                continue
+            registros += len(chunk)
+            yield chunk
         
-        logger.info(f"Dados de operações estruturadas extraídos com sucesso. Registros: {len(df)}")
-        return df
-    
-    except Exception as e:
-        logger.error(f"Erro ao extrair detalhamento de operações estruturadas: {str(e)}")
-        raise
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+        logger.info(f"Dados de {nome} extraídos com sucesso. Registros: {registros}")
@@ -5,7 +5,8 @@
 Módulo de carregamento de dados para o KPI de Receitas por Cliente.
 
 Este módulo contém funções para carregar os dados detalhados por cliente
-na tabela de destino no banco de dados.
+na tabela de destino no banco de dados. Os meses do período são substituídos
+por troca das partições mensais (utils.month_partitions).
 """
 
 import logging
@@ -20,25 +21,78 @@ sys.path.append(BASE_DIR)
 
 from utils.db_connection import DatabaseConnection
 from utils.db_schema_farmer.db_schema_receita import create_receita_cliente_table
+from utils.month_partitions import swap_month_partitions
+from utils.fact_client_month import month_list
 
 logger = logging.getLogger(__name__)
 
-def load_receita_cliente(df_detalhamento, farmer_id=None):
+RECEITA_CLIENTE_COLUMNS = [
+    'data_operacao', 'mes', 'mes_formatado', 'tipo_operacao', 'client_id', 'nome_cliente',
+    'farmer_id', 'nome_farmer', 'valor_financeiro', 'percentual_comissao', 'receita_bruta',
+    'comissao_bruta', 'comissao_liquida', 'status', 'churn', 'patrimony', 'net_capture',
+    'created_at', 'updated_at'
+]
+
+RECEITA_CLIENTE_NUMERIC_COLUMNS = [
+    'valor_financeiro', 'percentual_comissao', 'receita_bruta', 'comissao_bruta',
+    'comissao_liquida', 'churn', 'patrimony', 'net_capture'
+]
+
+# Colunas monetárias, em centavos nos DataFrames (ver utils.money)
+RECEITA_CLIENTE_MONEY_COLUMNS = [
+    col for col in RECEITA_CLIENTE_NUMERIC_COLUMNS if col != 'percentual_comissao'
+]
+
+def _preparar_blocos(blocos, farmer_id):
+    """
+    Filtra os blocos pelo farmer (se informado) e acrescenta as colunas de auditoria.
+    
+    Args:
+        blocos (iterable): DataFrames com os dados detalhados por cliente
+        farmer_id (int, optional): ID do farmer para filtrar dados na carga
+        
+    Yields:
+        pandas.DataFrame: Blocos prontos para o COPY
+    """
+    for df_carga in blocos:
+        # Se um farmer_id foi especificado para carga, filtra os dados
+        if farmer_id and not df_carga.empty:
+            df_carga = df_carga[df_carga['farmer_id'] == farmer_id]
+        
+        yield df_carga.assign(created_at=datetime.now(), updated_at=datetime.now())
+
+def load_receita_cliente(df_detalhamento, farmer_id=None, periodo=None):
     """
     Carrega os dados detalhados por cliente na tabela de destino.
     
+    Aceita um DataFrame ou um iterador de blocos (pandas.DataFrame), como o de
+    transform_detalhamento_chunks; os blocos são enviados por COPY um a um, na
+    mesma transação, sem materializar o período inteiro em memória.
+    
     Args:
-        df_detalhamento (pandas.DataFrame): DataFrame com dados detalhados por cliente
+        df_detalhamento (pandas.DataFrame or iterable): Dados detalhados por cliente
         farmer_id (int, optional): ID do farmer para filtrar dados na carga
+        periodo (tuple, optional): (data_inicio, data_fim) cujos registros são
+            substituídos; obrigatório para iteradores. Para DataFrames, o padrão
+            é o intervalo de data_operacao dos dados
         
     Returns:
         bool: True se o carregamento foi bem-sucedido, False caso contrário
     """
     try:
-        # Verificando se há dados para carregar
-        if df_detalhamento.empty:
-            logger.warning("DataFrame vazio, nenhum dado para carregar")
-            return True
+        if isinstance(df_detalhamento, pd.DataFrame):
+            # Verificando se há dados para carregar
+            if df_detalhamento.empty:
+                logger.warning("DataFrame vazio, nenhum dado para carregar")
+                return True
+            if periodo is None:
+                periodo = (df_detalhamento['data_operacao'].min(), df_detalhamento['data_operacao'].max())
+            blocos = [df_detalhamento]
+        else:
+            if periodo is None:
+                logger.error("Carga em blocos exige o período (data_inicio, data_fim)")
+                return False
+            blocos = df_detalhamento
         
         # Usando o gerenciador de contexto para uma única conexão
         with DatabaseConnection() as conn:
@@ -49,72 +103,36 @@ def load_receita_cliente(df_detalhamento, farmer_id=None):
                 
             logger.info(f"Carregando dados de receita por cliente para farmer_id: {farmer_id if farmer_id else 'Todos'}")
             
+            # Período cujos registros serão substituídos
+            min_date = periodo[0].strftime('%Y-%m-%d')
+            max_date = periodo[1].strftime('%Y-%m-%d')
+            
+            # Linhas preservadas nas partições novas: fora do período e, numa carga
+            # filtrada, as dos demais farmers
+            keep_sql = "(data_operacao NOT BETWEEN %s AND %s"
+            keep_params = [min_date, max_date]
+            if farmer_id:
+                keep_sql += " OR farmer_id IS DISTINCT FROM %s"
+                keep_params.append(farmer_id)
+            keep_sql += ")"
+            
             with conn.cursor() as cursor:
-                # Obtém o período dos dados para apagar registros correspondentes
-                min_date = df_detalhamento['data_operacao'].min().strftime('%Y-%m-%d')
-                max_date = df_detalhamento['data_operacao'].max().strftime('%Y-%m-%d')
-                
-                # Apaga os registros existentes do período
-                if farmer_id:
-                    # Apenas apaga registros específicos do farmer_id no período
-                    cursor.execute("""
-                    DELETE FROM analysis.receita_cliente 
-                    WHERE data_operacao BETWEEN %s AND %s
-                    AND farmer_id = %s
-                    """, (min_date, max_date, farmer_id))
-                else:
-                    # Apaga todos os registros do período (recarga completa)
-                    cursor.execute("""
-                    DELETE FROM analysis.receita_cliente 
-                    WHERE data_operacao BETWEEN %s AND %s
-                    """, (min_date, max_date))
-                    
-                # Contando quantos registros foram deletados
-                deleted_count = cursor.rowcount
-                logger.info(f"Registros deletados: {deleted_count}")
-                
-                # Preparando os dados para inserção
-                data_to_insert = []
-                for _, row in df_detalhamento.iterrows():
-                    # Se um farmer_id foi especificado para carga, filtra os dados
-                    if farmer_id and row['farmer_id'] != farmer_id:
-                        continue
-                        
-                    data_to_insert.append((
-                        row['data_operacao'],
-                        row['mes'],
-                        row['mes_formatado'],
-                        row['tipo_operacao'],
-                        row['client_id'] if pd.notna(row['client_id']) else None,
-                        row['nome_cliente'] if pd.notna(row['nome_cliente']) else None,
-                        row['farmer_id'] if pd.notna(row['farmer_id']) else None,
-                        row['nome_farmer'] if pd.notna(row['nome_farmer']) else None,
-                        row['valor_financeiro'] if pd.notna(row['valor_financeiro']) else 0,
-                        row['percentual_comissao'] if pd.notna(row['percentual_comissao']) else 0,
-                        row['receita_bruta'] if pd.notna(row['receita_bruta']) else 0,
-                        row['comissao_bruta'] if pd.notna(row['comissao_bruta']) else 0,
-                        row['comissao_liquida'] if pd.notna(row['comissao_liquida']) else 0,
-                        row['status'] if pd.notna(row['status']) else None,
-                        row['churn'] if pd.notna(row['churn']) else 0,
-                        row['patrimony'] if pd.notna(row['patrimony']) else 0,
-                        row['net_capture'] if pd.notna(row['net_capture']) else 0,
-                        datetime.now(),
-                        datetime.now()
-                    ))
+                # Troca das partições dos meses do período; numéricos nulos viram 0,
+                # demais nulos viram NULL
+                inserted_count, replaced_count = swap_month_partitions(
+                    cursor,
+                    _preparar_blocos(blocos, farmer_id),
+                    'analysis.receita_cliente',
+                    RECEITA_CLIENTE_COLUMNS,
+                    month_list(periodo[0], periodo[1]),
+                    keep_sql=keep_sql,
+                    keep_params=tuple(keep_params),
+                    defaults={col: 0 for col in RECEITA_CLIENTE_NUMERIC_COLUMNS},
+                    cents_columns=RECEITA_CLIENTE_MONEY_COLUMNS
+                )
                 
-                # Executando a inserção em massa
-                if data_to_insert:
-                    cursor.executemany("""
-                    INSERT INTO analysis.receita_cliente
-                    (data_operacao, mes, mes_formatado, tipo_operacao, client_id, nome_cliente, 
-                    farmer_id, nome_farmer, valor_financeiro, percentual_comissao, receita_bruta, 
-                    comissao_bruta, comissao_liquida, status, churn, patrimony, net_capture, 
-                    created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, data_to_insert)
-                    
-                    # Contando quantos registros foram inseridos
-                    inserted_count = len(data_to_insert)
+                logger.info(f"Registros das partições substituídas: {replaced_count}")
+                if inserted_count:
                     logger.info(f"Registros inseridos: {inserted_count}")
             
         logger.info("Carregamento de dados de receita por cliente concluído com sucesso")
@@ -14,6 +14,7 @@ import os
 import sys
 from datetime import datetime, timedelta
 import traceback
+import pandas as pd
 
 # Caminho absoluto para o diretório raiz do projeto
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../../'))
@@ -27,17 +28,21 @@ from extract import (
     extract_ultimas_datas_meses,
     extract_detalhamento_positivador,
     extract_detalhamento_coe,
-    extract_detalhamento_op_estruturadas
+    extract_detalhamento_op_estruturadas,
+    stream_detalhamento_cliente
 )
 
 from transform import (
     transform_detalhamento_cliente,
+    transform_detalhamento_chunks,
     prepare_final_dataset
 )
 
 from load import (
     load_receita_cliente
 )
+from utils.client_responsibility import log_periods_cache_stats
+from utils.stream_extract import DEFAULT_CHUNK_SIZE
 
 # Configurando logging
 def setup_logging(log_level='INFO'):
@@ -69,10 +74,13 @@ def setup_logging(log_level='INFO'):
     return logging.getLogger(__name__)
 
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """
     Analisa os argumentos da linha de comando.
     
+    Args:
+        argv (list, optional): Argumentos a analisar; se None, usa sys.argv
+        
     Returns:
         argparse.Namespace: Argumentos analisados
     """
@@ -92,6 +100,25 @@ def parse_arguments():
         help='Número de meses para trás a serem considerados (default: 11)'
     )
     
+    parser.add_argument(
+        '--server-side-filter',
+        action='store_true',
+        help='Aplica o filtro de responsabilidade do farmer diretamente nas queries (requer --farmer-id)'
+    )
+    
+    parser.add_argument(
+        '--verify-server-side',
+        action='store_true',
+        help='Compara o filtro de responsabilidade no banco com o filtro em pandas e encerra (requer --farmer-id)'
+    )
+    
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'Linhas por bloco na extração em streaming; 0 extrai tudo em memória (default: {DEFAULT_CHUNK_SIZE})'
+    )
+    
     parser.add_argument(
         '--log-level',
         type=str,
@@ -100,10 +127,25 @@ def parse_arguments():
         help='Nível de logging (default: INFO)'
     )
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def process_receita_cliente(farmer_id, months_back, logger):
+def calcular_periodo(months_back):
+    """
+    Calcula as datas de início e fim do período de processamento.
+    
+    Args:
+        months_back (int): Número de meses para trás
+        
+    Returns:
+        tuple: (data_inicio, data_fim)
+    """
+    data_fim = datetime.now()
+    data_inicio = (data_fim - timedelta(days=30 * months_back)).replace(day=1)
+    return data_inicio, data_fim
+
+
+def process_receita_cliente(farmer_id, months_back, logger, server_side_filter=False):
     """
     Processa os dados de receita detalhados por cliente.
     
@@ -111,6 +153,7 @@ def process_receita_cliente(farmer_id, months_back, logger):
         farmer_id (int, optional): ID do farmer para filtrar
         months_back (int): Número de meses para trás
         logger (logging.Logger): Logger configurado
+        server_side_filter (bool): Aplica o filtro de responsabilidade nas queries
         
     Returns:
         pandas.DataFrame: DataFrame processado
@@ -118,15 +161,14 @@ def process_receita_cliente(farmer_id, months_back, logger):
     logger.info(f"Iniciando processamento de receita por cliente para farmer_id: {farmer_id if farmer_id else 'Todos'}")
     
     # Calculando datas de início e fim
-    data_fim = datetime.now()
-    data_inicio = (data_fim - timedelta(days=30 * months_back)).replace(day=1)
+    data_inicio, data_fim = calcular_periodo(months_back)
     
     logger.info(f"Período de processamento: {data_inicio.strftime('%Y-%m-%d')} a {data_fim.strftime('%Y-%m-%d')}")
     
     # Extração
-    df_positivador = extract_detalhamento_positivador(data_inicio, data_fim, farmer_id)
-    df_coe = extract_detalhamento_coe(data_inicio, data_fim, farmer_id)
-    df_op_estruturadas = extract_detalhamento_op_estruturadas(data_inicio, data_fim, farmer_id)
+    df_positivador = extract_detalhamento_positivador(data_inicio, data_fim, farmer_id, server_side_filter)
+    df_coe = extract_detalhamento_coe(data_inicio, data_fim, farmer_id, server_side_filter)
+    df_op_estruturadas = extract_detalhamento_op_estruturadas(data_inicio, data_fim, farmer_id, server_side_filter)
     
     # Transformação
     df_detalhamento = transform_detalhamento_cliente(df_positivador, df_coe, df_op_estruturadas)
@@ -139,6 +181,75 @@ def process_receita_cliente(farmer_id, months_back, logger):
     return df_final
 
 
+def stream_receita_cliente(farmer_id, months_back, logger, server_side_filter=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Prepara o processamento em blocos dos dados de receita detalhados por cliente.
+    
+    Nada é lido do banco até o iterador ser consumido (pela carga); a memória
+    usada fica limitada a um bloco de chunk_size linhas.
+    
+    Args:
+        farmer_id (int, optional): ID do farmer para filtrar
+        months_back (int): Número de meses para trás
+        logger (logging.Logger): Logger configurado
+        server_side_filter (bool): Aplica o filtro de responsabilidade nas queries
+        chunk_size (int): Linhas por bloco
+        
+    Returns:
+        tuple: ((data_inicio, data_fim), iterador de blocos transformados)
+    """
+    logger.info(f"Iniciando processamento em blocos de receita por cliente para farmer_id: {farmer_id if farmer_id else 'Todos'}")
+    
+    data_inicio, data_fim = calcular_periodo(months_back)
+    
+    logger.info(f"Período de processamento: {data_inicio.strftime('%Y-%m-%d')} a {data_fim.strftime('%Y-%m-%d')}")
+    
+    chunks = stream_detalhamento_cliente(data_inicio, data_fim, farmer_id, server_side_filter, chunk_size)
+    return (data_inicio, data_fim), transform_detalhamento_chunks(chunks)
+
+
+def verify_server_side_filter(farmer_id, months_back, logger):
+    """
+    Verifica se o filtro de responsabilidade no banco retorna os mesmos registros
+    que o filtro em pandas, para cada uma das extrações.
+    
+    Args:
+        farmer_id (int): ID do farmer
+        months_back (int): Número de meses para trás
+        logger (logging.Logger): Logger configurado
+        
+    Returns:
+        bool: True se os dois modos retornaram os mesmos registros
+    """
+    data_inicio, data_fim = calcular_periodo(months_back)
+    chave = ['tipo_operacao', 'data_operacao', 'client_id']
+    
+    extracoes = [
+        ('positivador', extract_detalhamento_positivador),
+        ('COE', extract_detalhamento_coe),
+        ('operações estruturadas', extract_detalhamento_op_estruturadas)
+    ]
+    
+    paridade = True
+    for nome, extrator in extracoes:
+        df_pandas = extrator(data_inicio, data_fim, farmer_id, server_side_filter=False)
+        df_banco = extrator(data_inicio, data_fim, farmer_id, server_side_filter=True)
+        
+        contagem_pandas = df_pandas.groupby(chave).size() if not df_pandas.empty else pd.Series(dtype='int64')
+        contagem_banco = df_banco.groupby(chave).size() if not df_banco.empty else pd.Series(dtype='int64')
+        diferencas = contagem_pandas.sub(contagem_banco, fill_value=0)
+        diferencas = diferencas[diferencas != 0]
+        
+        if diferencas.empty:
+            logger.info(f"Paridade OK para {nome}: {len(df_banco)} registros")
+        else:
+            paridade = False
+            logger.error(f"Divergência no filtro de {nome}: pandas={len(df_pandas)}, banco={len(df_banco)}, chaves divergentes={len(diferencas)}")
+            logger.debug(f"Chaves divergentes ({nome}):\n{diferencas.head(20)}")
+    
+    return paridade
+
+
 def main():
     """
     Função principal que coordena a execução do ETL.
@@ -149,15 +260,88 @@ def main():
     # Configurando logging
     logger = setup_logging(args.log_level)
     
+    exit_code = run(args, logger)
+    log_periods_cache_stats()
+    return exit_code
+
+
+def streams_extract(args):
+    """
+    Indica se a extração é feita em streaming (--chunk-size > 0).
+    
+    Em streaming, run_extract() apenas prepara o iterador de blocos e a leitura
+    acontece durante a carga; o orquestrador executa o KPI como uma única tarefa.
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        
+    Returns:
+        bool: True se run_extract() retorna um iterador de blocos
+    """
+    return args.chunk_size > 0
+
+
+def run_extract(args, logger):
+    """
+    Executa a extração e a transformação do ETL (etapa usada pelo agendador etl).
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
+        
+    Returns:
+        pandas.DataFrame or tuple: Dados transformados para run_load(); com
+            --chunk-size > 0, a tupla (período, iterador de blocos)
+    """
+    logger.info("Iniciando ETL do KPI de Receitas por Cliente")
+    logger.info(f"Parâmetros: farmer_id={args.farmer_id}, months_back={args.months_back}, chunk_size={args.chunk_size}")
+    
+    # Processamento de receita por cliente
+    if streams_extract(args):
+        return stream_receita_cliente(args.farmer_id, args.months_back, logger, args.server_side_filter, args.chunk_size)
+    return process_receita_cliente(args.farmer_id, args.months_back, logger, args.server_side_filter)
+
+
+def run_load(args, dados, logger):
+    """
+    Executa a carga do ETL a partir do resultado de run_extract().
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        dados (pandas.DataFrame or tuple): Resultado de run_extract()
+        logger (logging.Logger): Logger configurado
+        
+    Returns:
+        bool: True se o carregamento foi bem-sucedido
+    """
+    # Carregamento de dados (em blocos, o período define os registros substituídos)
+    if isinstance(dados, tuple):
+        periodo, chunks = dados
+        return load_receita_cliente(chunks, args.farmer_id, periodo=periodo)
+    return load_receita_cliente(dados, args.farmer_id)
+
+
+def run(args, logger):
+    """
+    Executa o ETL com os argumentos já analisados (usado também pelo orquestrador etl).
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
+        
+    Returns:
+        int: Código de saída (0 em caso de sucesso)
+    """
     try:
-        logger.info("Iniciando ETL do KPI de Receitas por Cliente")
-        logger.info(f"Parâmetros: farmer_id={args.farmer_id}, months_back={args.months_back}")
+        if (args.server_side_filter or args.verify_server_side) and not args.farmer_id:
+            logger.error("--server-side-filter e --verify-server-side exigem --farmer-id")
+            return 1
         
-        # Processamento de receita por cliente
-        df_receita_cliente = process_receita_cliente(args.farmer_id, args.months_back, logger)
+        if args.verify_server_side:
+            return 0 if verify_server_side_filter(args.farmer_id, args.months_back, logger) else 1
         
-        # Carregamento de dados
-        success = load_receita_cliente(df_receita_cliente, args.farmer_id)
+        df_receita_cliente = run_extract(args, logger)
+        success = run_load(args, df_receita_cliente, logger)
         
         if success:
             logger.info("ETL do KPI de Receitas por Cliente concluído com sucesso")
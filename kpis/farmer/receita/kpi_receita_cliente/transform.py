@@ -15,6 +15,58 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Valores monetários em centavos (Int64, ver utils.money): já exatos, sem arredondamento
+COLUNAS_MONETARIAS = [
+    'valor_financeiro', 'receita_bruta', 'comissao_bruta', 'comissao_liquida',
+    'churn', 'patrimony', 'net_capture'
+]
+
+def _add_colunas_mes(df):
+    """
+    Adiciona as colunas de mês ao detalhamento e preenche os valores numéricos nulos.
+    
+    Args:
+        df (pandas.DataFrame): Detalhamento por cliente (não vazio)
+        
+    Returns:
+        pandas.DataFrame: DataFrame com mes e mes_formatado
+    """
+    # Garantir que a coluna data_operacao é datetime
+    df['data_operacao'] = pd.to_datetime(df['data_operacao'])
+    
+    # Adiciona colunas de mês e mês formatado
+    df['mes'] = df['data_operacao'].dt.to_period('M').dt.to_timestamp()
+    df['mes_formatado'] = df['data_operacao'].dt.strftime('%m/%Y')
+    
+    # Nulos viram 0; apenas o percentual (float) é arredondado para 2 casas decimais
+    for col in COLUNAS_MONETARIAS:
+        if col in df.columns:
+            df[col] = df[col].fillna(0)
+    if 'percentual_comissao' in df.columns:
+        df['percentual_comissao'] = df['percentual_comissao'].fillna(0).round(2)
+    
+    return df
+
+def _finalizar_colunas(df):
+    """
+    Ajusta as datas e o timestamp de atualização do dataset final.
+    
+    Args:
+        df (pandas.DataFrame): Detalhamento por cliente (não vazio)
+        
+    Returns:
+        pandas.DataFrame: DataFrame pronto para a carga (sem ordenação)
+    """
+    # Garantir que as colunas de data não tenham timezone
+    for col in ['data_operacao', 'mes']:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col].astype(str).str.split(' ').str[0])
+    
+    # Adicionando timestamp da atualização
+    df['updated_at'] = datetime.now()
+    
+    return df
+
 def transform_detalhamento_cliente(df_positivador, df_coe, df_op_estruturadas):
     """
     Transforma e combina os dados detalhados por cliente.
@@ -59,24 +111,7 @@ def transform_detalhamento_cliente(df_positivador, df_coe, df_op_estruturadas):
             ])
         
         # Concatena todos os DataFrames
-        df_combinado = pd.concat(dfs, ignore_index=True)
-        
-        # Garantir que a coluna data_operacao é datetime
-        df_combinado['data_operacao'] = pd.to_datetime(df_combinado['data_operacao'])
-        
-        # Adiciona colunas de mês e mês formatado
-        df_combinado['mes'] = df_combinado['data_operacao'].dt.to_period('M').dt.to_timestamp()
-        df_combinado['mes_formatado'] = df_combinado['data_operacao'].dt.strftime('%m/%Y')
-        
-        # Arredonda valores numéricos para 2 casas decimais
-        colunas_numericas = [
-            'valor_financeiro', 'percentual_comissao', 'receita_bruta', 
-            'comissao_bruta', 'comissao_liquida', 'churn', 'patrimony', 'net_capture'
-        ]
-        
-        for col in colunas_numericas:
-            if col in df_combinado.columns:
-                df_combinado[col] = df_combinado[col].fillna(0).round(2)
+        df_combinado = _add_colunas_mes(pd.concat(dfs, ignore_index=True))
         
         logger.info(f"Transformação concluída. Total de registros: {len(df_combinado)}")
         
@@ -103,31 +138,48 @@ def prepare_final_dataset(df):
             logger.warning("DataFrame final está vazio")
             return df
         
-        # Garantindo que todas as colunas numéricas tenham valores ou 0
-        colunas_numericas = [
-            'valor_financeiro', 'percentual_comissao', 'receita_bruta', 
-            'comissao_bruta', 'comissao_liquida', 'churn', 'patrimony', 'net_capture'
-        ]
-        
-        for col in colunas_numericas:
-            if col in df.columns:
-                df[col] = df[col].fillna(0).round(2)
+        df = _finalizar_colunas(df)
         
-        # Garantir que as colunas de data não tenham timezone
-        for col in ['data_operacao', 'mes']:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col].astype(str).str.split(' ').str[0])
-        
-        # Ordenando o DataFrame
+        # Ordenação apenas para quem consome o DataFrame; a tabela não depende da
+        # ordem de inserção (as leituras usam ORDER BY) e a carga em blocos
+        # (transform_detalhamento_chunks) não a aplica
         df = df.sort_values(by=['data_operacao', 'tipo_operacao', 'nome_cliente'], ascending=[False, True, True])
         
-        # Adicionando timestamp da atualização
-        df['updated_at'] = datetime.now()
-        
         logger.info("Preparação do dataset final concluída com sucesso")
         
         return df
     
     except Exception as e:
         logger.error(f"Erro ao preparar dataset final: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def transform_detalhamento_chunks(chunks):
+    """
+    Transforma e prepara para a carga os blocos do detalhamento por cliente.
+    
+    Equivalente a transform_detalhamento_cliente seguido de prepare_final_dataset,
+    aplicado bloco a bloco para manter a memória limitada ao tamanho do bloco,
+    com uma diferença: os blocos não são ordenados por (data_operacao,
+    tipo_operacao, nome_cliente), pois a ordenação exigiria o dataset inteiro em
+    memória. Os registros carregados são os mesmos; apenas a ordem física de
+    inserção em analysis.receita_cliente difere.
+    
+    Args:
+        chunks (iterable): Blocos (pandas.DataFrame) de stream_detalhamento_cliente
+        
+    Yields:
+        pandas.DataFrame: Blocos prontos para load_receita_cliente
+    """
+    registros = 0
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        try:
+            chunk = _finalizar_colunas(_add_colunas_mes(chunk))
+        except Exception as e:
+            logger.error(f"Erro ao transformar bloco do detalhamento por cliente: {str(e)}")
+            raise
+        registros += len(chunk)
+        yield chunk
+    
+    logger.info(f"Transformação em blocos concluída. Total de registros: {registros}")
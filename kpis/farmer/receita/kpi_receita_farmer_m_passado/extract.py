@@ -20,60 +20,83 @@ sys.path.append(BASE_DIR)
 
 from utils.db_connection import get_connection
 from utils.client_responsibility import filter_data_by_responsibility
+from utils.sql_fragments import past_months_predicate, months_predicate
+from utils.typed_fetch import fetch_dataframe
+from utils.fact_client_month import ensure_fact_client_month, month_list
 
 logger = logging.getLogger(__name__)
 
-def extract_meses_anteriores(farmer_id=None, months_back=11):
+# Tipos aplicados na leitura (ver utils.typed_fetch); valores monetários em centavos
+MESES_ANTERIORES_SCHEMA = {
+    'mes': 'datetime64[ns]',
+    'farmer_id': 'int32',
+    'employee_name': 'category',
+    'receita_bruta': 'cents',
+    'receita_liquida': 'cents',
+    'comissao_bruta': 'cents',
+    'comissao_liquida': 'cents',
+}
+
+def extract_meses_anteriores(farmer_id=None, months_back=11, meses=None):
     """
     Extrai dados de receita e comissão para meses anteriores.
     
     Args:
         farmer_id (int, optional): ID do farmer para filtrar. Se None, traz todos.
         months_back (int): Quantidade de meses para trás a serem considerados
+        meses (list, optional): Restringe a extração a estes meses (modo incremental)
         
     Returns:
         pandas.DataFrame: DataFrame com os dados de receita e comissão dos meses anteriores
     """
+    conn = None
     try:
+        # Meses anteriores ao atual; no modo incremental, apenas os meses informados
+        inicio_mes_atual = datetime.now().replace(day=1)
+        if meses is None:
+            meses_fato = month_list(pd.Timestamp(inicio_mes_atual) - pd.DateOffset(months=months_back),
+                                    inicio_mes_atual - timedelta(days=1))
+        else:
+            meses_fato = meses
+        ensure_fact_client_month(meses_fato)
+        
         conn = get_connection()
         logger.info(f"Extraindo dados de meses anteriores para farmer_id: {farmer_id if farmer_id else 'Todos'}")
         
+        # Agregado por farmer da tabela fato (fonte revenue_records_historical)
         query = """
         SELECT 
-            DATE_TRUNC('month', record_date) AS mes,
-            CAST(c.farmer_id AS INTEGER) AS farmer_id,
+            f.mes::timestamp AS mes,
+            f.farmer_id,
             e.name AS employee_name,
-            SUM(gross_revenue) AS receita_bruta,
-            SUM(net_revenue) AS receita_liquida,
-            SUM(gross_commission) AS comissao_bruta,
-            SUM(gross_commission * (1 - 0.195)) AS comissao_liquida
-        FROM gammadata.revenue_records_historical rrh
-        JOIN gammadata.clients c ON rrh.client_id = c.client_id
-        JOIN gammadata.employees e ON CAST(c.farmer_id AS INTEGER) = e.employee_id
-        WHERE 
-            record_date >= DATE_TRUNC('month', NOW()) - INTERVAL '%s months'
-            AND DATE_TRUNC('month', record_date) < DATE_TRUNC('month', NOW())
+            SUM(f.receita_bruta) AS receita_bruta,
+            SUM(f.receita_liquida) AS receita_liquida,
+            SUM(f.comissao_bruta) AS comissao_bruta,
+            SUM(f.comissao_liquida) AS comissao_liquida
+        FROM analysis.fact_client_month f
+        JOIN gammadata.employees e ON f.farmer_id = e.employee_id
+        WHERE f.fonte = 'revenue_records'
         """
         
-        params = [months_back]
+        # Intervalo semiaberto sobre o mês (permite range scan no índice)
+        periodo_sql, params = past_months_predicate('f.mes', months_back)
+        query += " AND " + periodo_sql
         
         if farmer_id:
-            query += " AND CAST(c.farmer_id AS INTEGER) = %s"
+            query += " AND f.farmer_id = %s"
             params.append(farmer_id)
             
-        query += " GROUP BY DATE_TRUNC('month', record_date), c.farmer_id, e.name"
+        if meses is not None:
+            meses_sql, meses_params = months_predicate('f.mes', meses)
+            query += " AND " + meses_sql
+            params += meses_params
+            
+        query += " GROUP BY f.mes, f.farmer_id, e.name"
         
-        df = pd.read_sql(query, conn, params=params)
+        # Colunas já tipadas na leitura (mes como datetime64)
+        df = fetch_dataframe(conn, query, params, MESES_ANTERIORES_SCHEMA)
         
-        # Converter colunas de data para datetime
         if not df.empty:
-            df['mes'] = pd.to_datetime(df['mes'])
-            
-            # Converter colunas numéricas
-            for col in ['farmer_id', 'receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                    
             # Aplicar filtro de responsabilidade se necessário
             if farmer_id:
                 # Defina o período para filtrar a responsabilidade
@@ -10,16 +10,29 @@ import pandas as pd
 from datetime import datetime
 from utils.db_connection import DatabaseConnection
 from utils.db_schema_farmer.db_schema_receita import create_receita_farmer_m_passado_table  # Corrigido aqui
+from utils.bulk_load import merge_dataframe
+from utils.month_partitions import swap_month_partitions, ensure_month_partitions, month_partitions
 
 logger = logging.getLogger(__name__)
 
-def load_receita_farmer_m_passado(df_meses_anteriores, farmer_id=None):
+RECEITA_FARMER_M_PASSADO_COLUMNS = [
+    'mes', 'mes_formatado', 'farmer_id', 'employee_name', 'receita_bruta', 'receita_liquida',
+    'comissao_bruta', 'comissao_liquida', 'fonte', 'created_at', 'updated_at'
+]
+
+RECEITA_NUMERIC_COLUMNS = ['receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']
+
+def load_receita_farmer_m_passado(df_meses_anteriores, farmer_id=None, load_mode='replace', meses=None):
     """
     Carrega os dados de receita e comissão na tabela de destino.
     
     Args:
         df_meses_anteriores (pandas.DataFrame): DataFrame com dados dos meses anteriores
         farmer_id (int, optional): ID do farmer para filtrar dados na carga
+        load_mode (str): 'replace' substitui as partições mensais do período; 'merge'
+            faz upsert pela chave única via tabela de staging e remove apenas as chaves ausentes
+        meses (list, optional): Restringe a carga a estes meses (modo incremental);
+            os demais meses da tabela não são alterados
         
     Returns:
         bool: True se o carregamento foi bem-sucedido, False caso contrário
@@ -27,8 +40,11 @@ def load_receita_farmer_m_passado(df_meses_anteriores, farmer_id=None):
     try:
         # Verificando se há dados para carregar
         if df_meses_anteriores.empty:
-            logger.warning("DataFrame vazio, nenhum dado para carregar")
-            return True
+            if not meses:
+                logger.warning("DataFrame vazio, nenhum dado para carregar")
+                return True
+            # Meses sem dados na fonte ainda precisam ser limpos na tabela
+            df_meses_anteriores = pd.DataFrame(columns=RECEITA_FARMER_M_PASSADO_COLUMNS)
         
         # Usando o gerenciador de contexto para uma única conexão
         with DatabaseConnection() as conn:
@@ -39,52 +55,77 @@ def load_receita_farmer_m_passado(df_meses_anteriores, farmer_id=None):
                 
             logger.info(f"Carregando dados de receita por farmer (meses anteriores) para farmer_id: {farmer_id if farmer_id else 'Todos'}")
             
+            # Se um farmer_id foi especificado para carga, filtra os dados
+            df_carga = df_meses_anteriores
+            if farmer_id:
+                df_carga = df_carga[df_carga['farmer_id'] == farmer_id]
+            
+            df_carga = df_carga.copy()
+            if 'mes_formatado' not in df_carga.columns:
+                df_carga['mes_formatado'] = df_carga['mes'].dt.strftime('%m/%Y')
+            for col in ['farmer_id', 'employee_name']:
+                if col not in df_carga.columns:
+                    df_carga[col] = None
+            for col in RECEITA_NUMERIC_COLUMNS:
+                if col not in df_carga.columns:
+                    df_carga[col] = 0
+            df_carga['fonte'] = 'historical'  # Fonte dos dados
+            df_carga['created_at'] = datetime.now()
+            df_carga['updated_at'] = datetime.now()
+            
+            # Escopo das linhas sincronizadas pelo merge: farmer e/ou meses reprocessados
+            filtros, params = [], []
+            if farmer_id:
+                filtros.append('farmer_id = %s')
+                params.append(farmer_id)
+            if meses is not None:
+                filtros.append('mes = ANY(%s::date[])')
+                params.append([mes.date() for mes in pd.to_datetime(meses)])
+            scope_sql = ' AND '.join(filtros) or None
+            
             with conn.cursor() as cursor:
-                # Apaga os registros existentes
-                if farmer_id:
-                    cursor.execute("""
-                    DELETE FROM analysis.receita_farmer_m_passado 
-                    WHERE farmer_id = %s
-                    """, (farmer_id,))
+                if load_mode == 'merge':
+                    # O merge escreve direto na tabela: as partições dos meses precisam existir
+                    ensure_month_partitions(cursor, 'analysis.receita_farmer_m_passado', df_carga['mes'].dropna())
+                    
+                    # Upsert por (mes, fonte, farmer_id), removendo apenas chaves que sumiram
+                    upserted_count, deleted_count = merge_dataframe(
+                        cursor,
+                        df_carga,
+                        'analysis.receita_farmer_m_passado',
+                        RECEITA_FARMER_M_PASSADO_COLUMNS,
+                        key_columns=['mes', 'fonte', 'farmer_id'],
+                        defaults={col: 0 for col in RECEITA_NUMERIC_COLUMNS},
+                        cents_columns=RECEITA_NUMERIC_COLUMNS,
+                        scope_sql=scope_sql,
+                        scope_params=tuple(params) if params else None
+                    )
+                    logger.info(f"Registros inseridos/atualizados: {upserted_count}, removidos: {deleted_count}")
                 else:
-                    cursor.execute("DELETE FROM analysis.receita_farmer_m_passado")
+                    # Meses substituídos: os reprocessados ou, na carga completa, todos os
+                    # meses dos dados e os já existentes na tabela
+                    meses_carga = meses
+                    if meses_carga is None:
+                        meses_carga = set(month_partitions(cursor, 'analysis.receita_farmer_m_passado'))
+                        meses_carga |= set(pd.to_datetime(df_carga['mes']).dt.date)
                     
-                # Contando quantos registros foram deletados
-                deleted_count = cursor.rowcount
-                logger.info(f"Registros deletados: {deleted_count}")
-                
-                # Preparando os dados dos meses anteriores
-                data_to_insert = []
-                for _, row in df_meses_anteriores.iterrows():
-                    # Se um farmer_id foi especificado para carga, filtra os dados
-                    if farmer_id and row['farmer_id'] != farmer_id:
-                        continue
-                        
-                    data_to_insert.append((
-                        row['mes'],
-                        row['mes_formatado'] if 'mes_formatado' in row else row['mes'].strftime('%m/%Y'),
-                        row['farmer_id'] if 'farmer_id' in row else None,
-                        row['employee_name'] if 'employee_name' in row else None,
-                        row['receita_bruta'] if 'receita_bruta' in row and pd.notna(row['receita_bruta']) else 0,
-                        row['receita_liquida'] if 'receita_liquida' in row and pd.notna(row['receita_liquida']) else 0,
-                        row['comissao_bruta'] if 'comissao_bruta' in row and pd.notna(row['comissao_bruta']) else 0,
-                        row['comissao_liquida'] if 'comissao_liquida' in row and pd.notna(row['comissao_liquida']) else 0,
-                        'historical',  # Fonte dos dados
-                        datetime.now(),
-                        datetime.now()
-                    ))
-                
-                # Executando a inserção em massa
-                if data_to_insert:
-                    cursor.executemany("""
-                    INSERT INTO analysis.receita_farmer_m_passado
-                    (mes, mes_formatado, farmer_id, employee_name, receita_bruta, receita_liquida, comissao_bruta, comissao_liquida, fonte, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, data_to_insert)
+                    # Troca das partições; com farmer_id, os registros dos demais farmers
+                    # são preservados. Valores nulos de receita/comissão viram 0
+                    inserted_count, replaced_count = swap_month_partitions(
+                        cursor,
+                        [df_carga],
+                        'analysis.receita_farmer_m_passado',
+                        RECEITA_FARMER_M_PASSADO_COLUMNS,
+                        meses_carga,
+                        keep_sql='farmer_id IS DISTINCT FROM %s' if farmer_id else None,
+                        keep_params=(farmer_id,) if farmer_id else None,
+                        defaults={col: 0 for col in RECEITA_NUMERIC_COLUMNS},
+                        cents_columns=RECEITA_NUMERIC_COLUMNS
+                    )
                     
-                    # Contando quantos registros foram inseridos
-                    inserted_count = len(data_to_insert)
-                    logger.info(f"Registros históricos inseridos: {inserted_count}")
+                    logger.info(f"Registros das partições substituídas: {replaced_count}")
+                    if inserted_count:
+                        logger.info(f"Registros históricos inseridos: {inserted_count}")
             
         logger.info("Carregamento de dados de receita por farmer (meses anteriores) concluído com sucesso")
         return True
@@ -24,6 +24,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from extract import extract_meses_anteriores
 from transform import transform_meses_anteriores
 from load import load_receita_farmer_m_passado
+from utils.etl_state import get_revenue_watermarks, get_months_to_process, save_watermarks
+from utils.client_responsibility import log_periods_cache_stats
+
+# Nome do KPI na tabela de estado do ETL
+KPI_NAME = 'receita_farmer_m_passado'
 
 # Configurando logging
 def setup_logging(log_level='INFO'):
@@ -54,10 +59,13 @@ def setup_logging(log_level='INFO'):
     
     return logging.getLogger(__name__)
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """
     Analisa os argumentos da linha de comando.
     
+    Args:
+        argv (list, optional): Argumentos a analisar; se None, usa sys.argv
+        
     Returns:
         argparse.Namespace: Argumentos analisados
     """
@@ -77,6 +85,20 @@ def parse_arguments():
         help='Número de meses para trás a serem considerados (default: 11)'
     )
     
+    parser.add_argument(
+        '--load-mode',
+        type=str,
+        choices=['replace', 'merge'],
+        default='replace',
+        help="Modo de carga: 'replace' apaga e reinsere, 'merge' faz upsert via staging (default: replace)"
+    )
+    
+    parser.add_argument(
+        '--full-refresh',
+        action='store_true',
+        help='Reprocessa todos os meses da janela, ignorando o estado incremental'
+    )
+    
     parser.add_argument(
         '--log-level',
         type=str,
@@ -85,9 +107,9 @@ def parse_arguments():
         help='Nível de logging (default: INFO)'
     )
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
-def process_receita_farmer_m_passado(farmer_id, months_back, logger):
+def process_receita_farmer_m_passado(farmer_id, months_back, logger, meses=None):
     """
     Processa os dados de receita e comissão por farmer para meses anteriores.
     
@@ -95,6 +117,7 @@ def process_receita_farmer_m_passado(farmer_id, months_back, logger):
         farmer_id (int, optional): ID do farmer para filtrar
         months_back (int): Número de meses para trás
         logger (logging.Logger): Logger configurado
+        meses (list, optional): Restringe o processamento a estes meses
         
     Returns:
         pandas.DataFrame: DataFrame processado
@@ -102,7 +125,7 @@ def process_receita_farmer_m_passado(farmer_id, months_back, logger):
     logger.info(f"Iniciando processamento de receita por farmer (meses anteriores) para farmer_id: {farmer_id if farmer_id else 'Todos'}")
     
     # Extração
-    df_meses_anteriores = extract_meses_anteriores(farmer_id, months_back)
+    df_meses_anteriores = extract_meses_anteriores(farmer_id, months_back, meses)
     
     # Transformação
     df_meses_anteriores_transformado = transform_meses_anteriores(df_meses_anteriores)
@@ -121,17 +144,84 @@ def main():
     # Configurando logging
     logger = setup_logging(args.log_level)
     
-    try:
-        logger.info("Iniciando ETL do KPI de Receitas dos meses anteriores")
-        logger.info(f"Parâmetros: farmer_id={args.farmer_id}, months_back={args.months_back}")
+    exit_code = run(args, logger)
+    log_periods_cache_stats()
+    return exit_code
+
+def run_extract(args, logger):
+    """
+    Executa a extração e a transformação do ETL (etapa usada pelo agendador etl).
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
         
-        # Processamento de receita/comissão
+    Returns:
+        dict or None: Dados para run_load(); None se não há mês a reprocessar
+    """
+    logger.info("Iniciando ETL do KPI de Receitas dos meses anteriores")
+    logger.info(f"Parâmetros: farmer_id={args.farmer_id}, months_back={args.months_back}, full_refresh={args.full_refresh}")
+    
+    # O estado incremental vale para a carga completa; execuções por farmer não o usam nem o atualizam
+    usa_estado = args.farmer_id is None
+    watermarks = get_revenue_watermarks(args.months_back) if usa_estado else None
+    meses_processar, meses_carga = None, None
+    
+    if usa_estado and not args.full_refresh:
+        meses_alterados, meses_fora_janela = get_months_to_process(KPI_NAME, watermarks)
+        if not meses_alterados and not meses_fora_janela:
+            logger.info("Nenhum mês com alteração na fonte desde a última execução. Nada a reprocessar")
+            return None
+        meses_processar = meses_alterados
+        meses_carga = meses_alterados + meses_fora_janela
+    
+    # Processamento de receita/comissão
+    if meses_processar == []:
+        df_meses_anteriores_transformado = pd.DataFrame()
+    else:
         df_meses_anteriores_transformado = process_receita_farmer_m_passado(
-            args.farmer_id, args.months_back, logger
+            args.farmer_id, args.months_back, logger, meses_processar
         )
+    
+    return {'df': df_meses_anteriores_transformado, 'meses_carga': meses_carga, 'watermarks': watermarks}
+
+def run_load(args, dados, logger):
+    """
+    Executa a carga do ETL a partir do resultado de run_extract().
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        dados (dict or None): Resultado de run_extract()
+        logger (logging.Logger): Logger configurado
         
-        # Carregamento de dados
-        success = load_receita_farmer_m_passado(df_meses_anteriores_transformado, args.farmer_id)
+    Returns:
+        bool: True se o carregamento foi bem-sucedido
+    """
+    if dados is None:
+        return True
+    
+    # Carregamento de dados
+    success = load_receita_farmer_m_passado(dados['df'], args.farmer_id, args.load_mode, dados['meses_carga'])
+    
+    if success and dados['watermarks'] is not None:
+        save_watermarks(KPI_NAME, dados['watermarks'])
+    
+    return success
+
+def run(args, logger):
+    """
+    Executa o ETL com os argumentos já analisados (usado também pelo orquestrador etl).
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
+        
+    Returns:
+        int: Código de saída (0 em caso de sucesso)
+    """
+    try:
+        dados = run_extract(args, logger)
+        success = run_load(args, dados, logger)
         
         if success:
             logger.info("ETL do KPI de Receitas dos meses anteriores concluído com sucesso")
@@ -38,15 +38,7 @@ def transform_meses_anteriores(df_meses_anteriores):
         if 'mes' in df_meses_anteriores.columns:
             df_meses_anteriores['mes'] = pd.to_datetime(df_meses_anteriores['mes'])
         
-        # Convertendo valores para numéricos se necessário
-        for col in ['farmer_id', 'receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
-            if col in df_meses_anteriores.columns:
-                df_meses_anteriores[col] = pd.to_numeric(df_meses_anteriores[col], errors='coerce')
-        
-        # Arredondando valores para 2 casas decimais
-        for col in ['receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
-            if col in df_meses_anteriores.columns:
-                df_meses_anteriores[col] = df_meses_anteriores[col].round(2)
+        # Valores já chegam tipados da extração (monetários em centavos, sem arredondamento)
         
         # Adicionando coluna de mês formatada (MM/YYYY)
         df_meses_anteriores['mes_formatado'] = df_meses_anteriores['mes'].dt.strftime('%m/%Y')
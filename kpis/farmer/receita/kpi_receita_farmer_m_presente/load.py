@@ -10,21 +10,39 @@ import pandas as pd
 from datetime import datetime
 from utils.db_connection import DatabaseConnection
 from utils.db_schema_farmer.db_schema_receita import create_receita_farmer_m_presente_table
+from utils.bulk_load import copy_dataframe, merge_dataframe
 
 logger = logging.getLogger(__name__)
 
-def load_receita_farmer_m_presente(df, farmer_id=None):
+RECEITA_FARMER_M_PRESENTE_COLUMNS = [
+    'mes', 'mes_formatado', 'receita_bruta', 'comissao_bruta', 'comissao_liquida',
+    'fonte', 'created_at', 'updated_at'
+]
+
+# Colunas monetárias em centavos (utils.money)
+RECEITA_MONEY_COLUMNS = ['receita_bruta', 'comissao_bruta', 'comissao_liquida']
+
+def load_receita_farmer_m_presente(df, farmer_id=None, load_mode='replace'):
     """
     Carrega os dados de receita e comissão na tabela de destino.
     
     Args:
         df (pandas.DataFrame): DataFrame com dados do mês atual
-        farmer_id (int, optional): ID do farmer para filtrar dados na carga
+        farmer_id (int, optional): Não suportado: a tabela não possui farmer_id e sua
+            chave é (mes, fonte), de modo que uma carga por farmer sobrescreveria o total
+        load_mode (str): 'replace' apaga e reinsere o período; 'merge' faz upsert pela
+            chave única via tabela de staging e remove apenas as chaves ausentes
         
     Returns:
         bool: True se o carregamento foi bem-sucedido, False caso contrário
     """
     try:
+        # A tabela guarda apenas o total do mês por fonte
+        if farmer_id:
+            logger.error(f"Carga por farmer_id ({farmer_id}) não suportada: analysis.receita_farmer_m_presente "
+                         "não possui farmer_id e guarda apenas o total por (mes, fonte)")
+            return False
+
         # Verificando se há dados para carregar
         if df.empty:
             logger.warning("DataFrame vazio, nenhum dado para carregar")
@@ -37,47 +55,45 @@ def load_receita_farmer_m_presente(df, farmer_id=None):
                 logger.error("Falha ao criar/verificar tabela de receita por farmer (mês atual)")
                 return False
 
-            logger.info(f"Carregando dados de receita por farmer (mês atual) para farmer_id: {farmer_id if farmer_id else 'Todos'}")
+            logger.info("Carregando dados de receita por farmer (mês atual)")
+
+            df_carga = df.assign(
+                fonte='historical',  # Fonte dos dados
+                created_at=datetime.now(),
+                updated_at=datetime.now()
+            )
 
             with conn.cursor() as cursor:
-                # Apaga os registros existentes
-                if farmer_id:
-                    cursor.execute("""
-                    DELETE FROM analysis.receita_farmer_m_presente 
-                    WHERE farmer_id = %s
-                    """, (farmer_id,))
+                if load_mode == 'merge':
+                    # Upsert por (mes, fonte), removendo apenas chaves que sumiram
+                    upserted_count, deleted_count = merge_dataframe(
+                        cursor,
+                        df_carga,
+                        'analysis.receita_farmer_m_presente',
+                        RECEITA_FARMER_M_PRESENTE_COLUMNS,
+                        key_columns=['mes', 'fonte'],
+                        cents_columns=RECEITA_MONEY_COLUMNS
+                    )
+                    logger.info(f"Registros inseridos/atualizados: {upserted_count}, removidos: {deleted_count}")
                 else:
+                    # Apaga os registros existentes
                     cursor.execute("DELETE FROM analysis.receita_farmer_m_presente")
 
-                # Contando quantos registros foram deletados
-                deleted_count = cursor.rowcount
-                logger.info(f"Registros deletados: {deleted_count}")
-
-                # Preparando os dados para inserção
-                data_to_insert = []
-                for _, row in df.iterrows():
-                    data_to_insert.append((
-                        row['mes'],
-                        row['mes_formatado'],
-                        row['receita_bruta'],
-                        row['comissao_bruta'],
-                        row['comissao_liquida'],
-                        'historical',  # Fonte dos dados
-                        datetime.now(),
-                        datetime.now()
-                    ))
-
-                # Executando a inserção em massa
-                if data_to_insert:
-                    cursor.executemany("""
-                    INSERT INTO analysis.receita_farmer_m_presente
-                    (mes, mes_formatado, receita_bruta, comissao_bruta, comissao_liquida, fonte, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """, data_to_insert)
-
-                    # Contando quantos registros foram inseridos
-                    inserted_count = len(data_to_insert)
-                    logger.info(f"Registros históricos inseridos: {inserted_count}")
+                    # Contando quantos registros foram deletados
+                    deleted_count = cursor.rowcount
+                    logger.info(f"Registros deletados: {deleted_count}")
+
+                    # Carga em massa via COPY
+                    inserted_count = copy_dataframe(
+                        cursor,
+                        df_carga,
+                        'analysis.receita_farmer_m_presente',
+                        RECEITA_FARMER_M_PRESENTE_COLUMNS,
+                        cents_columns=RECEITA_MONEY_COLUMNS
+                    )
+
+                    if inserted_count:
+                        logger.info(f"Registros históricos inseridos: {inserted_count}")
 
         logger.info("Carregamento de dados de receita por farmer (mês atual) concluído com sucesso")
         return True
@@ -54,10 +54,13 @@ def setup_logging(log_level='INFO'):
 
     return logging.getLogger(__name__)
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """
     Analisa os argumentos da linha de comando.
     
+    Args:
+        argv (list, optional): Argumentos a analisar; se None, usa sys.argv
+        
     Returns:
         argparse.Namespace: Argumentos analisados
     """
@@ -70,6 +73,14 @@ def parse_arguments():
         help='ID do farmer para filtrar (default: None - processa todos)'
     )
     
+    parser.add_argument(
+        '--load-mode',
+        type=str,
+        choices=['replace', 'merge'],
+        default='replace',
+        help="Modo de carga: 'replace' apaga e reinsere, 'merge' faz upsert via staging (default: replace)"
+    )
+    
     parser.add_argument(
         '--log-level',
         type=str,
@@ -78,7 +89,7 @@ def parse_arguments():
         help='Nível de logging (default: INFO)'
     )
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 def process_receita_farmer_m_presente(farmer_id, logger):
     """
@@ -113,17 +124,54 @@ def main():
     # Configurando logging
     logger = setup_logging(args.log_level)
 
-    try:
-        logger.info("Iniciando ETL do KPI de Receitas do mês atual")
-        logger.info(f"Parâmetros: farmer_id={args.farmer_id}")
+    return run(args, logger)
+
+def run_extract(args, logger):
+    """
+    Executa a extração e a transformação do ETL (etapa usada pelo agendador etl).
+
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
+    
+    Returns:
+        pandas.DataFrame: Dados transformados para run_load()
+    """
+    logger.info("Iniciando ETL do KPI de Receitas do mês atual")
+    logger.info(f"Parâmetros: farmer_id={args.farmer_id}")
 
-        # Processamento de receita/comissão
-        df_receita_mes_atual_transformado = process_receita_farmer_m_presente(
-            args.farmer_id, logger
-        )
+    # Processamento de receita/comissão
+    return process_receita_farmer_m_presente(args.farmer_id, logger)
 
-        # Carregamento de dados
-        success = load_receita_farmer_m_presente(df_receita_mes_atual_transformado, args.farmer_id)
+def run_load(args, dados, logger):
+    """
+    Executa a carga do ETL a partir do resultado de run_extract().
+
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        dados (pandas.DataFrame): Resultado de run_extract()
+        logger (logging.Logger): Logger configurado
+    
+    Returns:
+        bool: True se o carregamento foi bem-sucedido
+    """
+    # Carregamento de dados
+    return load_receita_farmer_m_presente(dados, args.farmer_id, args.load_mode)
+
+def run(args, logger):
+    """
+    Executa o ETL com os argumentos já analisados (usado também pelo orquestrador etl).
+
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
+    
+    Returns:
+        int: Código de saída (0 em caso de sucesso)
+    """
+    try:
+        df_receita_mes_atual_transformado = run_extract(args, logger)
+        success = run_load(args, df_receita_mes_atual_transformado, logger)
 
         if success:
             logger.info("ETL do KPI de Receitas do mês atual concluído com sucesso")
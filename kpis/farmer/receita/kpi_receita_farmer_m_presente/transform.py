@@ -32,10 +32,7 @@ def transform_receita_mes_atual(df):
         if 'mes' in df.columns:
             df['mes'] = pd.to_datetime(df['mes'])
 
-        # Arredondando valores para 2 casas decimais
-        for col in ['receita_bruta', 'comissao_bruta', 'comissao_liquida']:
-            if col in df.columns:
-                df[col] = df[col].round(2)
+        # Valores monetários já chegam em centavos da extração (sem arredondamento)
 
         # Adicionando coluna de mês formatada (MM/YYYY)
         df['mes_formatado'] = df['mes'].dt.strftime('%m/%Y')
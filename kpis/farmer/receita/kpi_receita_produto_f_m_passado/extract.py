@@ -21,16 +21,31 @@ sys.path.append(root_dir)
 
 from utils.db_connection import get_connection
 from utils.client_responsibility import filter_data_by_responsibility
+from utils.sql_fragments import past_months_predicate, months_predicate
+from utils.typed_fetch import fetch_dataframe
 
 logger = logging.getLogger(__name__)
 
-def extract_meses_anteriores(farmer_id=None, months_back=11):
+# Tipos aplicados na leitura (ver utils.typed_fetch); valores monetários em centavos
+MESES_ANTERIORES_SCHEMA = {
+    'category': 'category',
+    'product': 'category',
+    'farmer_id': 'int32',
+    'employee_name': 'category',
+    'receita_bruta': 'cents',
+    'receita_liquida': 'cents',
+    'comissao_bruta': 'cents',
+    'comissao_liquida': 'cents',
+}
+
+def extract_meses_anteriores(farmer_id=None, months_back=11, meses=None):
     """
     Extrai dados de receita e comissão por produto para meses anteriores.
     
     Args:
         farmer_id (int, optional): ID do farmer para filtrar. Se None, traz todos.
         months_back (int): Quantidade de meses para trás a serem considerados
+        meses (list, optional): Restringe a extração a estes meses (modo incremental)
         
     Returns:
         pandas.DataFrame: DataFrame com os dados de receita e comissão dos meses anteriores
@@ -39,14 +54,11 @@ def extract_meses_anteriores(farmer_id=None, months_back=11):
         conn = get_connection()
         logger.info(f"Extraindo dados de meses anteriores para farmer_id: {farmer_id if farmer_id else 'Todos'}")
         
-        # Converter months_back para string para evitar problemas de tipo
-        months_back_str = str(months_back)
-        
-        query = f"""
+        query = """
         SELECT 
             DATE_TRUNC('month', record_date) AS mes,
-            category,
-            product,
+            COALESCE(category, 'OUTROS') AS category,
+            COALESCE(product, 'OUTROS') AS product,
             CAST(c.farmer_id AS INTEGER) AS farmer_id,
             e.name AS employee_name,
             SUM(gross_revenue) AS receita_bruta,
@@ -56,14 +68,21 @@ def extract_meses_anteriores(farmer_id=None, months_back=11):
         FROM gammadata.revenue_records_historical rrh
         JOIN gammadata.clients c ON rrh.client_id = c.client_id
         JOIN gammadata.employees e ON CAST(c.farmer_id AS INTEGER) = e.employee_id
-        WHERE 
-            record_date >= DATE_TRUNC('month', NOW()) - INTERVAL '{months_back_str} months'
-            AND DATE_TRUNC('month', record_date) < DATE_TRUNC('month', NOW())
         """
         
+        # Intervalo semiaberto sobre record_date (permite range scan no índice)
+        periodo_sql, params = past_months_predicate('record_date', months_back)
+        query += " WHERE " + periodo_sql
+        
         # Adiciona filtro de farmer_id se fornecido
         if farmer_id:
-            query += f" AND CAST(c.farmer_id AS INTEGER) = {farmer_id}"
+            query += " AND CAST(c.farmer_id AS INTEGER) = %s"
+            params.append(farmer_id)
+            
+        if meses is not None:
+            meses_sql, meses_params = months_predicate('record_date', meses)
+            query += " AND " + meses_sql
+            params += meses_params
             
         query += """
         GROUP BY 
@@ -74,22 +93,12 @@ def extract_meses_anteriores(farmer_id=None, months_back=11):
             e.name
         """
         
-        # Executando a consulta sem parâmetros separados
-        df = pd.read_sql(query, conn)
+        # Executando a consulta
+        # Colunas já tipadas na leitura (mes como datetime64; category e product
+        # sem NULL, preenchidos com 'OUTROS' na query)
+        df = fetch_dataframe(conn, query, params, MESES_ANTERIORES_SCHEMA)
         
-        # Converter colunas de data para datetime
         if not df.empty:
-            df['mes'] = pd.to_datetime(df['mes'])
-            
-            # Garantir que as colunas 'category' e 'product' não tenham valores NULL
-            df['category'] = df['category'].fillna('OUTROS')
-            df['product'] = df['product'].fillna('OUTROS')
-            
-            # Converter colunas numéricas
-            for col in ['farmer_id', 'receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                    
             # Aplicar filtro de responsabilidade se necessário
             if farmer_id:
                 # Defina o período para filtrar a responsabilidade
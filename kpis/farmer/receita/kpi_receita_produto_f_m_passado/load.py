@@ -19,24 +19,37 @@ sys.path.append(root_dir)
 
 from utils.db_connection import DatabaseConnection
 from utils.db_schema_farmer.db_schema_receita import create_receita_produto_f_m_passado_table
+from utils.bulk_load import copy_dataframe, merge_dataframe
 
 logger = logging.getLogger(__name__)
 
-def load_receita_produto(df_historico, farmer_id=None):
+RECEITA_PRODUTO_COLUMNS = [
+    'mes', 'mes_formatado', 'product', 'category', 'farmer_id', 'employee_name',
+    'fonte', 'created_at', 'updated_at'
+]
+
+def load_receita_produto(df_historico, farmer_id=None, load_mode='replace', meses=None):
     """
     Carrega os dados transformados dos meses passados na tabela de destino.
     
     Args:
         df_historico (pandas.DataFrame): Dados dos meses passados.
         farmer_id (int, opcional): ID do farmer para filtrar.
+        load_mode (str): 'replace' apaga e reinsere o período; 'merge' faz upsert pela
+            chave única via tabela de staging e remove apenas as chaves ausentes
+        meses (list, opcional): Restringe a carga a estes meses (modo incremental);
+            os demais meses da tabela não são alterados.
         
     Returns:
         bool: True se o carregamento foi bem-sucedido, False caso contrário.
     """
     try:
         if df_historico.empty:
-            logger.warning("DataFrame vazio, nenhum dado para carregar")
-            return True
+            if not meses:
+                logger.warning("DataFrame vazio, nenhum dado para carregar")
+                return True
+            # Meses sem dados na fonte ainda precisam ser limpos na tabela
+            df_historico = pd.DataFrame(columns=RECEITA_PRODUTO_COLUMNS)
         
         df_historico = df_historico.copy()
         # Preenche valores nulos para as colunas 'product' e 'category'
@@ -50,42 +63,65 @@ def load_receita_produto(df_historico, farmer_id=None):
                 return False
                 
             logger.info(f"Carregando dados para farmer_id: {farmer_id if farmer_id else 'Todos'}")
+            df_carga = df_historico
+            if farmer_id:
+                df_carga = df_carga[df_carga['farmer_id'] == farmer_id]
+            
+            if 'mes_formatado' not in df_carga.columns:
+                df_carga = df_carga.assign(mes_formatado=df_carga['mes'].dt.strftime('%m/%Y'))
+            for col in ['farmer_id', 'employee_name']:
+                if col not in df_carga.columns:
+                    df_carga = df_carga.assign(**{col: None})
+            df_carga = df_carga.assign(
+                fonte='historical',  # Fonte dos dados
+                created_at=datetime.now(),
+                updated_at=datetime.now()
+            )
+            
+            # Escopo das linhas substituídas: farmer e/ou meses reprocessados
+            filtros, params = [], []
+            if farmer_id:
+                filtros.append('farmer_id = %s')
+                params.append(farmer_id)
+            if meses is not None:
+                filtros.append('mes = ANY(%s::date[])')
+                params.append([mes.date() for mes in pd.to_datetime(meses)])
+            scope_sql = ' AND '.join(filtros) or None
+            
             with conn.cursor() as cursor:
-                if farmer_id:
-                    cursor.execute("""
-                    DELETE FROM analysis.receita_produto_f_m_passado 
-                    WHERE farmer_id = %s
-                    """, (farmer_id,))
+                if load_mode == 'merge':
+                    # Upsert por (mes, category, product, farmer_id), removendo apenas chaves que sumiram
+                    upserted_count, deleted_count = merge_dataframe(
+                        cursor,
+                        df_carga,
+                        'analysis.receita_produto_f_m_passado',
+                        RECEITA_PRODUTO_COLUMNS,
+                        key_columns=['mes', 'category', 'product', 'farmer_id'],
+                        defaults={'product': 'OUTROS', 'category': 'OUTROS'},
+                        scope_sql=scope_sql,
+                        scope_params=tuple(params) if params else None
+                    )
+                    logger.info(f"Registros inseridos/atualizados: {upserted_count}, removidos: {deleted_count}")
                 else:
-                    cursor.execute("DELETE FROM analysis.receita_produto_f_m_passado")
+                    if scope_sql:
+                        cursor.execute(f"""
+                        DELETE FROM analysis.receita_produto_f_m_passado 
+                        WHERE {scope_sql}
+                        """, tuple(params))
+                    else:
+                        cursor.execute("DELETE FROM analysis.receita_produto_f_m_passado")
+                        
+                    logger.info(f"Registros deletados: {cursor.rowcount}")
                     
-                logger.info(f"Registros deletados: {cursor.rowcount}")
-                
-                data_to_insert = []
-                for _, row in df_historico.iterrows():
-                    if farmer_id and row['farmer_id'] != farmer_id:
-                        continue
-                    product = row['product'] if pd.notna(row['product']) else 'OUTROS'
-                    category = row['category'] if pd.notna(row['category']) else 'OUTROS'
-                    data_to_insert.append((
-                        row['mes'],
-                        row['mes_formatado'] if 'mes_formatado' in row else row['mes'].strftime('%m/%Y'),
-                        product,
-                        category,
-                        row['farmer_id'] if 'farmer_id' in row and pd.notna(row['farmer_id']) else None,
-                        row['employee_name'] if 'employee_name' in row and pd.notna(row['employee_name']) else None,
-                        'historical',  # Fonte dos dados
-                        datetime.now(),
-                        datetime.now()
-                    ))
-                
-                if data_to_insert:
-                    cursor.executemany("""
-                    INSERT INTO analysis.receita_produto_f_m_passado
-                    (mes, mes_formatado, product, category, farmer_id, employee_name, fonte, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, data_to_insert)
-                    logger.info(f"Registros históricos inseridos: {len(data_to_insert)}")
+                    inserted_count = copy_dataframe(
+                        cursor,
+                        df_carga,
+                        'analysis.receita_produto_f_m_passado',
+                        RECEITA_PRODUTO_COLUMNS,
+                        defaults={'product': 'OUTROS', 'category': 'OUTROS'}
+                    )
+                    if inserted_count:
+                        logger.info(f"Registros históricos inseridos: {inserted_count}")
                     
         logger.info("Carregamento concluído com sucesso")
         return True
@@ -22,6 +22,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from extract import extract_meses_anteriores
 from transform import transform_meses_anteriores, prepare_final_dataset
 from load import load_receita_produto
+from utils.etl_state import get_revenue_watermarks, get_months_to_process, save_watermarks
+from utils.client_responsibility import log_periods_cache_stats
+
+# Nome do KPI na tabela de estado do ETL
+KPI_NAME = 'receita_produto_f_m_passado'
 
 def setup_logging(log_level='INFO'):
     """
@@ -42,7 +47,7 @@ def setup_logging(log_level='INFO'):
     )
     return logging.getLogger(__name__)
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """
     Analisa os argumentos da linha de comando.
     """
@@ -60,6 +65,18 @@ def parse_arguments():
         default=1,
         help='Número de meses para trás (default: 1 para o mês passado)'
     )
+    parser.add_argument(
+        '--load-mode',
+        type=str,
+        choices=['replace', 'merge'],
+        default='replace',
+        help="Modo de carga: 'replace' apaga e reinsere, 'merge' faz upsert via staging (default: replace)"
+    )
+    parser.add_argument(
+        '--full-refresh',
+        action='store_true',
+        help='Reprocessa todos os meses da janela, ignorando o estado incremental'
+    )
     parser.add_argument(
         '--log-level',
         type=str,
@@ -67,14 +84,14 @@ def parse_arguments():
         default='INFO',
         help='Nível de logging (default: INFO)'
     )
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
-def process_receita_produto(farmer_id, months_back, logger):
+def process_receita_produto(farmer_id, months_back, logger, meses=None):
     """
-    Processa os dados dos meses passados.
+    Processa os dados dos meses passados (opcionalmente apenas os meses informados).
     """
     logger.info(f"Iniciando processamento para farmer_id: {farmer_id if farmer_id else 'Todos'}")
-    df_extracao = extract_meses_anteriores(farmer_id, months_back)
+    df_extracao = extract_meses_anteriores(farmer_id, months_back, meses)
     df_transformado = transform_meses_anteriores(df_extracao)
     df_final = prepare_final_dataset(df_transformado)
     logger.info(f"Processamento concluído. Total registros: {len(df_final)}")
@@ -87,12 +104,77 @@ def main():
     args = parse_arguments()
     logger = setup_logging(args.log_level)
     
-    try:
-        logger.info("Iniciando ETL do KPI de Receitas por Produto - Meses Passados")
-        logger.info(f"Parâmetros: farmer_id={args.farmer_id}, months_back={args.months_back}")
+    exit_code = run(args, logger)
+    log_periods_cache_stats()
+    return exit_code
+
+def run_extract(args, logger):
+    """
+    Executa a extração e a transformação do ETL (etapa usada pelo agendador etl).
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
+        
+    Returns:
+        dict or None: Dados para run_load(); None se não há mês a reprocessar
+    """
+    logger.info("Iniciando ETL do KPI de Receitas por Produto - Meses Passados")
+    logger.info(f"Parâmetros: farmer_id={args.farmer_id}, months_back={args.months_back}, full_refresh={args.full_refresh}")
+    
+    # O estado incremental vale para a carga completa; execuções por farmer não o usam nem o atualizam
+    usa_estado = args.farmer_id is None
+    watermarks = get_revenue_watermarks(args.months_back) if usa_estado else None
+    meses_processar, meses_carga = None, None
+    
+    if usa_estado and not args.full_refresh:
+        meses_alterados, meses_fora_janela = get_months_to_process(KPI_NAME, watermarks)
+        if not meses_alterados and not meses_fora_janela:
+            logger.info("Nenhum mês com alteração na fonte desde a última execução. Nada a reprocessar")
+            return None
+        meses_processar = meses_alterados
+        meses_carga = meses_alterados + meses_fora_janela
+    
+    if meses_processar == []:
+        df_final = pd.DataFrame()
+    else:
+        df_final = process_receita_produto(args.farmer_id, args.months_back, logger, meses_processar)
+    return {'df': df_final, 'meses_carga': meses_carga, 'watermarks': watermarks}
+
+def run_load(args, dados, logger):
+    """
+    Executa a carga do ETL a partir do resultado de run_extract().
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        dados (dict or None): Resultado de run_extract()
+        logger (logging.Logger): Logger configurado
         
-        df_final = process_receita_produto(args.farmer_id, args.months_back, logger)
-        success = load_receita_produto(df_final, args.farmer_id)
+    Returns:
+        bool: True se o carregamento foi bem-sucedido
+    """
+    if dados is None:
+        return True
+    
+    success = load_receita_produto(dados['df'], args.farmer_id, args.load_mode, dados['meses_carga'])
+    if success and dados['watermarks'] is not None:
+        save_watermarks(KPI_NAME, dados['watermarks'])
+    return success
+
+def run(args, logger):
+    """
+    Executa o ETL com os argumentos já analisados (usado também pelo orquestrador etl).
+    
+    Args:
+        args (argparse.Namespace): Argumentos retornados por parse_arguments()
+        logger (logging.Logger): Logger configurado
+        
+    Returns:
+        int: Código de saída (0 em caso de sucesso)
+    """
+    try:
+        dados = run_extract(args, logger)
+        success = run_load(args, dados, logger)
         
         if success:
             logger.info("ETL concluído com sucesso")
@@ -49,12 +49,7 @@ def transform_meses_anteriores(df_meses_anteriores):
         else:
             df['categoria'] = df.get('categoria', 'OUTROS')
         
-        # Converte valores numéricos e arredonda
-        for col in ['farmer_id', 'receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                if col in ['receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
-                    df[col] = df[col].round(2)
+        # Valores já chegam tipados da extração (monetários em centavos, sem arredondamento)
         
         # Cria coluna com o mês formatado (MM/YYYY)
         df['mes_formatado'] = df['mes'].dt.strftime('%m/%Y')
@@ -91,7 +86,7 @@ def prepare_final_dataset(df):
         
         for col in ['receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida']:
             if col in df_copy.columns:
-                df_copy[col] = pd.to_numeric(df_copy[col], errors='coerce').fillna(0).round(2)
+                df_copy[col] = df_copy[col].fillna(0)
         
         if 'mes' in df_copy.columns:
             # Converte removendo o timezone
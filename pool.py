@@ -1,18 +1,10 @@
-import os
-import psycopg2
-from dotenv import load_dotenv
+import logging
+from utils.db_connection import get_connection, get_pool_stats
 
-# Carrega as variáveis do .env
-load_dotenv()
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 try:
-    conn = psycopg2.connect(
-        dbname=os.environ.get("DB_NAME"),
-        user=os.environ.get("DB_USER"),
-        password=os.environ.get("DB_PASSWORD"),
-        host=os.environ.get("DB_HOST"),
-        port=os.environ.get("DB_PORT")
-    )
+    conn = get_connection()
     cur = conn.cursor()
     cur.execute("""
         SELECT pid, usename, client_addr, backend_start, state, query
@@ -22,5 +14,9 @@ try:
         print(row)
     cur.close()
     conn.close()
+
+    # Estatísticas do pool de conexões deste processo
+    for key, value in get_pool_stats().items():
+        print(f"{key}: {value}")
 except Exception as e:
     print("Erro ao consultar pg_stat_activity:", e)
@@ -1,76 +1,37 @@
 # run_etl.ps1
+# Wrapper para o orquestrador em Python (python -m etl run), que executa os KPIs
+# em um único processo. Em Linux, use diretamente: python -m etl run --kpi all
 param (
     [string]$FarmerId,
     [int]$MonthsBack = 11,
     [string]$LogLevel = "INFO",
-    [string]$Kpi = "all"  # "all", "receita_farmer", "receita_cliente", "receita_produto", "comissao_farmer", "fechamento_passado", "fechamento_atual"
+    [switch]$FullRefresh,
+    [int]$Workers = 1,
+    [string]$Kpi = "all"  # "all", "receita_farmer_m_passado", "receita_farmer_m_presente", "receita_cliente", "receita_produto_f_m_passado", "fechamento_farmer_m_passado", "fechamento_farmer_m_presente"
 )
 
-$cmdReceitaFarmerMPassado = "python kpis\farmer\receita\kpi_receita_farmer_m_passado\main.py --log-level $LogLevel"
-$cmdReceitaFarmerMPresente = "python kpis\farmer\receita\kpi_receita_farmer_m_presente\main.py --log-level $LogLevel"
-$cmdReceitaCliente = "python kpis\farmer\receita\kpi_receita_cliente\main.py --log-level $LogLevel"
-$cmdReceitaProdutoFMPassado = "python kpis\farmer\receita\kpi_receita_produto_f_m_passado\main.py --log-level $LogLevel"
-$cmdFechamentoFarmerMPassado = "python kpis\farmer\comissao\kpi_fechamento_m_passado\main.py --log-level $LogLevel"
-$cmdFechamentoFarmerMPresente = "python kpis\farmer\comissao\kpi_fechamento_m_presente\main.py --log-level $LogLevel"
+$cmdEtl = "python -m etl run --kpi $Kpi --log-level $LogLevel --workers $Workers"
 
 if ($FarmerId) {
-    $cmdReceitaFarmerMPassado += " --farmer-id $FarmerId"
-    $cmdReceitaFarmerMPresente += " --farmer-id $FarmerId"
-    $cmdReceitaCliente += " --farmer-id $FarmerId"
-    $cmdReceitaProdutoFMPassado += " --farmer-id $FarmerId"
-    $cmdFechamentoFarmerMPassado += " --farmer-id $FarmerId"
-    $cmdFechamentoFarmerMPresente += " --farmer-id $FarmerId"
+    $cmdEtl += " --farmer-id $FarmerId"
 }
 
 if ($MonthsBack) {
-    # Não adicionar --months-back para o ETL do mês atual
-    $cmdReceitaFarmerMPassado += " --months-back $MonthsBack"
-    $cmdReceitaCliente += " --months-back $MonthsBack"
-    $cmdReceitaProdutoFMPassado += " --months-back $MonthsBack"
-    $cmdFechamentoFarmerMPassado += " --months-back $MonthsBack"
-    # Não adicionar --months-back para o ETL do mês atual
+    # Repassado apenas aos ETLs de meses anteriores pelo orquestrador
+    $cmdEtl += " --months-back $MonthsBack"
 }
 
-if ($Kpi -eq "receita_farmer_m_passado") {
-    Write-Host "Executando ETL de Receitas por Farmer (Meses Anteriores): $cmdReceitaFarmerMPassado"
-    Invoke-Expression $cmdReceitaFarmerMPassado
+if ($FullRefresh) {
+    # Ignora o estado incremental dos ETLs de meses anteriores
+    $cmdEtl += " --full-refresh"
 }
-elseif ($Kpi -eq "receita_farmer_m_presente") {
-    Write-Host "Executando ETL de Receita por Farmer (Mês Atual): $cmdReceitaFarmerMPresente"
-    Invoke-Expression $cmdReceitaFarmerMPresente
-}
-elseif ($Kpi -eq "receita_cliente") {
-    Write-Host "Executando ETL de Receita por Cliente: $cmdReceitaCliente"
-    Invoke-Expression $cmdReceitaCliente
-}
-elseif ($Kpi -eq "receita_produto_f_m_passado") {
-    Write-Host "Executando ETL de Receita por Produto (Meses Anteriores): $cmdReceitaProdutoFMPassado"
-    Invoke-Expression $cmdReceitaProdutoFMPassado
-}
-elseif ($Kpi -eq "fechamento_farmer_m_passado") {
-    Write-Host "Executando ETL de Comissão por Farmer (Mês Passado): $cmdFechamentoFarmerMPassado"
-    Invoke-Expression $cmdFechamentoFarmerMPassado
+
+Write-Host "Executando ETLs: $cmdEtl"
+Push-Location $PSScriptRoot
+try {
+    Invoke-Expression $cmdEtl
 }
-elseif ($Kpi -eq "fechamento_farmer_m_presente") {
-    Write-Host "Executando ETL de Comissão por Farmer (Mês Atual): $cmdFechamentoFarmerMPresente"
-    Invoke-Expression $cmdFechamentoFarmerMPresente
+finally {
+    Pop-Location
 }
-else {
-    Write-Host "Executando ETL de Receitas M PASSADO por Farmer: $cmdReceitaFarmerMPassado"
-    Invoke-Expression $cmdReceitaFarmerMPassado
-
-    Write-Host "`nExecutando ETL de Receita M PRESENTE por Farmer: $cmdReceitaFarmerMPresente"
-    Invoke-Expression $cmdReceitaFarmerMPresente
-    
-    Write-Host "`nExecutando ETL de Receita por Cliente: $cmdReceitaCliente"
-    Invoke-Expression $cmdReceitaCliente
-    
-    Write-Host "`nExecutando ETL de Receita por Produto (Meses Anteriores): $cmdReceitaProdutoFMPassado"
-    Invoke-Expression $cmdReceitaProdutoFMPassado
-    
-    Write-Host "`nExecutando ETL de Comissão M PASSADO por Farmer: $cmdFechamentoFarmerMPassado"
-    Invoke-Expression $cmdFechamentoFarmerMPassado
-    
-    Write-Host "`nExecutando ETL de Comissão M PRESENTE por Farmer: $cmdFechamentoFarmerMPresente"
-    Invoke-Expression $cmdFechamentoFarmerMPresente
-}
\ No newline at end of file
+exit $LASTEXITCODE
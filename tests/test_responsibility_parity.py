@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Paridade entre o filtro de responsabilidade no banco e o filtro em pandas.
+
+O predicado de responsibility_filter_sql (usado pelas extrações com
+--server-side-filter) é executado num SQLite em memória, com o schema analysis
+anexado, sobre os mesmos períodos usados para construir o ResponsibilityIndex
+de filter_data_by_responsibility. Os dois filtros devem manter exatamente os
+mesmos registros.
+
+Uso: python -m unittest discover -s tests
+"""
+
+import os
+import sqlite3
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+# Caminho absoluto para o diretório raiz do projeto
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from utils.client_responsibility import (
+    ResponsibilityIndex,
+    filter_data_by_responsibility,
+    responsibility_filter_sql
+)
+
+# Períodos com fronteiras, períodos em aberto, início nulo e sobreposição entre farmers
+PERIODOS = pd.DataFrame([
+    (1, 10, '2024-01-01', '2024-03-15', 'Farmer 10'),
+    (1, 20, '2024-03-15', None, 'Farmer 20'),
+    (2, 10, '2024-02-01', None, 'Farmer 10'),
+    (3, 20, None, '2024-05-01', 'Farmer 20'),
+    (4, 10, '2024-01-01', '2024-06-01', 'Farmer 10'),
+    (4, 20, '2024-03-01', None, 'Farmer 20'),
+    (5, 30, '2024-04-10', '2024-04-11', 'Farmer 30'),
+], columns=['client_id', 'farmer_id', 'start_date', 'end_date', 'farmer_name'])
+
+REGISTROS = pd.DataFrame([
+    (1, '2023-12-31'), (1, '2024-01-01'), (1, '2024-03-14'), (1, '2024-03-15'), (1, '2024-12-31'),
+    (2, '2024-01-31'), (2, '2024-02-01'), (2, '2025-06-30'),
+    (3, '2024-01-15'), (3, '2024-04-30'),
+    (4, '2024-02-15'), (4, '2024-03-01'), (4, '2024-05-31'), (4, '2024-06-01'),
+    (5, '2024-04-09'), (5, '2024-04-10'), (5, '2024-04-11'),
+    (9, '2024-03-01'),
+    (1, None),
+], columns=['client_id', 'data'])
+
+FARMERS = [10, 20, 30, 99]
+
+def _random_fixture(seed, n_clients=200, n_rows=5000):
+    """
+    Gera períodos encadeados (com trocas de farmer) e registros aleatórios.
+    """
+    rng = np.random.default_rng(seed)
+    inicio = np.datetime64('2023-01-01')
+    periodos = []
+    for client_id in range(1, n_clients + 1):
+        data = inicio + rng.integers(0, 365)
+        for _ in range(rng.integers(1, 4)):
+            fim = data + rng.integers(1, 200) if rng.random() < 0.7 else None
+            periodos.append((client_id, int(rng.integers(1, 6)), str(data), None if fim is None else str(fim), None))
+            if fim is None:
+                break
+            data = fim
+    registros = pd.DataFrame({
+        'client_id': rng.integers(1, n_clients + 20, n_rows),
+        'data': [str(inicio + d) for d in rng.integers(0, 900, n_rows)],
+    })
+    return pd.DataFrame(periodos, columns=PERIODOS.columns), registros
+
+def _server_side(periodos, registros, farmer_id):
+    """
+    Índices dos registros mantidos pelo predicado SQL de responsibility_filter_sql.
+    """
+    conn = sqlite3.connect(':memory:')
+    try:
+        conn.execute("ATTACH DATABASE ':memory:' AS analysis")
+        conn.execute("""
+        CREATE TABLE analysis.client_farmer_periods (
+            client_id INTEGER, farmer_id INTEGER, start_date TEXT, end_date TEXT
+        )""")
+        conn.executemany(
+            "INSERT INTO analysis.client_farmer_periods VALUES (?, ?, ?, ?)",
+            periodos[['client_id', 'farmer_id', 'start_date', 'end_date']].itertuples(index=False)
+        )
+        conn.execute("CREATE TABLE registros (id INTEGER, client_id INTEGER, data TEXT)")
+        conn.executemany(
+            "INSERT INTO registros VALUES (?, ?, ?)",
+            [(int(i), int(c), d) for i, c, d in registros[['client_id', 'data']].itertuples()]
+        )
+        predicado = responsibility_filter_sql('r.client_id', 'r.data').replace('%s', '?')
+        linhas = conn.execute(f"SELECT r.id FROM registros r WHERE {predicado}", (farmer_id,)).fetchall()
+        return sorted(i for (i,) in linhas)
+    finally:
+        conn.close()
+
+def _pandas(periodos, registros, farmer_id):
+    """
+    Índices dos registros mantidos por filter_data_by_responsibility.
+    """
+    index = ResponsibilityIndex(periodos.assign(
+        start_date=pd.to_datetime(periodos['start_date']),
+        end_date=pd.to_datetime(periodos['end_date'])
+    ))
+    df = registros.assign(data=pd.to_datetime(registros['data']))
+    return sorted(filter_data_by_responsibility(df, 'data', farmer_id, index=index).index)
+
+class ResponsibilityFilterParityTest(unittest.TestCase):
+    """
+    O filtro no banco (--server-side-filter) e o filtro em pandas mantêm os mesmos registros.
+    """
+
+    def test_fixture_bordas(self):
+        for farmer_id in FARMERS:
+            with self.subTest(farmer_id=farmer_id):
+                self.assertEqual(_server_side(PERIODOS, REGISTROS, farmer_id),
+                                 _pandas(PERIODOS, REGISTROS, farmer_id))
+
+    def test_fixture_bordas_resultado_esperado(self):
+        # Fim exclusivo, início inclusivo, início nulo nunca casa, sobreposição vale para ambos
+        self.assertEqual(_server_side(PERIODOS, REGISTROS, 10), [1, 2, 6, 7, 10, 11, 12])
+        self.assertEqual(_server_side(PERIODOS, REGISTROS, 20), [3, 4, 11, 12, 13])
+        self.assertEqual(_server_side(PERIODOS, REGISTROS, 30), [15])
+
+    def test_fixture_aleatoria(self):
+        periodos, registros = _random_fixture(seed=7)
+        for farmer_id in range(1, 7):
+            with self.subTest(farmer_id=farmer_id):
+                esperado = _server_side(periodos, registros, farmer_id)
+                self.assertEqual(esperado, _pandas(periodos, registros, farmer_id))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo para carga em massa de DataFrames no banco de dados via COPY.
+
+Os dados são serializados em CSV num buffer em memória e enviados com
+COPY ... FROM STDIN, em uma única operação por tabela, em vez de um
+INSERT por linha.
+"""
+
+import io
+import logging
+import numpy as np
+import pandas as pd
+from utils.money import format_cents
+
+logger = logging.getLogger(__name__)
+
+# Marcador de NULL usado no CSV enviado ao COPY
+NULL_MARKER = '\\N'
+
+def _format_array(value):
+    """
+    Formata uma lista/tupla como literal de array do PostgreSQL.
+
+    Args:
+        value (list or tuple): Valores do array
+
+    Returns:
+        str: Literal no formato {a,b,c}
+    """
+    if value is None or (not isinstance(value, (list, tuple, np.ndarray)) and pd.isna(value)):
+        return None
+    itens = []
+    for item in value:
+        if item is None or (not isinstance(item, str) and pd.isna(item)):
+            itens.append('NULL')
+        elif hasattr(item, 'isoformat'):
+            itens.append(item.isoformat())
+        else:
+            itens.append('"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"')
+    return '{' + ','.join(itens) + '}'
+
+def _prepare_column(series):
+    """
+    Ajusta uma coluna para serialização em CSV compatível com o PostgreSQL.
+
+    Floats com valores inteiros são gravados sem casa decimal (válido tanto para
+    colunas INTEGER quanto NUMERIC) e listas viram literais de array.
+
+    Args:
+        series (pandas.Series): Coluna a ajustar
+
+    Returns:
+        pandas.Series: Coluna ajustada
+    """
+    if pd.api.types.is_float_dtype(series.dtype):
+        valores = series.dropna()
+        if valores.empty or (np.isfinite(valores).all() and (valores % 1 == 0).all()):
+            return series.astype('Int64')
+        # NaN/inf não são aceitos em colunas NUMERIC(15,2): gravados como NULL
+        return series.replace([np.inf, -np.inf], np.nan)
+
+    if series.dtype == object:
+        amostra = series.dropna()
+        if not amostra.empty and isinstance(amostra.iloc[0], (list, tuple, np.ndarray)):
+            return series.map(_format_array)
+
+    return series
+
+def copy_dataframe(cursor, df, table, columns, defaults=None, cents_columns=()):
+    """
+    Carrega um DataFrame em uma tabela usando COPY ... FROM STDIN.
+
+    Args:
+        cursor (psycopg2.cursor): Cursor da conexão (a transação é controlada pelo chamador)
+        df (pandas.DataFrame): Dados a carregar; deve conter todas as colunas de columns
+        table (str): Tabela de destino, com schema (ex.: 'analysis.receita_cliente')
+        columns (list): Colunas de destino, na ordem em que serão enviadas
+        defaults (dict, optional): Valor usado no lugar de nulos/NaN por coluna;
+            colunas ausentes do dicionário recebem NULL
+        cents_columns (iterable, optional): Colunas monetárias em centavos (utils.money),
+            enviadas como texto com 2 casas
+
+    Returns:
+        int: Quantidade de registros enviados
+    """
+    if df.empty:
+        return 0
+
+    defaults = defaults or {}
+    dados = pd.DataFrame(index=df.index)
+    for col in columns:
+        serie = df[col]
+        if col in defaults:
+            serie = serie.where(pd.notna(serie), defaults[col])
+            if serie.dtype == object:
+                serie = serie.infer_objects()
+        if col in cents_columns:
+            dados[col] = format_cents(serie)
+            continue
+        dados[col] = _prepare_column(serie)
+
+    buffer = io.StringIO()
+    dados.to_csv(buffer, index=False, header=False, na_rep=NULL_MARKER, date_format='%Y-%m-%d %H:%M:%S.%f')
+    buffer.seek(0)
+
+    colunas_sql = ', '.join(columns)
+    cursor.copy_expert(
+        f"COPY {table} ({colunas_sql}) FROM STDIN WITH (FORMAT csv, NULL '{NULL_MARKER}')",
+        buffer
+    )
+
+    logger.debug(f"COPY concluído em {table}: {len(dados)} registros")
+    return len(dados)
+
+def merge_dataframe(cursor, df, table, columns, key_columns, defaults=None,
+                    scope_sql=None, scope_params=None, immutable_columns=('created_at',),
+                    cents_columns=()):
+    """
+    Sincroniza uma tabela com um DataFrame via tabela de staging, sem apagar e reinserir tudo.
+
+    Os dados são carregados por COPY numa tabela temporária e aplicados com
+    INSERT ... ON CONFLICT (key_columns) DO UPDATE; linhas cujo conteúdo não
+    mudou não são reescritas. Em seguida, são removidas apenas as chaves do
+    escopo que não vieram no DataFrame.
+
+    Args:
+        cursor (psycopg2.cursor): Cursor da conexão (a transação é controlada pelo chamador)
+        df (pandas.DataFrame): Dados a carregar
+        table (str): Tabela de destino, com schema; deve ter UNIQUE em key_columns
+        columns (list): Colunas de destino
+        key_columns (list): Colunas da chave única usada no ON CONFLICT
+        defaults (dict, optional): Valor usado no lugar de nulos/NaN por coluna
+        scope_sql (str, optional): Predicado que delimita as linhas da tabela cobertas pela
+            carga (ex.: 'farmer_id = %s'); se None, a tabela inteira
+        scope_params (tuple, optional): Parâmetros de scope_sql
+        immutable_columns (tuple): Colunas preservadas em linhas já existentes
+        cents_columns (iterable, optional): Colunas monetárias em centavos (ver copy_dataframe)
+
+    Returns:
+        tuple: (registros inseridos/atualizados, registros removidos)
+    """
+    staging = 'stg_' + table.split('.')[-1]
+    colunas_sql = ', '.join(columns)
+
+    cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+    cursor.execute(f"""
+    CREATE TEMP TABLE {staging} ON COMMIT DROP AS
+    SELECT {colunas_sql} FROM {table} WITH NO DATA
+    """)
+    copy_dataframe(cursor, df, staging, columns, defaults, cents_columns)
+
+    # Só atualiza quando algum valor de negócio mudou (updated_at/created_at não contam)
+    ignoradas = set(key_columns) | set(immutable_columns) | {'updated_at'}
+    comparadas = [col for col in columns if col not in ignoradas]
+    atualizadas = [col for col in columns if col not in set(key_columns) | set(immutable_columns)]
+
+    set_sql = ', '.join(f"{col} = EXCLUDED.{col}" for col in atualizadas)
+    where_sql = ''
+    if comparadas:
+        alvo = ', '.join(f"t.{col}" for col in comparadas)
+        novo = ', '.join(f"EXCLUDED.{col}" for col in comparadas)
+        where_sql = f"WHERE ({alvo}) IS DISTINCT FROM ({novo})"
+
+    cursor.execute(f"""
+    INSERT INTO {table} AS t ({colunas_sql})
+    SELECT {colunas_sql} FROM {staging}
+    ON CONFLICT ({', '.join(key_columns)}) DO UPDATE
+    SET {set_sql}
+    {where_sql}
+    """)
+    upserted = cursor.rowcount
+
+    chave_sql = ' AND '.join(f"s.{col} IS NOT DISTINCT FROM t.{col}" for col in key_columns)
+    cursor.execute(f"""
+    DELETE FROM {table} t
+    WHERE {scope_sql or 'TRUE'}
+    AND NOT EXISTS (SELECT 1 FROM {staging} s WHERE {chave_sql})
+    """, scope_params)
+    deleted = cursor.rowcount
+
+    cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+
+    logger.debug(f"Merge concluído em {table}: {upserted} inseridos/atualizados, {deleted} removidos")
+    return upserted, deleted
@@ -10,30 +10,50 @@ de clientes entre farmers.
 """
 
 import logging
+import threading
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from utils.db_connection import get_connection
+from utils.db_schema_main import create_schema_if_not_exists
+from utils.typed_fetch import fetch_dataframe
+from utils.periods_disk_cache import (
+    disk_cache_enabled,
+    get_periods_fingerprint,
+    load_cached_periods,
+    save_cached_periods
+)
 
 logger = logging.getLogger(__name__)
 
-def get_client_farmer_periods(start_date=None, end_date=None):
+# Sentinela para datas ausentes: início nulo nunca casa, fim nulo é período em aberto
+_MAX_INT64 = np.iinfo(np.int64).max
+
+def _dates_to_int64(values):
     """
-    Obtém os períodos em que cada farmer foi responsável por cada cliente.
+    Converte uma sequência de datas para inteiros int64 (nanossegundos).
+    
+    Datas com timezone são convertidas para o horário local sem timezone,
+    para serem comparáveis com as datas dos períodos.
     
     Args:
-        start_date (datetime, optional): Data inicial para filtrar os períodos
-        end_date (datetime, optional): Data final para filtrar os períodos
+        values (array-like): Datas a converter
         
     Returns:
-        pandas.DataFrame: DataFrame com os períodos de responsabilidade
+        tuple: (numpy.ndarray int64, numpy.ndarray bool indicando datas nulas)
     """
-    try:
-        conn = get_connection()
-        logger.info(f"Obtendo períodos de responsabilidade farmer-cliente (início: {start_date}, fim: {end_date})")
-        
-        query = """
+    dates = pd.to_datetime(pd.Series(values), errors='coerce')
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    dates = dates.astype('datetime64[ns]')
+    return dates.to_numpy().view('i8').copy(), dates.isna().to_numpy()
+
+# CTEs que derivam os períodos de responsabilidade farmer-cliente (all_periods)
+# a partir de clients e client_transfers. Usadas para (re)calcular a tabela
+# materializada analysis.client_farmer_periods.
+CLIENT_FARMER_PERIODS_CTES = """
         -- Clientes que nunca foram transferidos (mantém farmer original)
-        WITH client_original_farmers AS (
+        client_original_farmers AS (
             SELECT 
                 client_id,
                 CAST(farmer_id AS INTEGER) AS farmer_id,
@@ -77,14 +97,538 @@ def get_client_farmer_periods(start_date=None, end_date=None):
             UNION ALL
             SELECT * FROM client_transfer_periods_old
         )
-        -- Consulta final com filtros de data se fornecidos
+"""
+
+def responsibility_filter_sql(client_column, date_column):
+    """
+    Monta o predicado SQL que mantém apenas registros sob responsabilidade de um farmer.
+    
+    Lê os períodos de analysis.client_farmer_periods; chame ensure_client_farmer_periods()
+    antes de executar a consulta. O predicado equivale a filter_data_by_responsibility:
+    existe um período do farmer para o cliente com início <= data e (fim nulo ou data < fim).
+    
+    Args:
+        client_column (str): Expressão SQL com o client_id do registro
+        date_column (str): Expressão SQL com a data do registro
+        
+    Returns:
+        str: Predicado com um parâmetro (%s) para o farmer_id
+    """
+    return f"""EXISTS (
+            SELECT 1
+            FROM analysis.client_farmer_periods rp
+            WHERE rp.farmer_id = %s
+            AND rp.client_id = {client_column}
+            AND rp.start_date <= {date_column}
+            AND (rp.end_date IS NULL OR {date_column} < rp.end_date)
+        )"""
+
+# Atualização da tabela materializada feita no máximo uma vez por processo
+_periods_refresh_lock = threading.Lock()
+_periods_refreshed = False
+
+def create_client_farmer_periods_tables(conn=None):
+    """
+    Cria as tabelas analysis.client_farmer_periods e analysis.client_farmer_periods_state
+    se não existirem.
+    
+    A tabela de estado guarda, por cliente, uma assinatura dos dados de origem
+    (farmer e data de criação em clients e transferências em client_transfers),
+    usada para recalcular apenas os clientes alterados.
+    
+    Args:
+        conn (psycopg2.connection, optional): Conexão com o banco de dados
+        
+    Returns:
+        bool: True se operação foi bem sucedida
+    """
+    close_conn = False
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+        
+        create_schema_if_not_exists(conn, 'analysis')
+        
+        with conn.cursor() as cursor:
+            # Mesmos tipos de coluna da derivação a partir da origem
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis.client_farmer_periods AS
+            WITH """ + CLIENT_FARMER_PERIODS_CTES + """
+            SELECT client_id, farmer_id, start_date, end_date
+            FROM all_periods
+            WITH NO DATA;
+            
+            CREATE INDEX IF NOT EXISTS idx_client_farmer_periods_client
+                ON analysis.client_farmer_periods (client_id, start_date, end_date);
+            CREATE INDEX IF NOT EXISTS idx_client_farmer_periods_farmer
+                ON analysis.client_farmer_periods (farmer_id, client_id);
+            
+            CREATE TABLE IF NOT EXISTS analysis.client_farmer_periods_state AS
+            SELECT client_id, ''::text AS assinatura, CURRENT_TIMESTAMP AS refreshed_at
+            FROM gammadata.clients
+            WITH NO DATA;
+            
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_client_farmer_periods_state_client
+                ON analysis.client_farmer_periods_state (client_id);
+            """)
+        
+        if close_conn:
+            conn.commit()
+        return True
+    
+    except Exception as e:
+        logger.error(f"Erro ao verificar/criar tabelas de períodos de responsabilidade: {str(e)}")
+        if conn and close_conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn and close_conn:
+            conn.close()
+
+def refresh_client_farmer_periods(full_refresh=False):
+    """
+    Atualiza analysis.client_farmer_periods a partir de clients e client_transfers.
+    
+    Calcula a assinatura atual de cada cliente e recalcula os períodos apenas dos
+    clientes cuja assinatura mudou (novas transferências, mudança de farmer ou
+    cliente novo); clientes removidos da origem têm seus períodos apagados.
+    
+    Args:
+        full_refresh (bool): Se True, recalcula os períodos de todos os clientes
+        
+    Returns:
+        int: Quantidade de clientes recalculados
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        if not create_client_farmer_periods_tables(conn):
+            raise RuntimeError("Falha ao criar/verificar tabelas de períodos de responsabilidade")
+        
+        with conn.cursor() as cursor:
+            # Serializa atualizações concorrentes (outros processos ou KPIs em paralelo)
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('analysis.client_farmer_periods'))")
+            
+            if full_refresh:
+                cursor.execute("TRUNCATE analysis.client_farmer_periods, analysis.client_farmer_periods_state")
+            
+            cursor.execute("""
+            CREATE TEMP TABLE _cfp_assinaturas ON COMMIT DROP AS
+            WITH clientes AS (
+                SELECT client_id FROM gammadata.clients
+                UNION
+                SELECT client_id FROM gammadata.client_transfers WHERE transfer_type = 'FARMER'
+            ),
+            transferencias AS (
+                SELECT 
+                    client_id,
+                    STRING_AGG(
+                        CONCAT_WS(':', transfer_date, old_farmer_id, new_farmer_id), ','
+                        ORDER BY transfer_date, old_farmer_id, new_farmer_id
+                    ) AS transferencias
+                FROM gammadata.client_transfers
+                WHERE transfer_type = 'FARMER'
+                GROUP BY client_id
+            )
+            SELECT 
+                k.client_id,
+                MD5(CONCAT_WS('|', c.farmer_id, c.creation_date, t.transferencias)) AS assinatura
+            FROM clientes k
+            LEFT JOIN gammadata.clients c ON c.client_id = k.client_id
+            LEFT JOIN transferencias t ON t.client_id = k.client_id;
+            
+            CREATE TEMP TABLE _cfp_alterados ON COMMIT DROP AS
+            SELECT a.client_id
+            FROM _cfp_assinaturas a
+            LEFT JOIN analysis.client_farmer_periods_state s ON s.client_id = a.client_id
+            WHERE s.assinatura IS DISTINCT FROM a.assinatura
+            UNION ALL
+            SELECT s.client_id
+            FROM analysis.client_farmer_periods_state s
+            WHERE NOT EXISTS (SELECT 1 FROM _cfp_assinaturas a WHERE a.client_id = s.client_id);
+            """)
+            
+            cursor.execute("SELECT COUNT(*) FROM _cfp_alterados")
+            alterados = cursor.fetchone()[0]
+            
+            if alterados:
+                cursor.execute("""
+                DELETE FROM analysis.client_farmer_periods p
+                USING _cfp_alterados x
+                WHERE p.client_id = x.client_id;
+                
+                INSERT INTO analysis.client_farmer_periods (client_id, farmer_id, start_date, end_date)
+                WITH """ + CLIENT_FARMER_PERIODS_CTES + """
+                SELECT client_id, farmer_id, start_date, end_date
+                FROM all_periods
+                WHERE client_id IN (SELECT client_id FROM _cfp_alterados);
+                
+                DELETE FROM analysis.client_farmer_periods_state s
+                USING _cfp_alterados x
+                WHERE s.client_id = x.client_id;
+                
+                INSERT INTO analysis.client_farmer_periods_state (client_id, assinatura, refreshed_at)
+                SELECT a.client_id, a.assinatura, CURRENT_TIMESTAMP
+                FROM _cfp_assinaturas a
+                JOIN _cfp_alterados x ON x.client_id = a.client_id;
+                """)
+        
+        conn.commit()
+        logger.info(f"client_farmer_periods atualizado. Clientes recalculados: {alterados}")
+        return alterados
+    
+    except Exception as e:
+        logger.error(f"Erro ao atualizar client_farmer_periods: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+def ensure_client_farmer_periods():
+    """
+    Garante que analysis.client_farmer_periods está atualizada antes de uma consulta.
+    
+    A atualização incremental é feita apenas na primeira chamada do processo; as
+    demais aguardam a primeira e retornam em seguida.
+    """
+    global _periods_refreshed
+    with _periods_refresh_lock:
+        if not _periods_refreshed:
+            refresh_client_farmer_periods()
+            _periods_refreshed = True
+
+class ResponsibilityIndex:
+    """
+    Índice dos períodos de responsabilidade farmer-cliente para consultas em lote.
+    
+    Construído uma única vez a partir do DataFrame de get_client_farmer_periods(),
+    mantém os períodos ordenados por (cliente, data de início) em arrays
+    contíguos: início e fim em int64, farmer_id e nome do farmer, além dos
+    limites do bloco de cada cliente. Cada consulta localiza o bloco do cliente
+    por busca binária e testa o intervalo [início, fim) de forma vetorizada.
+    Havendo mais de um período válido para a mesma data, vale o de menor data
+    de início.
+    """
+    
+    def __init__(self, periods):
+        """
+        Args:
+            periods (pandas.DataFrame): Períodos com client_id, farmer_id, start_date,
+                end_date e farmer_name
+        """
+        if periods is None or periods.empty:
+            periods = pd.DataFrame(columns=['client_id', 'farmer_id', 'start_date', 'end_date', 'farmer_name'])
+        
+        codes, uniques = pd.factorize(periods['client_id'])
+        starts, starts_nulas = _dates_to_int64(periods['start_date'])
+        ends, ends_nulas = _dates_to_int64(periods['end_date'])
+        starts[starts_nulas] = _MAX_INT64
+        ends[ends_nulas] = _MAX_INT64
+        
+        # Ordena por (cliente, início) e delimita o bloco de cada cliente
+        order = np.lexsort((starts, codes))
+        codes_sorted = codes[order]
+        client_range = np.arange(len(uniques))
+        
+        self._clients = pd.Index(uniques)
+        self._group_start = np.searchsorted(codes_sorted, client_range, side='left')
+        self._group_end = np.searchsorted(codes_sorted, client_range, side='right')
+        self._starts = np.ascontiguousarray(starts[order])
+        self._ends = np.ascontiguousarray(ends[order])
+        self._farmer_ids = pd.array(pd.to_numeric(periods['farmer_id'], errors='coerce'), dtype='Int64').take(order)
+        if 'farmer_name' in periods.columns:
+            self._farmer_names = periods['farmer_name'].to_numpy(dtype=object)[order]
+        else:
+            self._farmer_names = np.full(len(order), None, dtype=object)
+        self._max_periods = int((self._group_end - self._group_start).max()) if len(uniques) else 0
+    
+    @classmethod
+    def from_database(cls, start_date=None, end_date=None):
+        """
+        Carrega os períodos do banco e constrói o índice.
+        
+        Args:
+            start_date (datetime, optional): Data inicial para filtrar os períodos
+            end_date (datetime, optional): Data final para filtrar os períodos
+            
+        Returns:
+            ResponsibilityIndex: Índice construído
+        """
+        return cls(get_client_farmer_periods(start_date, end_date))
+    
+    def __len__(self):
+        return len(self._starts)
+    
+    @property
+    def empty(self):
+        return len(self._starts) == 0
+    
+    def has_client(self, client_id):
+        """
+        Indica se o cliente possui algum período no índice.
+        """
+        return self._clients.get_indexer([client_id])[0] >= 0
+    
+    def has_farmer(self, farmer_id):
+        """
+        Indica se o farmer possui algum período no índice.
+        """
+        return bool((self._farmer_ids == farmer_id).fillna(False).any())
+    
+    def positions(self, client_ids, dates, farmer_id=None):
+        """
+        Localiza o período que contém cada par (cliente, data).
+        
+        Args:
+            client_ids (array-like): IDs dos clientes
+            dates (array-like): Datas a verificar
+            farmer_id (int, optional): Considera apenas os períodos deste farmer
+            
+        Returns:
+            numpy.ndarray: Posição do período nos arrays do índice para cada par, ou -1
+        """
+        n_rows = len(client_ids)
+        result = np.full(n_rows, -1, dtype=np.int64)
+        if n_rows == 0 or self.empty:
+            return result
+        
+        row_codes = self._clients.get_indexer(np.asarray(client_ids))
+        row_dates, row_dates_nulas = _dates_to_int64(dates)
+        
+        eligible = None
+        if farmer_id:
+            eligible = (self._farmer_ids == farmer_id).fillna(False).to_numpy(dtype=bool)
+        
+        pending = (row_codes >= 0) & ~row_dates_nulas
+        lo = np.where(pending, self._group_start[row_codes], 0)
+        hi = np.where(pending, self._group_end[row_codes], 0)
+        
+        # Cada passo testa o j-ésimo período de cada cliente; o número de passos é
+        # o maior número de períodos de um mesmo cliente, não o de registros
+        for j in range(self._max_periods):
+            candidates = np.flatnonzero(pending & (lo + j < hi))
+            if candidates.size == 0:
+                break
+            k = lo[candidates] + j
+            d = row_dates[candidates]
+            hit = (self._starts[k] <= d) & (d < self._ends[k])
+            if eligible is not None:
+                hit &= eligible[k]
+            rows = candidates[hit]
+            result[rows] = k[hit]
+            pending[rows] = False
+        
+        return result
+    
+    def contains(self, client_ids, dates, farmer_id=None):
+        """
+        Indica, para cada par (cliente, data), se existe período de responsabilidade.
+        
+        Args:
+            client_ids (array-like): IDs dos clientes
+            dates (array-like): Datas a verificar
+            farmer_id (int, optional): Considera apenas os períodos deste farmer
+            
+        Returns:
+            numpy.ndarray: Máscara booleana
+        """
+        return self.positions(client_ids, dates, farmer_id) >= 0
+    
+    def lookup(self, client_ids, dates):
+        """
+        Obtém o farmer responsável por cada par (cliente, data) em uma única passada.
+        
+        Args:
+            client_ids (array-like): IDs dos clientes
+            dates (array-like): Datas a verificar
+            
+        Returns:
+            pandas.DataFrame: Colunas responsible_farmer_id (Int64) e responsible_farmer_name,
+                com o mesmo índice de client_ids quando este for uma Series
+        """
+        pos = self.positions(client_ids, dates)
+        index = client_ids.index if isinstance(client_ids, pd.Series) else None
+        return pd.DataFrame({
+            'responsible_farmer_id': self._farmer_ids.take(pos, allow_fill=True),
+            'responsible_farmer_name': pd.api.extensions.take(self._farmer_names, pos, allow_fill=True, fill_value=None)
+        }, index=index)
+
+# Cache de períodos do processo: lista de (início, fim, DataFrame) já carregados.
+# Uma consulta cujo intervalo está contido em um intervalo carregado é atendida
+# filtrando o DataFrame em memória, sem acessar o banco.
+_periods_cache = []
+_periods_cache_lock = threading.Lock()
+_periods_cache_stats = {'hits': 0, 'misses': 0}
+
+def _to_bound(value):
+    """
+    Normaliza um limite de intervalo de datas (None significa sem limite).
+    """
+    return None if value is None else pd.Timestamp(value)
+
+def _range_contains(outer_start, outer_end, start, end):
+    """
+    Indica se o intervalo [start, end] está contido em [outer_start, outer_end].
+    
+    Limites None são abertos: um intervalo externo sem início contém qualquer
+    início, e um intervalo consultado sem início só é contido por outro sem início.
+    """
+    inicio_ok = outer_start is None or (start is not None and outer_start <= start)
+    fim_ok = outer_end is None or (end is not None and end <= outer_end)
+    return inicio_ok and fim_ok
+
+def _slice_periods(df, start_date, end_date):
+    """
+    Aplica em memória os mesmos filtros de datas da consulta de períodos.
+    
+    Args:
+        df (pandas.DataFrame): Períodos carregados
+        start_date (pandas.Timestamp or None): Data inicial
+        end_date (pandas.Timestamp or None): Data final
+        
+    Returns:
+        pandas.DataFrame: Cópia com os períodos que se sobrepõem ao intervalo
+    """
+    mask = pd.Series(True, index=df.index)
+    if start_date is not None and not df.empty:
+        mask &= df['end_date'].isna() | (df['end_date'] >= start_date)
+    if end_date is not None and not df.empty:
+        mask &= df['start_date'] <= end_date
+    return df[mask].reset_index(drop=True)
+
+def get_client_farmer_periods(start_date=None, end_date=None, use_cache=True):
+    """
+    Obtém os períodos em que cada farmer foi responsável por cada cliente.
+    
+    Os períodos carregados ficam em cache no processo: uma consulta cujo intervalo
+    está contido em um intervalo já carregado é atendida em memória.
+    
+    Args:
+        start_date (datetime, optional): Data inicial para filtrar os períodos
+        end_date (datetime, optional): Data final para filtrar os períodos
+        use_cache (bool): Se False, sempre consulta o banco
+        
+    Returns:
+        pandas.DataFrame: DataFrame com os períodos de responsabilidade
+    """
+    if not use_cache:
+        return _query_client_farmer_periods(start_date, end_date)
+    
+    inicio, fim = _to_bound(start_date), _to_bound(end_date)
+    with _periods_cache_lock:
+        for cache_inicio, cache_fim, df_cache in _periods_cache:
+            if _range_contains(cache_inicio, cache_fim, inicio, fim):
+                _periods_cache_stats['hits'] += 1
+                logger.debug(f"Períodos de responsabilidade atendidos pelo cache (início: {start_date}, fim: {end_date})")
+                return _slice_periods(df_cache, inicio, fim)
+        
+        _periods_cache_stats['misses'] += 1
+        if disk_cache_enabled():
+            # O cache em disco guarda todos os períodos: o intervalo carregado é ilimitado
+            df = _load_all_periods()
+            carregado_inicio, carregado_fim = None, None
+        else:
+            df = _query_client_farmer_periods(start_date, end_date)
+            carregado_inicio, carregado_fim = inicio, fim
+        
+        # Intervalos contidos no novo intervalo deixam de ser necessários
+        _periods_cache[:] = [
+            entrada for entrada in _periods_cache
+            if not _range_contains(carregado_inicio, carregado_fim, entrada[0], entrada[1])
+        ]
+        _periods_cache.append((carregado_inicio, carregado_fim, df))
+        return _slice_periods(df, inicio, fim)
+
+def _load_all_periods():
+    """
+    Carrega todos os períodos, do cache em disco quando a versão da origem não mudou.
+    
+    Falhas no cache em disco não interrompem o ETL: os períodos são lidos do banco.
+    
+    Returns:
+        pandas.DataFrame: Todos os períodos de responsabilidade
+    """
+    try:
+        fingerprint = get_periods_fingerprint()
+    except Exception as e:
+        logger.warning(f"Cache em disco de períodos indisponível: {str(e)}")
+        return _query_client_farmer_periods()
+    
+    df = load_cached_periods(fingerprint)
+    if df is None:
+        df = _query_client_farmer_periods()
+        save_cached_periods(fingerprint, df)
+    return df
+
+def get_periods_cache_stats():
+    """
+    Retorna os contadores do cache de períodos de responsabilidade.
+    
+    Returns:
+        dict: hits, misses e quantidade de intervalos em cache (ranges)
+    """
+    with _periods_cache_lock:
+        return {**_periods_cache_stats, 'ranges': len(_periods_cache)}
+
+def log_periods_cache_stats(level=logging.INFO):
+    """
+    Registra no log os contadores do cache de períodos de responsabilidade.
+    
+    Args:
+        level (int): Nível de log
+    """
+    stats = get_periods_cache_stats()
+    total = stats['hits'] + stats['misses']
+    if total == 0:
+        return
+    logger.log(level, f"Cache de períodos de responsabilidade: {stats['hits']} hits, "
+                      f"{stats['misses']} misses, {stats['ranges']} intervalos carregados")
+
+def clear_periods_cache():
+    """
+    Esvazia o cache de períodos de responsabilidade e zera os contadores.
+    """
+    with _periods_cache_lock:
+        _periods_cache.clear()
+        _periods_cache_stats['hits'] = 0
+        _periods_cache_stats['misses'] = 0
+
+# Tipos dos períodos aplicados na leitura (ver utils.typed_fetch)
+PERIODS_SCHEMA = {
+    'farmer_id': 'int32',
+    'start_date': 'datetime64[ns]',
+    'end_date': 'datetime64[ns]',
+    'farmer_name': 'category',
+}
+
+def _query_client_farmer_periods(start_date=None, end_date=None):
+    """
+    Consulta no banco os períodos de responsabilidade que se sobrepõem ao intervalo.
+    
+    Args:
+        start_date (datetime, optional): Data inicial para filtrar os períodos
+        end_date (datetime, optional): Data final para filtrar os períodos
+        
+    Returns:
+        pandas.DataFrame: DataFrame com os períodos de responsabilidade
+    """
+    conn = None
+    try:
+        ensure_client_farmer_periods()
+        conn = get_connection()
+        logger.info(f"Obtendo períodos de responsabilidade farmer-cliente (início: {start_date}, fim: {end_date})")
+        
+        query = """
         SELECT 
             client_id,
             farmer_id,
             start_date,
             end_date,
             e.name AS farmer_name
-        FROM all_periods ap
+        FROM analysis.client_farmer_periods ap
         LEFT JOIN gammadata.employees e ON ap.farmer_id = e.employee_id
         WHERE 1=1
         """
@@ -101,13 +645,7 @@ def get_client_farmer_periods(start_date=None, end_date=None):
         
         query += " ORDER BY client_id, start_date"
         
-        df = pd.read_sql(query, conn, params=params)
-        
-        # Converter colunas de data para datetime
-        if not df.empty:
-            for col in ['start_date', 'end_date']:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col])
+        df = fetch_dataframe(conn, query, params, PERIODS_SCHEMA)
         
         logger.info(f"Períodos de responsabilidade obtidos com sucesso. Registros: {len(df)}")
         return df
@@ -119,6 +657,64 @@ def get_client_farmer_periods(start_date=None, end_date=None):
         if conn:
             conn.close()
 
+# Índice compartilhado pelo processo; quando ativado, substitui a carga de períodos por chamada
+_shared_enabled = False
+_shared_index = None
+_shared_lock = threading.Lock()
+
+def enable_shared_index(index=None):
+    """
+    Ativa um ResponsibilityIndex compartilhado por todas as funções deste módulo.
+    
+    Usado quando vários KPIs rodam no mesmo processo: os períodos são carregados
+    uma única vez (sem filtro de datas), na primeira consulta, e reaproveitados
+    por todas as extrações seguintes.
+    
+    Args:
+        index (ResponsibilityIndex, optional): Índice já construído; se None, é carregado sob demanda
+    """
+    global _shared_enabled, _shared_index
+    with _shared_lock:
+        _shared_enabled = True
+        _shared_index = index
+
+def disable_shared_index():
+    """
+    Desativa o índice compartilhado; cada chamada volta a carregar seus períodos do banco.
+    """
+    global _shared_enabled, _shared_index
+    with _shared_lock:
+        _shared_enabled = False
+        _shared_index = None
+
+def get_shared_index():
+    """
+    Retorna o ResponsibilityIndex compartilhado do processo.
+    
+    Returns:
+        ResponsibilityIndex or None: Índice compartilhado, se já carregado
+    """
+    return _shared_index
+
+def _load_index(start_date=None, end_date=None):
+    """
+    Retorna o índice compartilhado ou, se não estiver ativo, carrega os períodos do banco.
+    
+    Args:
+        start_date (datetime, optional): Data inicial para filtrar os períodos
+        end_date (datetime, optional): Data final para filtrar os períodos
+        
+    Returns:
+        ResponsibilityIndex: Índice de períodos
+    """
+    global _shared_index
+    if not _shared_enabled:
+        return ResponsibilityIndex.from_database(start_date, end_date)
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = ResponsibilityIndex.from_database()
+        return _shared_index
+
 def get_responsible_farmer(client_id, date, df_periods=None):
     """
     Determina qual farmer era responsável pelo cliente em uma data específica.
@@ -126,39 +722,39 @@ def get_responsible_farmer(client_id, date, df_periods=None):
     Args:
         client_id (int): ID do cliente
         date (datetime): Data para verificação
-        df_periods (pandas.DataFrame, optional): DataFrame com períodos pré-carregado
+        df_periods (pandas.DataFrame or ResponsibilityIndex, optional): Períodos pré-carregados.
+            Para consultas repetidas, prefira passar um ResponsibilityIndex já construído.
         
     Returns:
         tuple: (farmer_id, farmer_name) ou (None, None) se não encontrado
     """
     try:
-        if df_periods is None:
+        if isinstance(df_periods, ResponsibilityIndex):
+            index = df_periods
+        elif df_periods is None:
             # Se os períodos não foram fornecidos, carrega do banco
-            df_periods = get_client_farmer_periods()
-        
-        # Filtra apenas para o cliente específico
-        client_periods = df_periods[df_periods['client_id'] == client_id]
+            index = _load_index()
+        else:
+            index = ResponsibilityIndex(df_periods)
         
-        if client_periods.empty:
+        if not index.has_client(client_id):
             logger.warning(f"Nenhum período encontrado para o cliente {client_id}")
             return None, None
         
         # Localiza o período que contém a data
-        for _, row in client_periods.iterrows():
-            start_date = row['start_date']
-            end_date = row['end_date']
-            
-            if start_date <= date and (end_date is None or pd.isna(end_date) or date < end_date):
-                return row['farmer_id'], row['farmer_name']
+        if not index.contains([client_id], [date])[0]:
+            logger.warning(f"Nenhum farmer responsável encontrado para o cliente {client_id} na data {date}")
+            return None, None
         
-        logger.warning(f"Nenhum farmer responsável encontrado para o cliente {client_id} na data {date}")
-        return None, None
+        result = index.lookup([client_id], [date]).iloc[0]
+        farmer_id = result['responsible_farmer_id']
+        return (None if pd.isna(farmer_id) else int(farmer_id)), result['responsible_farmer_name']
     
     except Exception as e:
         logger.error(f"Erro ao obter farmer responsável: {str(e)}")
         return None, None
 
-def filter_data_by_responsibility(df, date_column, farmer_id=None, date_range=None):
+def filter_data_by_responsibility(df, date_column, farmer_id=None, date_range=None, index=None):
     """
     Filtra um DataFrame para incluir apenas registros onde o farmer era responsável
     pelo cliente na data especificada.
@@ -168,6 +764,8 @@ def filter_data_by_responsibility(df, date_column, farmer_id=None, date_range=No
         date_column (str): Nome da coluna que contém a data para verificação
         farmer_id (int, optional): ID do farmer para filtrar
         date_range (tuple, optional): (data_inicio, data_fim) para carregar apenas períodos relevantes
+        index (ResponsibilityIndex, optional): Índice de períodos já construído; se omitido,
+            os períodos são carregados do banco
         
     Returns:
         pandas.DataFrame: DataFrame filtrado
@@ -180,43 +778,28 @@ def filter_data_by_responsibility(df, date_column, farmer_id=None, date_range=No
             logger.error(f"Colunas necessárias não encontradas no DataFrame: client_id ou {date_column}")
             return df
         
-        # Obter range de datas no DataFrame
-        if date_range:
-            start_date, end_date = date_range
-        else:
-            start_date = df[date_column].min()
-            end_date = df[date_column].max()
-        
-        # Carregar períodos de responsabilidade
-        periods = get_client_farmer_periods(start_date, end_date)
+        if index is None:
+            # Obter range de datas no DataFrame
+            if date_range:
+                start_date, end_date = date_range
+            else:
+                start_date = df[date_column].min()
+                end_date = df[date_column].max()
+            
+            # Carregar períodos de responsabilidade
+            index = _load_index(start_date, end_date)
         
-        if periods.empty:
+        if index.empty:
             logger.warning("Nenhum período de responsabilidade encontrado")
             return pd.DataFrame(columns=df.columns)
         
         # Filtrar pelo farmer_id se especificado
-        if farmer_id:
-            periods = periods[periods['farmer_id'] == farmer_id]
-            if periods.empty:
-                logger.warning(f"Nenhum período encontrado para o farmer_id {farmer_id}")
-                return pd.DataFrame(columns=df.columns)
-        
-        # Criar uma função para verificar se um registro está no período correto
-        def is_in_period(row):
-            client_periods = periods[periods['client_id'] == row['client_id']]
-            
-            if client_periods.empty:
-                return False
-            
-            date = row[date_column]
-            for _, period in client_periods.iterrows():
-                if period['start_date'] <= date and (period['end_date'] is None or pd.isna(period['end_date']) or date < period['end_date']):
-                    if farmer_id is None or period['farmer_id'] == farmer_id:
-                        return True
-            return False
+        if farmer_id and not index.has_farmer(farmer_id):
+            logger.warning(f"Nenhum período encontrado para o farmer_id {farmer_id}")
+            return pd.DataFrame(columns=df.columns)
         
-        # Aplicar o filtro
-        filtered_df = df[df.apply(is_in_period, axis=1)]
+        # Associar cada registro ao período do cliente que contém a data
+        filtered_df = df[index.contains(df['client_id'], df[date_column], farmer_id)]
         
         logger.info(f"Dados filtrados por responsabilidade. Registros filtrados: {len(filtered_df)} de {len(df)}")
         return filtered_df
@@ -225,13 +808,15 @@ def filter_data_by_responsibility(df, date_column, farmer_id=None, date_range=No
         logger.error(f"Erro ao filtrar dados por responsabilidade: {str(e)}")
         return df
 
-def add_responsible_farmer_info(df, date_column):
+def add_responsible_farmer_info(df, date_column, index=None):
     """
     Adiciona informações do farmer responsável (ID e nome) para cada registro no DataFrame.
     
     Args:
         df (pandas.DataFrame): DataFrame a ser enriquecido
         date_column (str): Nome da coluna que contém a data para verificação
+        index (ResponsibilityIndex, optional): Índice de períodos já construído; se omitido,
+            os períodos são carregados do banco
         
     Returns:
         pandas.DataFrame: DataFrame com colunas adicionais (responsible_farmer_id, responsible_farmer_name)
@@ -244,40 +829,29 @@ def add_responsible_farmer_info(df, date_column):
             logger.error(f"Colunas necessárias não encontradas no DataFrame: client_id ou {date_column}")
             return df
         
-        # Obter range de datas no DataFrame
-        start_date = df[date_column].min()
-        end_date = df[date_column].max()
-        
-        # Carregar períodos de responsabilidade
-        periods = get_client_farmer_periods(start_date, end_date)
+        if index is None:
+            # Obter range de datas no DataFrame
+            start_date = df[date_column].min()
+            end_date = df[date_column].max()
+            
+            # Carregar períodos de responsabilidade
+            index = _load_index(start_date, end_date)
         
-        if periods.empty:
+        if index.empty:
             logger.warning("Nenhum período de responsabilidade encontrado")
             # Adiciona colunas vazias e retorna
             df['responsible_farmer_id'] = None
             df['responsible_farmer_name'] = None
             return df
         
-        # Função para obter farmer responsável para cada registro
-        def get_farmer_for_row(row):
-            client_periods = periods[periods['client_id'] == row['client_id']]
-            
-            if client_periods.empty:
-                return pd.Series([None, None])
-            
-            date = row[date_column]
-            for _, period in client_periods.iterrows():
-                if period['start_date'] <= date and (period['end_date'] is None or pd.isna(period['end_date']) or date < period['end_date']):
-                    return pd.Series([period['farmer_id'], period['farmer_name']])
-            
-            return pd.Series([None, None])
-        
-        # Aplicar a função e adicionar as colunas
-        df[['responsible_farmer_id', 'responsible_farmer_name']] = df.apply(get_farmer_for_row, axis=1)
+        # Consulta vetorizada do farmer responsável para todos os registros
+        farmers = index.lookup(df['client_id'], df[date_column])
+        df['responsible_farmer_id'] = farmers['responsible_farmer_id']
+        df['responsible_farmer_name'] = farmers['responsible_farmer_name']
         
         logger.info(f"Informações de farmer responsável adicionadas ao DataFrame. Registros: {len(df)}")
         return df
     
     except Exception as e:
         logger.error(f"Erro ao adicionar informações de farmer responsável: {str(e)}")
-        return df
\ No newline at end of file
+        return df
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo com as regras de bônus de comissão dos farmers.
+
+As extrações de fechamento retornam apenas os agregados por (farmer, mês)
+(churn, captação, receita e comissão bruta) e as metas/percentuais de
+gammadata.compensation. Status, percentuais e bônus de cada meta são
+calculados aqui de forma vetorizada, para qualquer quantidade de meses
+de uma vez.
+
+Os agregados realizados chegam sem arredondamento (texto do NUMERIC): a
+comparação com as metas e o cálculo dos bônus usam os valores exatos
+(utils.money.parse_scaled), e o arredondamento para centavos é feito uma
+única vez, como no ROUND(x, 2) da consulta original.
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+from utils.money import CENTS_DTYPE, parse_scaled, rescale, percent_of_scaled, scaled_to_cents
+
+logger = logging.getLogger(__name__)
+
+# Colunas de metas e percentuais de bônus, para o SELECT das extrações
+# (requer o join de gammadata.compensation com o alias comp)
+COMPENSATION_COLUMNS_SQL = """
+            comp.target_churn as meta_churn,
+            comp.target_net_capture as meta_captacao,
+            comp.target_revenue as meta_receita,
+            comp.junior_churn_bonus,
+            comp.pleno_churn_bonus,
+            comp.junior_referral_bonus,
+            comp.pleno_referral_bonus,
+            comp.junior_revenue_bonus,
+            comp.pleno_revenue_bonus"""
+
+# Metas do fechamento: (nome, coluna realizada, coluna da meta, sufixo do percentual em compensation)
+REGRAS_BONUS = [
+    ('churn', 'churn_total', 'meta_churn', 'churn_bonus'),
+    ('captacao', 'captacao_total', 'meta_captacao', 'referral_bonus'),
+    ('receita', 'receita_total', 'meta_receita', 'revenue_bonus'),
+]
+
+STATUS_BATIDA = 'Batida'
+STATUS_NAO_BATIDA = 'Não Batida'
+
+def _to_float(df, column):
+    """
+    Converte uma coluna para numpy float64 (valores ausentes viram NaN).
+
+    Args:
+        df (pandas.DataFrame): DataFrame de origem
+        column (str): Nome da coluna
+
+    Returns:
+        numpy.ndarray: Valores da coluna em float64
+    """
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+# Agregados realizados, convertidos para centavos depois do cálculo dos bônus
+COLUNAS_REALIZADAS = ['churn_total', 'captacao_total', 'receita_total', 'comissao_bruta_total']
+
+def _to_exact(df, column):
+    """
+    Lê uma coluna monetária como inteiros exatos (ver utils.money.parse_scaled).
+
+    Colunas inteiras já estão em centavos; textos e floats são valores em reais.
+
+    Args:
+        df (pandas.DataFrame): DataFrame de origem
+        column (str): Nome da coluna
+
+    Returns:
+        tuple: (valores, máscara de nulos, casas decimais)
+    """
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=np.int64), np.ones(len(df), dtype=bool), 2
+    serie = df[column]
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        arr = pd.array(serie, dtype=CENTS_DTYPE)
+        return arr.to_numpy(dtype=np.int64, na_value=0), arr.isna(), 2
+    return parse_scaled(serie)
+
+def _at_least(realizado, meta):
+    """
+    Compara realizado >= meta com valores exatos; nulos resultam em False.
+
+    Args:
+        realizado (tuple): (valores, nulos, casas) do realizado
+        meta (tuple): (valores, nulos, casas) da meta
+
+    Returns:
+        numpy.ndarray: Máscara booleana
+    """
+    casas = max(realizado[2], meta[2])
+    valores_realizado = rescale(realizado[0], realizado[2], casas)
+    valores_meta = rescale(meta[0], meta[2], casas)
+    comparacao = np.asarray(valores_realizado >= valores_meta, dtype=bool)
+    return comparacao & ~realizado[1] & ~meta[1]
+
+def apply_commission_rules(df):
+    """
+    Calcula status, percentual e bônus de churn, captação e receita, e o bônus total.
+
+    Regras (por linha):
+        - status_<meta>: 'Batida' se realizado >= meta (valores sem arredondamento);
+          caso contrário (inclusive com valores ausentes) 'Não Batida'
+        - porcentagem_<meta>: percentual junior para hierarchy_level 'junior',
+          percentual pleno para os demais
+        - bonus_<meta>: ROUND(comissao_bruta_total * percentual / 100, 2) sobre a
+          comissão sem arredondamento, em centavos, para metas batidas de farmers
+          junior ou pleno; 0 caso contrário
+        - bonus_total: soma dos três bônus, em centavos
+        - churn_total, captacao_total, receita_total e comissao_bruta_total são
+          arredondados para centavos ao final
+
+    Args:
+        df (pandas.DataFrame): Agregados por (farmer, mês) com hierarchy_level,
+            churn_total, captacao_total, receita_total, comissao_bruta_total (texto
+            do NUMERIC ou centavos) e as colunas de COMPENSATION_COLUMNS_SQL
+
+    Returns:
+        pandas.DataFrame: Cópia do DataFrame com as colunas calculadas, sem as
+            colunas de percentual junior_*/pleno_*
+    """
+    df_result = df.copy()
+    if df_result.empty:
+        return df_result
+
+    nivel = df_result['hierarchy_level'].to_numpy()
+    is_junior = nivel == 'junior'
+    is_pleno = nivel == 'pleno'
+    comissao = _to_exact(df_result, 'comissao_bruta_total')
+
+    colunas_percentual = []
+    bonus_total = pd.array(np.zeros(len(df_result), dtype=np.int64), dtype=CENTS_DTYPE)
+
+    for nome, col_realizado, col_meta, sufixo in REGRAS_BONUS:
+        realizado = _to_exact(df_result, col_realizado)
+        meta = _to_exact(df_result, col_meta)
+        pct_junior = _to_float(df_result, f'junior_{sufixo}')
+        pct_pleno = _to_float(df_result, f'pleno_{sufixo}')
+        colunas_percentual += [f'junior_{sufixo}', f'pleno_{sufixo}']
+
+        # Comparações com nulos resultam em False, como o ELSE do CASE em SQL
+        batida = _at_least(realizado, meta)
+        porcentagem = np.where(is_junior, pct_junior, pct_pleno)
+        bonus = percent_of_scaled(*comissao, porcentagem)
+        bonus[~(batida & (is_junior | is_pleno))] = 0
+
+        df_result[f'status_{nome}'] = np.where(batida, STATUS_BATIDA, STATUS_NAO_BATIDA)
+        df_result[f'porcentagem_{nome}'] = porcentagem
+        df_result[f'bonus_{nome}'] = bonus
+        bonus_total = bonus_total + bonus
+
+    df_result['bonus_total'] = bonus_total
+
+    # Agregados arredondados para centavos uma única vez, depois das regras
+    for col in COLUNAS_REALIZADAS:
+        if col in df_result.columns:
+            valores, nulos, casas = _to_exact(df_result, col)
+            if valores.dtype == object:
+                valores = pd.Series(np.where(nulos, None, valores), dtype=object)
+            else:
+                valores = pd.arrays.IntegerArray(valores, nulos)
+            df_result[col] = scaled_to_cents(valores, casas)
+
+    logger.debug(f"Regras de comissão aplicadas a {len(df_result)} registros")
+    return df_result.drop(columns=[c for c in colunas_percentual if c in df_result.columns])
@@ -3,11 +3,19 @@
 
 """
 Módulo para conexão com o banco de dados.
+
+As conexões são emprestadas de um pool único por processo. O objeto retornado
+por get_connection() se comporta como uma conexão psycopg2, mas close()
+devolve a conexão ao pool em vez de encerrá-la.
 """
 
 import os
+import time
+import atexit
 import logging
+import threading
 import psycopg2
+import psycopg2.extensions
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
@@ -15,10 +23,10 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
 logger = logging.getLogger(__name__)
 
-def get_connection():
+def _create_connection():
     """
-    Estabelece conexão com o banco de dados usando as credenciais do arquivo .env.
-    
+    Abre uma nova conexão física com o banco usando as credenciais do arquivo .env.
+
     Returns:
         psycopg2.connection: Objeto de conexão com o banco de dados
     """
@@ -30,16 +38,16 @@ def get_connection():
         db_user = os.getenv('DB_USER')
         db_password = os.getenv('DB_PASSWORD')
         db_options = os.getenv('DB_OPTIONS', '-c search_path=gammadata')
-        
+
         # Verificando se todas as configurações obrigatórias estão presentes
-        required_configs = {'DB_HOST': db_host, 'DB_PORT': db_port, 
-                           'DB_NAME': db_name, 'DB_USER': db_user, 
+        required_configs = {'DB_HOST': db_host, 'DB_PORT': db_port,
+                           'DB_NAME': db_name, 'DB_USER': db_user,
                            'DB_PASSWORD': db_password}
-        
+
         missing_configs = [key for key, value in required_configs.items() if not value]
         if missing_configs:
             raise ValueError(f"Configurações obrigatórias ausentes no .env: {', '.join(missing_configs)}")
-        
+
         # Estabelecendo conexão
         connection = psycopg2.connect(
             host=db_host,
@@ -49,27 +57,336 @@ def get_connection():
             password=db_password,
             options=db_options
         )
-        
+
         logger.info(f"Conexão estabelecida com o banco {db_name} em {db_host}")
         return connection
-    
+
     except Exception as e:
         logger.error(f"Erro ao conectar ao banco de dados: {str(e)}")
         raise
 
+class PooledConnection:
+    """
+    Conexão emprestada do pool.
+
+    Delega todos os atributos para a conexão psycopg2 real; close() devolve
+    a conexão ao pool.
+    """
+
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._conn = raw_conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("conexão já devolvida ao pool")
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Mesmo comportamento de psycopg2: encerra a transação sem fechar a conexão
+        if exc_type:
+            self._conn.rollback()
+        else:
+            self._conn.commit()
+
+    @property
+    def closed(self):
+        return 1 if self._conn is None else self._conn.closed
+
+    def close(self):
+        if self._conn is not None:
+            raw_conn, self._conn = self._conn, None
+            self._pool.putconn(raw_conn)
+
+class ConnectionPool:
+    """
+    Pool de conexões PostgreSQL thread-safe.
+
+    Mantém entre min_size e max_size conexões, valida a conexão na retirada
+    (health check), recicla conexões ociosas há mais de max_idle segundos ou
+    abertas há mais de max_lifetime segundos e acumula estatísticas de uso.
+    """
+
+    def __init__(self, min_size=1, max_size=10, max_idle=300, max_lifetime=3600,
+                 timeout=30, health_check_interval=30, connect=_create_connection):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+
+        self._cond = threading.Condition()
+        self._idle = []          # [(conn, created_at, returned_at)]
+        self._in_use = {}        # id(conn) -> created_at
+        self._checked_out = 0    # conexões emprestadas ou sendo abertas
+        self._closed = False
+
+        self.stats = {
+            'checkouts': 0,
+            'wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'created': 0,
+            'closed': 0,
+            'health_check_failures': 0,
+            'recycled': 0,
+        }
+
+    def _open(self):
+        conn = self._connect()
+        with self._cond:
+            self.stats['created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar conexão descartada: {str(e)}")
+        with self._cond:
+            self.stats['closed'] += 1
+
+    def _is_healthy(self, conn, created_at, returned_at, now):
+        if conn.closed:
+            return False
+        if (self.max_lifetime and now - created_at > self.max_lifetime) or \
+                (self.max_idle and now - returned_at > self.max_idle):
+            with self._cond:
+                self.stats['recycled'] += 1
+            return False
+        if now - returned_at > self.health_check_interval:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Conexão do pool falhou no health check: {str(e)}")
+                with self._cond:
+                    self.stats['health_check_failures'] += 1
+                return False
+        return True
+
+    def getconn(self):
+        """
+        Retira uma conexão do pool, abrindo uma nova se necessário.
+
+        Returns:
+            PooledConnection: Conexão emprestada
+        """
+        start = time.monotonic()
+        candidate = None
+        with self._cond:
+            if self._closed:
+                raise psycopg2.InterfaceError("pool de conexões encerrado")
+            while not self._idle and self._checked_out >= self.max_size:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise psycopg2.OperationalError(
+                        f"Tempo esgotado aguardando conexão do pool ({self.max_size} em uso)"
+                    )
+                self._cond.wait(remaining)
+            if self._idle:
+                candidate = self._idle.pop()
+            # Reserva a vaga antes de sair do lock
+            self._checked_out += 1
+
+        try:
+            if candidate is not None:
+                conn, created_at, returned_at = candidate
+                if not self._is_healthy(conn, created_at, returned_at, time.monotonic()):
+                    self._discard(conn)
+                    candidate = None
+            if candidate is None:
+                conn = self._open()
+                created_at = time.monotonic()
+        except Exception:
+            with self._cond:
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._in_use[id(conn)] = created_at
+            self.stats['checkouts'] += 1
+            self.stats['wait_time'] += waited
+            self.stats['max_wait_time'] = max(self.stats['max_wait_time'], waited)
+        return PooledConnection(self, conn)
+
+    def putconn(self, conn):
+        """
+        Devolve uma conexão ao pool, descartando-a se estiver quebrada ou o pool estiver cheio.
+
+        Args:
+            conn (psycopg2.connection): Conexão física a devolver
+        """
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), time.monotonic())
+            self._checked_out -= 1
+
+        reusable = not conn.closed and not self._closed
+        if reusable:
+            try:
+                # Nunca devolver uma conexão com transação aberta
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception as e:
+                logger.warning(f"Erro ao limpar conexão devolvida ao pool: {str(e)}")
+                reusable = False
+
+        with self._cond:
+            if reusable and len(self._idle) < self.max_size:
+                self._idle.append((conn, created_at, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._discard(conn)
+
+    def prefill(self):
+        """
+        Abre conexões até atingir min_size conexões ociosas.
+        """
+        while True:
+            with self._cond:
+                if len(self._idle) + self._checked_out >= self.min_size:
+                    return
+            conn = self._open()
+            now = time.monotonic()
+            with self._cond:
+                self._idle.append((conn, now, now))
+
+    def get_stats(self):
+        """
+        Retorna uma cópia das estatísticas do pool.
+
+        Returns:
+            dict: Contadores de uso e tamanho atual do pool
+        """
+        with self._cond:
+            stats = dict(self.stats)
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._checked_out
+        stats['avg_wait_time'] = stats['wait_time'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+    def closeall(self):
+        """
+        Fecha todas as conexões ociosas e impede novas retiradas.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Retorna o pool de conexões do processo, criando-o na primeira chamada.
+
+    Os limites são lidos do .env: DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE,
+    DB_POOL_MAX_IDLE, DB_POOL_MAX_LIFETIME, DB_POOL_TIMEOUT e
+    DB_POOL_HEALTH_CHECK_INTERVAL (tempos em segundos).
+
+    Returns:
+        ConnectionPool: Pool compartilhado
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+                max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                max_idle=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+                max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+                health_check_interval=float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30'))
+            )
+            logger.info(f"Pool de conexões criado (min: {_pool.min_size}, max: {_pool.max_size})")
+        return _pool
+
+def get_pool_stats():
+    """
+    Retorna as estatísticas do pool de conexões do processo.
+
+    Returns:
+        dict: Estatísticas do pool (vazio se o pool ainda não foi criado)
+    """
+    return _pool.get_stats() if _pool is not None else {}
+
+def log_pool_stats(level=logging.INFO):
+    """
+    Registra no logger as estatísticas do pool de conexões.
+
+    Args:
+        level (int): Nível de logging
+    """
+    stats = get_pool_stats()
+    if not stats:
+        return
+    logger.log(
+        level,
+        f"Pool de conexões: checkouts={stats['checkouts']}, "
+        f"espera_total={stats['wait_time']:.3f}s, espera_max={stats['max_wait_time']:.3f}s, "
+        f"criadas={stats['created']}, fechadas={stats['closed']}, recicladas={stats['recycled']}, "
+        f"falhas_health_check={stats['health_check_failures']}, "
+        f"ociosas={stats['idle']}, em_uso={stats['in_use']}"
+    )
+
+def close_pool():
+    """
+    Encerra o pool de conexões do processo, registrando as estatísticas finais.
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        stats = pool.get_stats()
+        pool.closeall()
+        logger.info(
+            f"Pool de conexões encerrado: checkouts={stats['checkouts']}, "
+            f"criadas={stats['created']}, fechadas={stats['closed'] + stats['idle']}"
+        )
+
+atexit.register(close_pool)
+
+def get_connection():
+    """
+    Obtém uma conexão do pool de conexões do processo.
+
+    A conexão deve ser liberada com close(), que a devolve ao pool.
+
+    Returns:
+        PooledConnection: Conexão com o banco de dados
+    """
+    try:
+        return get_pool().getconn()
+    except Exception as e:
+        logger.error(f"Erro ao obter conexão do pool: {str(e)}")
+        raise
+
 class DatabaseConnection:
     """
     Gerenciador de contexto para conexões com o banco de dados.
     Permite reutilizar uma única conexão para múltiplas operações.
     """
-    
+
     def __init__(self):
         self.conn = None
-        
+
     def __enter__(self):
         self.conn = get_connection()
         return self.conn
-        
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.conn:
             if exc_type:
@@ -77,4 +394,4 @@ class DatabaseConnection:
             else:
                 self.conn.commit()
             self.conn.close()
-            self.conn = None
\ No newline at end of file
+            self.conn = None
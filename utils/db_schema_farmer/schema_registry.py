@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Registro declarativo das tabelas do schema analysis e das suas migrações.
+
+As definições das tabelas de destino dos KPIs ficam em TABLES e as alterações
+de estrutura em MIGRATIONS, uma lista ordenada de versões. A versão aplicada ao
+banco é registrada em analysis.schema_version.
+
+ensure_schema verifica a versão uma única vez por processo (uma consulta) e,
+se houver versões pendentes, aplica todas em uma única transação. As chamadas
+seguintes retornam sem acessar o banco, de modo que as cargas não fazem mais
+consultas ao catálogo (information_schema) a cada execução.
+
+Para alterar uma tabela: ajuste a definição em TABLES (usada em bancos novos) e
+acrescente uma nova versão em MIGRATIONS com o ALTER correspondente, usando
+IF NOT EXISTS para que seja inócua em bancos criados já com a definição nova.
+
+Tabelas com 'partition_by' são particionadas por intervalo mensal da coluna
+(PARTITION BY RANGE), com uma partição por mês (<tabela>_pAAAAMM) criada pelas
+cargas (ver utils.month_partitions); a chave primária inclui a coluna de partição.
+"""
+
+import logging
+import threading
+from utils.db_connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = 'analysis.schema_version'
+
+_AUDIT_COLUMNS = [
+    ('created_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
+    ('updated_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
+]
+
+_FECHAMENTO_COLUMNS = [
+    ('churn_total', 'NUMERIC(15,2)'),
+    ('meta_churn', 'NUMERIC(15,2)'),
+    ('status_churn', 'VARCHAR(20)'),
+    ('porcentagem_churn', 'NUMERIC(5,2)'),
+    ('bonus_churn', 'NUMERIC(15,2)'),
+    ('captacao_total', 'NUMERIC(15,2)'),
+    ('meta_captacao', 'NUMERIC(15,2)'),
+    ('status_captacao', 'VARCHAR(20)'),
+    ('porcentagem_captacao', 'NUMERIC(5,2)'),
+    ('bonus_captacao', 'NUMERIC(15,2)'),
+    ('receita_total', 'NUMERIC(15,2)'),
+    ('meta_receita', 'NUMERIC(15,2)'),
+    ('status_receita', 'VARCHAR(20)'),
+    ('porcentagem_receita', 'NUMERIC(5,2)'),
+    ('bonus_receita', 'NUMERIC(15,2)'),
+    ('comissao_bruta_total', 'NUMERIC(15,2)'),
+    ('bonus_total', 'NUMERIC(15,2)'),
+]
+
+# Definição atual das tabelas: colunas, restrições e índices (nome, colunas)
+TABLES = {
+    'analysis.receita_farmer_m_passado': {
+        'columns': [
+            ('id', 'SERIAL'),
+            ('mes', 'DATE NOT NULL'),
+            ('mes_formatado', 'VARCHAR(7) NOT NULL'),
+            ('farmer_id', 'INTEGER'),
+            ('employee_name', 'VARCHAR(255)'),
+            ('receita_bruta', 'NUMERIC(15,2)'),
+            ('receita_liquida', 'NUMERIC(15,2)'),
+            ('comissao_bruta', 'NUMERIC(15,2)'),
+            ('comissao_liquida', 'NUMERIC(15,2)'),
+            ('fonte', 'VARCHAR(50) NOT NULL'),
+        ] + _AUDIT_COLUMNS,
+        'constraints': ['PRIMARY KEY (id, mes)', 'UNIQUE(mes, fonte, farmer_id)'],
+        'indexes': [],
+        'partition_by': 'mes',
+    },
+    'analysis.receita_farmer_m_presente': {
+        'columns': [
+            ('id', 'SERIAL PRIMARY KEY'),
+            ('mes', 'DATE NOT NULL'),
+            ('mes_formatado', 'VARCHAR(7) NOT NULL'),
+            ('receita_bruta', 'NUMERIC(15,2)'),
+            ('comissao_bruta', 'NUMERIC(15,2)'),
+            ('comissao_liquida', 'NUMERIC(15,2)'),
+            ('fonte', 'VARCHAR(50) NOT NULL'),
+        ] + _AUDIT_COLUMNS,
+        'constraints': ['UNIQUE(mes, fonte)'],
+        'indexes': [],
+    },
+    'analysis.receita_produto_f_m_passado': {
+        'columns': [
+            ('id', 'SERIAL PRIMARY KEY'),
+            ('mes', 'DATE NOT NULL'),
+            ('mes_formatado', 'VARCHAR(7) NOT NULL'),
+            ('category', 'VARCHAR(255)'),
+            ('product', 'VARCHAR(255)'),
+            ('farmer_id', 'INTEGER'),
+            ('employee_name', 'VARCHAR(255)'),
+            ('fonte', 'VARCHAR(50) NOT NULL'),
+        ] + _AUDIT_COLUMNS,
+        'constraints': ['UNIQUE(mes, category, product, farmer_id)'],
+        'indexes': [],
+    },
+    'analysis.receita_cliente': {
+        'columns': [
+            ('id', 'SERIAL'),
+            ('data_operacao', 'DATE NOT NULL'),
+            ('mes', 'DATE NOT NULL'),
+            ('mes_formatado', 'VARCHAR(7) NOT NULL'),
+            ('tipo_operacao', 'VARCHAR(50)'),
+            ('client_id', 'VARCHAR(50)'),
+            ('nome_cliente', 'VARCHAR(255)'),
+            ('farmer_id', 'INTEGER'),
+            ('nome_farmer', 'VARCHAR(255)'),
+            ('valor_financeiro', 'NUMERIC(15,2)'),
+            ('percentual_comissao', 'NUMERIC(9,4)'),
+            ('receita_bruta', 'NUMERIC(15,2)'),
+            ('comissao_bruta', 'NUMERIC(15,2)'),
+            ('comissao_liquida', 'NUMERIC(15,2)'),
+            ('status', 'VARCHAR(50)'),
+            ('churn', 'NUMERIC(15,2)'),
+            ('patrimony', 'NUMERIC(15,2)'),
+            ('net_capture', 'NUMERIC(15,2)'),
+        ] + _AUDIT_COLUMNS,
+        'constraints': ['PRIMARY KEY (id, mes)'],
+        'indexes': [
+            ('idx_receita_cliente_data_operacao', '(data_operacao)'),
+            ('idx_receita_cliente_farmer_id', '(farmer_id, data_operacao)'),
+        ],
+        'partition_by': 'mes',
+    },
+    'analysis.fechamento_farmer_m_passado': {
+        'columns': [
+            ('id', 'SERIAL'),
+            ('mes', 'DATE NOT NULL'),
+            ('mes_formatado', 'VARCHAR(7) NOT NULL'),
+            ('farmer_id', 'INTEGER NOT NULL'),
+            ('farmer_name', 'VARCHAR(255)'),
+            ('hierarchy_level', 'VARCHAR(50)'),
+            ('data_positivador', 'DATE'),
+            ('periodo_responsabilidade_inicio', 'DATE'),
+            ('periodo_responsabilidade_fim', 'DATE'),
+        ] + _FECHAMENTO_COLUMNS + [
+            ('is_current_month', 'BOOLEAN DEFAULT FALSE'),
+        ] + _AUDIT_COLUMNS,
+        'constraints': ['PRIMARY KEY (id, mes)'],
+        'indexes': [
+            ('idx_fechamento_farmer_m_passado_mes', '(mes)'),
+            ('idx_fechamento_farmer_m_passado_farmer_id', '(farmer_id)'),
+            ('idx_fechamento_farmer_m_passado_current_month', '(is_current_month)'),
+        ],
+        'partition_by': 'mes',
+    },
+    'analysis.fechamento_farmer_m_presente': {
+        'columns': [
+            ('id', 'SERIAL PRIMARY KEY'),
+            ('mes', 'DATE NOT NULL'),
+            ('mes_formatado', 'VARCHAR(7) NOT NULL'),
+            ('farmer_id', 'INTEGER NOT NULL'),
+            ('farmer_name', 'VARCHAR(255)'),
+            ('hierarchy_level', 'VARCHAR(50)'),
+            ('data_positivador', 'DATE'),
+            ('periodo_responsabilidade', 'DATE[]'),
+        ] + _FECHAMENTO_COLUMNS + [
+            ('is_current_month', 'BOOLEAN DEFAULT TRUE'),
+        ] + _AUDIT_COLUMNS,
+        'constraints': [],
+        'indexes': [
+            ('idx_fechamento_farmer_m_presente_mes', '(mes)'),
+            ('idx_fechamento_farmer_m_presente_farmer_id', '(farmer_id)'),
+            ('idx_fechamento_farmer_m_presente_current_month', '(is_current_month)'),
+        ],
+    },
+}
+
+def create_table_sql(table):
+    """
+    Gera o DDL (CREATE TABLE IF NOT EXISTS e índices) de uma tabela de TABLES.
+
+    Args:
+        table (str): Nome qualificado da tabela (schema.tabela)
+
+    Returns:
+        list: Comandos SQL
+    """
+    definicao = TABLES[table]
+    linhas = [f"{coluna} {tipo}" for coluna, tipo in definicao['columns']] + definicao['constraints']
+    particionamento = f" PARTITION BY RANGE ({definicao['partition_by']})" if definicao.get('partition_by') else ""
+    comandos = [f"CREATE TABLE IF NOT EXISTS {table} (\n    " + ",\n    ".join(linhas) + "\n)" + particionamento]
+    for nome, colunas in definicao['indexes']:
+        comandos.append(f"CREATE INDEX IF NOT EXISTS {nome} ON {table} {colunas}")
+    return comandos
+
+def _add_columns_sql(table, colunas):
+    """
+    Gera ALTER TABLE ... ADD COLUMN IF NOT EXISTS para colunas de uma tabela.
+    """
+    return [f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {coluna} {tipo}" for coluna, tipo in colunas]
+
+def _partition_existing_sql(table):
+    """
+    Gera a conversão de uma tabela comum já existente na tabela particionada por
+    mês de TABLES, preservando os registros (e os ids).
+
+    A tabela antiga é renomeada (com a sequência do id), a nova é criada com uma
+    partição por mês presente nos dados e os registros são copiados. Em bancos
+    criados já com a tabela particionada, o comando não faz nada.
+    """
+    schema, nome = table.split('.')
+    antiga = f"{nome}_nao_particionada"
+    definicao = TABLES[table]
+    coluna_mes = definicao['partition_by']
+    colunas = ', '.join(coluna for coluna, _ in definicao['columns'])
+    indices = '\n        '.join(f"DROP INDEX IF EXISTS {schema}.{indice};" for indice, _ in definicao['indexes'])
+    criacao = '\n        '.join(comando + ';' for comando in create_table_sql(table))
+    return [f"""
+DO $$
+DECLARE
+    restricao text;
+    mes_particao date;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('{table}')) = 'r' THEN
+        ALTER TABLE {table} RENAME TO {antiga};
+        EXECUTE format('ALTER SEQUENCE %s RENAME TO %I', pg_get_serial_sequence('{schema}.{antiga}', 'id'), '{antiga}_id_seq');
+        -- Índices e restrições liberam os nomes para a tabela nova
+        {indices}
+        FOR restricao IN
+            SELECT conname FROM pg_constraint WHERE conrelid = '{schema}.{antiga}'::regclass AND contype IN ('p', 'u')
+        LOOP
+            EXECUTE format('ALTER TABLE {schema}.{antiga} DROP CONSTRAINT %I', restricao);
+        END LOOP;
+
+        {criacao}
+
+        FOR mes_particao IN SELECT DISTINCT DATE_TRUNC('month', {coluna_mes})::date FROM {schema}.{antiga} LOOP
+            EXECUTE format(
+                'CREATE TABLE {schema}.%I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                '{nome}_p' || to_char(mes_particao, 'YYYYMM'), mes_particao, (mes_particao + INTERVAL '1 month')::date
+            );
+        END LOOP;
+
+        INSERT INTO {table} ({colunas}) SELECT {colunas} FROM {schema}.{antiga};
+        PERFORM setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table};
+        DROP TABLE {schema}.{antiga};
+    END IF;
+END $$"""]
+
+# Versões do schema, em ordem: (versão, descrição, comandos SQL)
+MIGRATIONS = [
+    (1, 'Tabelas de destino dos KPIs',
+     [comando for table in TABLES for comando in create_table_sql(table)]),
+    # Colunas adicionadas depois da criação original das tabelas (antes verificadas
+    # a cada carga com column_exists)
+    (2, 'Colunas de farmer e receita líquida nas tabelas de receita',
+     _add_columns_sql('analysis.receita_farmer_m_passado', [
+         ('farmer_id', 'INTEGER'),
+         ('employee_name', 'VARCHAR(255)'),
+         ('receita_bruta', 'NUMERIC(15,2)'),
+         ('receita_liquida', 'NUMERIC(15,2)'),
+         ('comissao_bruta', 'NUMERIC(15,2)'),
+         ('comissao_liquida', 'NUMERIC(15,2)'),
+     ])
+     + _add_columns_sql('analysis.receita_farmer_m_presente', [
+         ('receita_bruta', 'NUMERIC(15,2)'),
+         ('comissao_bruta', 'NUMERIC(15,2)'),
+         ('comissao_liquida', 'NUMERIC(15,2)'),
+     ])
+     + _add_columns_sql('analysis.receita_produto_f_m_passado', [
+         ('category', 'VARCHAR(255)'),
+         ('product', 'VARCHAR(255)'),
+         ('farmer_id', 'INTEGER'),
+         ('employee_name', 'VARCHAR(255)'),
+         ('fonte', 'VARCHAR(50)'),
+     ])),
+    # Recargas por troca de partição mensal em vez de DELETE por intervalo de meses
+    (3, 'Particionamento mensal de receita_cliente, receita_farmer_m_passado e fechamento_farmer_m_passado',
+     [comando for table in TABLES if TABLES[table].get('partition_by')
+      for comando in _partition_existing_sql(table)]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Verificação feita no máximo uma vez por processo (ver ensure_schema)
+_schema_lock = threading.Lock()
+_schema_checked = False
+
+def ensure_schema(conn=None):
+    """
+    Garante que o schema analysis está na versão mais recente do registro.
+
+    Na primeira chamada do processo, uma única consulta cria (se preciso) o schema
+    e a tabela de versão e lê a versão aplicada; as versões pendentes são aplicadas
+    em uma única transação, serializada entre processos por advisory lock. As
+    chamadas seguintes (inclusive de KPIs executados em paralelo) retornam sem
+    acessar o banco.
+
+    Com uma conexão informada, a verificação é confirmada (commit) nessa conexão;
+    chame antes de qualquer outra operação da transação.
+
+    Args:
+        conn (psycopg2.connection, optional): Conexão com o banco de dados
+
+    Returns:
+        bool: True se operação foi bem sucedida
+    """
+    global _schema_checked
+    if _schema_checked:
+        return True
+
+    with _schema_lock:
+        if _schema_checked:
+            return True
+
+        close_conn = False
+        try:
+            if conn is None:
+                conn = get_connection()
+                close_conn = True
+
+            with conn.cursor() as cursor:
+                # Lock, schema, tabela de versão e versão atual em uma ida ao banco
+                cursor.execute("""
+                SELECT pg_advisory_xact_lock(hashtext(%s));
+                CREATE SCHEMA IF NOT EXISTS analysis;
+                CREATE TABLE IF NOT EXISTS analysis.schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(255),
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                SELECT COALESCE(MAX(version), 0) FROM analysis.schema_version;
+                """, (SCHEMA_VERSION_TABLE,))
+                versao_atual = cursor.fetchone()[0]
+
+                pendentes = [m for m in MIGRATIONS if m[0] > versao_atual]
+                for versao, descricao, comandos in pendentes:
+                    logger.info(f"Aplicando versão {versao} do schema analysis: {descricao}")
+                    cursor.execute(";\n".join(comandos) + ";")
+                    cursor.execute(
+                        "INSERT INTO analysis.schema_version (version, description) VALUES (%s, %s)",
+                        (versao, descricao)
+                    )
+
+            conn.commit()
+            _schema_checked = True
+
+            if pendentes:
+                logger.info(f"Schema analysis atualizado da versão {versao_atual} para {LATEST_VERSION}")
+            else:
+                logger.info(f"Schema analysis na versão {versao_atual}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro ao verificar/aplicar versões do schema analysis: {str(e)}")
+            if conn:
+                conn.rollback()
+            return False
+        finally:
+            if conn and close_conn:
+                conn.close()
+
+def reset_schema_check():
+    """
+    Descarta a verificação em memória; a próxima chamada de ensure_schema consulta o banco.
+    """
+    global _schema_checked
+    with _schema_lock:
+        _schema_checked = False
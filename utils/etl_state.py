@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de controle de estado dos ETLs (watermarks por KPI e mês).
+
+Guarda, para cada KPI e mês processado, a marca d'água da fonte (maior
+record_date, quantidade de linhas e um checksum dos valores e da atribuição
+cliente -> farmer). Em execuções incrementais, apenas os meses cuja marca
+d'água mudou são reprocessados.
+"""
+
+import logging
+import pandas as pd
+from utils.db_connection import get_connection
+from utils.db_schema_main import create_schema_if_not_exists
+from utils.sql_fragments import past_months_predicate
+from utils.typed_fetch import fetch_dataframe
+
+logger = logging.getLogger(__name__)
+
+# Tipos aplicados na leitura das marcas d'água e do estado salvo (ver utils.typed_fetch)
+WATERMARK_SCHEMA = {
+    'mes': 'datetime64[ns]',
+    'max_record_date': 'datetime64[ns]',
+    'row_count': 'int64',
+}
+
+def create_etl_state_table(conn=None):
+    """
+    Cria a tabela analysis.etl_state se não existir.
+
+    Args:
+        conn (psycopg2.connection, optional): Conexão com o banco de dados
+
+    Returns:
+        bool: True se operação foi bem sucedida
+    """
+    close_conn = False
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+
+        create_schema_if_not_exists(conn, 'analysis')
+
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis.etl_state (
+                kpi VARCHAR(100) NOT NULL,
+                mes DATE NOT NULL,
+                max_record_date DATE,
+                row_count BIGINT,
+                checksum TEXT,
+                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (kpi, mes)
+            );
+            """)
+
+        if close_conn:
+            conn.commit()
+        return True
+
+    except Exception as e:
+        logger.error(f"Erro ao verificar/criar tabela de estado do ETL: {str(e)}")
+        if conn and close_conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn and close_conn:
+            conn.close()
+
+def get_revenue_watermarks(months_back=11):
+    """
+    Obtém a marca d'água de revenue_records_historical por mês, na mesma janela
+    usada pelas extrações dos meses anteriores.
+
+    Os KPIs atribuem a receita ao farmer atual do cliente (gammadata.clients), de
+    modo que o checksum inclui um MD5 dos pares client_id:farmer_id dos clientes
+    com receita no mês: uma mudança de carteira também reprocessa os meses afetados.
+
+    Args:
+        months_back (int): Quantidade de meses para trás a serem considerados
+
+    Returns:
+        pandas.DataFrame: Colunas mes, max_record_date, row_count e checksum
+    """
+    conn = None
+    try:
+        conn = get_connection()
+
+        query = """
+        WITH receita_cliente AS (
+            SELECT
+                DATE_TRUNC('month', record_date)::date AS mes,
+                client_id,
+                MAX(record_date)::date AS max_record_date,
+                COUNT(*) AS row_count,
+                SUM(gross_revenue) AS gross_revenue,
+                SUM(net_revenue) AS net_revenue,
+                SUM(gross_commission) AS gross_commission
+            FROM gammadata.revenue_records_historical
+            WHERE {periodo}
+            GROUP BY DATE_TRUNC('month', record_date), client_id
+        )
+        SELECT
+            rc.mes,
+            MAX(rc.max_record_date) AS max_record_date,
+            SUM(rc.row_count)::bigint AS row_count,
+            CONCAT_WS(':',
+                COALESCE(SUM(rc.gross_revenue), 0),
+                COALESCE(SUM(rc.net_revenue), 0),
+                COALESCE(SUM(rc.gross_commission), 0),
+                COUNT(*),
+                MD5(STRING_AGG(rc.client_id::text || ':' || COALESCE(c.farmer_id, ''), ',' ORDER BY rc.client_id))
+            ) AS checksum
+        FROM receita_cliente rc
+        LEFT JOIN gammadata.clients c ON c.client_id = rc.client_id
+        GROUP BY rc.mes
+        ORDER BY rc.mes
+        """
+
+        periodo_sql, params = past_months_predicate('record_date', months_back)
+        df = fetch_dataframe(conn, query.format(periodo=periodo_sql), params, WATERMARK_SCHEMA)
+
+        logger.info(f"Marcas d'água de revenue_records_historical obtidas. Meses: {len(df)}")
+        return df
+
+    except Exception as e:
+        logger.error(f"Erro ao obter marcas d'água da fonte: {str(e)}")
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+def get_months_to_process(kpi, watermarks):
+    """
+    Compara as marcas d'água atuais da fonte com o estado salvo do KPI.
+
+    Args:
+        kpi (str): Nome do KPI
+        watermarks (pandas.DataFrame): Resultado de get_revenue_watermarks
+
+    Returns:
+        tuple: (meses alterados ou novos, meses salvos que saíram da janela), como listas de datetime
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        create_etl_state_table(conn)
+        conn.commit()
+
+        estado = fetch_dataframe(conn, """
+        SELECT mes, max_record_date, row_count, checksum
+        FROM analysis.etl_state
+        WHERE kpi = %s
+        """, [kpi], WATERMARK_SCHEMA)
+
+        comparacao = watermarks.merge(estado, on='mes', how='left', suffixes=('', '_salvo'))
+        alterado = (
+            comparacao['max_record_date_salvo'].isna()
+            | (comparacao['max_record_date'] != comparacao['max_record_date_salvo'])
+            | (comparacao['row_count'] != comparacao['row_count_salvo'])
+            | (comparacao['checksum'] != comparacao['checksum_salvo'])
+        )
+        meses_alterados = [mes.to_pydatetime() for mes in comparacao.loc[alterado, 'mes']]
+        meses_fora_janela = [mes.to_pydatetime() for mes in estado.loc[~estado['mes'].isin(watermarks['mes']), 'mes']]
+
+        logger.info(f"Estado do KPI {kpi}: {len(meses_alterados)} meses alterados, {len(meses_fora_janela)} fora da janela, "
+                    f"{len(watermarks) - len(meses_alterados)} sem alteração")
+        return meses_alterados, meses_fora_janela
+
+    except Exception as e:
+        logger.error(f"Erro ao comparar estado do KPI {kpi}: {str(e)}")
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+def save_watermarks(kpi, watermarks):
+    """
+    Registra as marcas d'água processadas do KPI.
+
+    Meses salvos que não constam em watermarks (fora da janela) são removidos do estado.
+
+    Args:
+        kpi (str): Nome do KPI
+        watermarks (pandas.DataFrame): Marcas d'água da janela processada com sucesso
+
+    Returns:
+        bool: True se operação foi bem sucedida
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        create_etl_state_table(conn)
+
+        with conn.cursor() as cursor:
+            # Remove meses que saíram da janela
+            meses = [mes.date() for mes in pd.to_datetime(watermarks['mes'])]
+            cursor.execute("""
+            DELETE FROM analysis.etl_state
+            WHERE kpi = %s AND NOT (mes = ANY(%s::date[]))
+            """, (kpi, meses))
+
+            for row in watermarks.itertuples(index=False):
+                cursor.execute("""
+                INSERT INTO analysis.etl_state (kpi, mes, max_record_date, row_count, checksum, processed_at)
+                VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (kpi, mes) DO UPDATE
+                SET max_record_date = EXCLUDED.max_record_date,
+                    row_count = EXCLUDED.row_count,
+                    checksum = EXCLUDED.checksum,
+                    processed_at = EXCLUDED.processed_at
+                """, (kpi, row.mes.date(), row.max_record_date.date() if pd.notna(row.max_record_date) else None,
+                      int(row.row_count), row.checksum))
+
+        conn.commit()
+        logger.info(f"Estado do KPI {kpi} atualizado. Meses: {len(watermarks)}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Erro ao salvar estado do KPI {kpi}: {str(e)}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
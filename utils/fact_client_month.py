@@ -0,0 +1,477 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo da tabela fato por cliente e mês (analysis.fact_client_month).
+
+Cada KPI recalculava receita e comissão a partir das tabelas de origem com a sua
+própria consulta. A tabela fato guarda, por (mês, cliente, fonte), os valores já
+calculados com as mesmas expressões das consultas dos KPIs:
+
+    positivador              analysis.positivador_month_end (snapshot de fim de mês)
+    coe                      gammadata.coe (liquidadas)
+    operacoes_estruturadas   gammadata.operacoes_estruturadas (não canceladas)
+    revenue_records          gammadata.revenue_records_historical
+
+Os valores são somas NUMERIC sem arredondamento, de modo que os agregados dos
+KPIs (GROUP BY sobre a tabela fato) são iguais aos das consultas que eles
+substituem. farmer_id é o farmer atual do cliente (o mesmo usado pelas consultas
+dos KPIs) e responsible_farmer_id o farmer responsável na data de referência do
+mês, segundo analysis.client_farmer_periods.
+
+A tabela analysis.fact_client_month_state guarda, por mês e fonte, a marca
+d'água da origem usada na última montagem (maior data, quantidade de linhas e
+um checksum dos valores por cliente e da atribuição cliente -> farmer). A
+atualização incremental recalcula apenas os meses cuja marca d'água mudou, e é
+verificada no máximo uma vez por processo (ver ensure_fact_client_month): os
+KPIs executados em sequência ou em paralelo pelo orquestrador reutilizam os
+meses já verificados na execução.
+"""
+
+import logging
+import threading
+import pandas as pd
+from utils.db_connection import get_connection
+from utils.db_schema_main import create_schema_if_not_exists
+from utils.sql_fragments import months_predicate
+from utils.positivador_month_end import ensure_positivador_month_end
+from utils.client_responsibility import ensure_client_farmer_periods
+
+logger = logging.getLogger(__name__)
+
+FACT_CLIENT_MONTH_TABLE = 'analysis.fact_client_month'
+
+# Fontes de receita do positivador, COE e operações estruturadas (KPIs de comissão)
+FONTES_COMISSAO = ('positivador', 'coe', 'operacoes_estruturadas')
+
+FACT_COLUMNS = [
+    'mes', 'client_id', 'farmer_id', 'responsible_farmer_id', 'fonte', 'record_date',
+    'receita_bruta', 'receita_liquida', 'comissao_bruta', 'comissao_liquida',
+    'churn', 'patrimony', 'net_capture', 'built_at'
+]
+
+# Fatos por (mês, cliente, fonte) dos meses informados; parâmetros: lista de meses
+# (positivador) e os predicados de months_predicate de cada fonte com data
+FATOS_SQL = """
+WITH fatos AS (
+    SELECT
+        ph.mes,
+        ph.client_id,
+        'positivador' AS fonte,
+        MAX(ph.record_date) AS record_date,
+        SUM(
+            COALESCE(ph.bovespa_revenue, 0) +
+            COALESCE(ph.futures_revenue, 0) +
+            COALESCE(ph.bank_fixed_income_revenue, 0) +
+            COALESCE(ph.private_fixed_income_revenue, 0) +
+            COALESCE(ph.public_fixed_income_revenue, 0) +
+            COALESCE(ph.rent_revenue, 0)
+        )::numeric AS receita_bruta,
+        NULL::numeric AS receita_liquida,
+        SUM(
+            (COALESCE(ph.bovespa_revenue, 0) * 0.665) +
+            (COALESCE(ph.futures_revenue, 0) * 0.665) +
+            (COALESCE(ph.bank_fixed_income_revenue, 0) * 0.475) +
+            (COALESCE(ph.private_fixed_income_revenue, 0) * 0.475) +
+            (COALESCE(ph.public_fixed_income_revenue, 0) * 0.475) +
+            (COALESCE(ph.rent_revenue, 0) * 0.475)
+        )::numeric AS comissao_bruta,
+        (SUM(
+            (COALESCE(ph.bovespa_revenue, 0) * 0.665) +
+            (COALESCE(ph.futures_revenue, 0) * 0.665) +
+            (COALESCE(ph.bank_fixed_income_revenue, 0) * 0.475) +
+            (COALESCE(ph.private_fixed_income_revenue, 0) * 0.475) +
+            (COALESCE(ph.public_fixed_income_revenue, 0) * 0.475) +
+            (COALESCE(ph.rent_revenue, 0) * 0.475)
+        ) * 0.805)::numeric AS comissao_liquida,
+        SUM(ph.churn)::numeric AS churn,
+        SUM(ph.patrimony)::numeric AS patrimony,
+        SUM(ph.net_capture)::numeric AS net_capture
+    FROM analysis.positivador_month_end ph
+    WHERE ph.mes = ANY(%s::date[])
+    GROUP BY ph.mes, ph.client_id
+
+    UNION ALL
+
+    SELECT
+        DATE_TRUNC('month', c.date)::date,
+        c.client_id,
+        'coe',
+        MAX(c.date)::date,
+        SUM(c.financial_value * c.commission_percentage/100)::numeric,
+        NULL::numeric,
+        SUM((c.financial_value * c.commission_percentage/100) * 0.95)::numeric,
+        SUM((c.financial_value * c.commission_percentage/100) * 0.95 * 0.805)::numeric,
+        NULL::numeric,
+        NULL::numeric,
+        NULL::numeric
+    FROM gammadata.coe c
+    WHERE c.status = 'Liquidada'
+      AND {coe_periodo}
+    GROUP BY DATE_TRUNC('month', c.date), c.client_id
+
+    UNION ALL
+
+    SELECT
+        DATE_TRUNC('month', oe.data)::date,
+        oe.client_id,
+        'operacoes_estruturadas',
+        MAX(oe.data)::date,
+        SUM(oe.comissao)::numeric,
+        NULL::numeric,
+        SUM(oe.comissao * 0.95)::numeric,
+        SUM(oe.comissao * 0.95 * 0.805)::numeric,
+        NULL::numeric,
+        NULL::numeric,
+        NULL::numeric
+    FROM gammadata.operacoes_estruturadas oe
+    WHERE oe.status_operacao != 'Cancelado'
+      AND {op_periodo}
+    GROUP BY DATE_TRUNC('month', oe.data), oe.client_id
+
+    UNION ALL
+
+    SELECT
+        DATE_TRUNC('month', rrh.record_date)::date,
+        rrh.client_id,
+        'revenue_records',
+        MAX(rrh.record_date)::date,
+        SUM(rrh.gross_revenue)::numeric,
+        SUM(rrh.net_revenue)::numeric,
+        SUM(rrh.gross_commission)::numeric,
+        SUM(rrh.gross_commission * (1 - 0.195))::numeric,
+        NULL::numeric,
+        NULL::numeric,
+        NULL::numeric
+    FROM gammadata.revenue_records_historical rrh
+    WHERE {rrh_periodo}
+    GROUP BY DATE_TRUNC('month', rrh.record_date), rrh.client_id
+)
+SELECT
+    f.mes,
+    f.client_id,
+    CAST(c.farmer_id AS INTEGER) AS farmer_id,
+    rp.farmer_id AS responsible_farmer_id,
+    f.fonte,
+    f.record_date,
+    f.receita_bruta,
+    f.receita_liquida,
+    f.comissao_bruta,
+    f.comissao_liquida,
+    f.churn,
+    f.patrimony,
+    f.net_capture,
+    CURRENT_TIMESTAMP AS built_at
+FROM fatos f
+JOIN gammadata.clients c ON c.client_id = f.client_id
+LEFT JOIN LATERAL (
+    SELECT p.farmer_id
+    FROM analysis.client_farmer_periods p
+    WHERE p.client_id = f.client_id
+      AND p.start_date <= f.record_date
+      AND (p.end_date IS NULL OR f.record_date < p.end_date)
+    -- Em sobreposições vale o período que começou primeiro, como em
+    -- ResponsibilityIndex.lookup e get_responsible_farmer
+    ORDER BY p.start_date ASC
+    LIMIT 1
+) rp ON TRUE
+"""
+
+# Marca d'água por (mês, fonte) das origens dos fatos, com os mesmos parâmetros de
+# FATOS_SQL. O checksum cobre, por cliente, a maior data e as somas das colunas de
+# origem, o farmer atual (clients.farmer_id) e a assinatura dos períodos de
+# responsabilidade (analysis.client_farmer_periods_state)
+MARCAS_SQL = """
+WITH por_cliente AS (
+    SELECT
+        ph.mes,
+        'positivador' AS fonte,
+        ph.client_id,
+        MAX(ph.record_date) AS max_record_date,
+        COUNT(*) AS row_count,
+        ROW(
+            SUM(ph.bovespa_revenue), SUM(ph.futures_revenue), SUM(ph.bank_fixed_income_revenue),
+            SUM(ph.private_fixed_income_revenue), SUM(ph.public_fixed_income_revenue), SUM(ph.rent_revenue),
+            SUM(ph.churn), SUM(ph.patrimony), SUM(ph.net_capture)
+        )::text AS valores
+    FROM analysis.positivador_month_end ph
+    WHERE ph.mes = ANY(%s::date[])
+    GROUP BY ph.mes, ph.client_id
+
+    UNION ALL
+
+    SELECT
+        DATE_TRUNC('month', c.date)::date,
+        'coe',
+        c.client_id,
+        MAX(c.date)::date,
+        COUNT(*),
+        ROW(SUM(c.financial_value * c.commission_percentage/100))::text
+    FROM gammadata.coe c
+    WHERE c.status = 'Liquidada'
+      AND {coe_periodo}
+    GROUP BY DATE_TRUNC('month', c.date), c.client_id
+
+    UNION ALL
+
+    SELECT
+        DATE_TRUNC('month', oe.data)::date,
+        'operacoes_estruturadas',
+        oe.client_id,
+        MAX(oe.data)::date,
+        COUNT(*),
+        ROW(SUM(oe.comissao))::text
+    FROM gammadata.operacoes_estruturadas oe
+    WHERE oe.status_operacao != 'Cancelado'
+      AND {op_periodo}
+    GROUP BY DATE_TRUNC('month', oe.data), oe.client_id
+
+    UNION ALL
+
+    SELECT
+        DATE_TRUNC('month', rrh.record_date)::date,
+        'revenue_records',
+        rrh.client_id,
+        MAX(rrh.record_date)::date,
+        COUNT(*),
+        ROW(SUM(rrh.gross_revenue), SUM(rrh.net_revenue), SUM(rrh.gross_commission))::text
+    FROM gammadata.revenue_records_historical rrh
+    WHERE {rrh_periodo}
+    GROUP BY DATE_TRUNC('month', rrh.record_date), rrh.client_id
+)
+SELECT
+    pc.mes,
+    pc.fonte,
+    MAX(pc.max_record_date)::date AS max_record_date,
+    SUM(pc.row_count)::bigint AS row_count,
+    MD5(STRING_AGG(
+        CONCAT_WS('|', pc.client_id, pc.max_record_date, pc.valores, c.farmer_id, s.assinatura), ','
+        ORDER BY pc.client_id
+    )) AS checksum
+FROM por_cliente pc
+LEFT JOIN gammadata.clients c ON c.client_id = pc.client_id
+LEFT JOIN analysis.client_farmer_periods_state s ON s.client_id = pc.client_id
+GROUP BY pc.mes, pc.fonte
+"""
+
+# Meses já verificados no processo (ver ensure_fact_client_month)
+_build_lock = threading.Lock()
+_built_months = set()
+
+def create_fact_client_month_table(conn=None):
+    """
+    Cria as tabelas analysis.fact_client_month e analysis.fact_client_month_state
+    se não existirem.
+
+    Args:
+        conn (psycopg2.connection, optional): Conexão com o banco de dados
+
+    Returns:
+        bool: True se operação foi bem sucedida
+    """
+    close_conn = False
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+
+        create_schema_if_not_exists(conn, 'analysis')
+
+        with conn.cursor() as cursor:
+            # client_id e farmer_id com os mesmos tipos das consultas dos KPIs
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis.fact_client_month AS
+            SELECT
+                NULL::date AS mes,
+                c.client_id,
+                CAST(c.farmer_id AS INTEGER) AS farmer_id,
+                NULL::integer AS responsible_farmer_id,
+                NULL::varchar(30) AS fonte,
+                NULL::date AS record_date,
+                NULL::numeric AS receita_bruta,
+                NULL::numeric AS receita_liquida,
+                NULL::numeric AS comissao_bruta,
+                NULL::numeric AS comissao_liquida,
+                NULL::numeric AS churn,
+                NULL::numeric AS patrimony,
+                NULL::numeric AS net_capture,
+                CURRENT_TIMESTAMP AS built_at
+            FROM gammadata.clients c
+            WITH NO DATA;
+
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_fact_client_month_key
+                ON analysis.fact_client_month (mes, client_id, fonte);
+            CREATE INDEX IF NOT EXISTS idx_fact_client_month_farmer
+                ON analysis.fact_client_month (fonte, mes, farmer_id);
+            CREATE INDEX IF NOT EXISTS idx_fact_client_month_record_date
+                ON analysis.fact_client_month (fonte, record_date);
+
+            CREATE TABLE IF NOT EXISTS analysis.fact_client_month_state (
+                mes DATE NOT NULL,
+                fonte VARCHAR(30) NOT NULL,
+                max_record_date DATE,
+                row_count BIGINT,
+                checksum TEXT,
+                built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (mes, fonte)
+            );
+            """)
+
+        if close_conn:
+            conn.commit()
+        return True
+
+    except Exception as e:
+        logger.error(f"Erro ao verificar/criar tabela fact_client_month: {str(e)}")
+        if conn and close_conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn and close_conn:
+            conn.close()
+
+def month_list(data_inicio, data_fim):
+    """
+    Lista os meses (primeiro dia) entre duas datas, inclusive.
+
+    Args:
+        data_inicio (datetime): Data qualquer do primeiro mês
+        data_fim (datetime): Data qualquer do último mês
+
+    Returns:
+        list: Meses como datetime.date
+    """
+    inicio = pd.Timestamp(data_inicio).normalize().replace(day=1)
+    fim = pd.Timestamp(data_fim).normalize().replace(day=1)
+    return [mes.date() for mes in pd.date_range(inicio, fim, freq='MS')]
+
+def _periodo_params(meses):
+    """
+    Predicados de months_predicate das fontes com data e a lista de parâmetros
+    de FATOS_SQL e MARCAS_SQL para os meses informados.
+    """
+    coe_sql, coe_params = months_predicate('c.date', meses)
+    op_sql, op_params = months_predicate('oe.data', meses)
+    rrh_sql, rrh_params = months_predicate('rrh.record_date', meses)
+    periodos = {'coe_periodo': coe_sql, 'op_periodo': op_sql, 'rrh_periodo': rrh_sql}
+    return periodos, [meses] + coe_params + op_params + rrh_params
+
+def refresh_fact_client_month(meses, full_refresh=False):
+    """
+    Recalcula os fatos dos meses informados a partir das tabelas de origem.
+
+    No modo incremental, calcula a marca d'água atual de cada (mês, fonte) e
+    recalcula apenas os meses em que alguma delas difere da salva na última
+    montagem (inclusive fontes que passaram a ter ou deixaram de ter registros)
+    e os meses ainda sem estado. Os meses são apagados e reinseridos, e o estado
+    é salvo, na mesma transação; leitores nunca veem um mês parcial.
+
+    Args:
+        meses (list): Meses a verificar (qualquer data dentro do mês)
+        full_refresh (bool): Se True, recalcula todos os meses informados
+
+    Returns:
+        int: Quantidade de registros inseridos
+    """
+    meses = sorted({mes.date().replace(day=1) for mes in pd.to_datetime(list(meses))})
+    if not meses:
+        return 0
+
+    conn = None
+    try:
+        ensure_positivador_month_end()
+        ensure_client_farmer_periods()
+        conn = get_connection()
+        if not create_fact_client_month_table(conn):
+            raise RuntimeError("Falha ao criar/verificar tabela fact_client_month")
+
+        with conn.cursor() as cursor:
+            # Serializa montagens concorrentes (outros processos ou KPIs em paralelo)
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (FACT_CLIENT_MONTH_TABLE,))
+
+            periodos, params = _periodo_params(meses)
+            cursor.execute("CREATE TEMP TABLE _fcm_marcas ON COMMIT DROP AS " + MARCAS_SQL.format(**periodos), params)
+
+            if full_refresh:
+                alterados = meses
+            else:
+                cursor.execute("""
+                SELECT m.mes
+                FROM _fcm_marcas m
+                LEFT JOIN analysis.fact_client_month_state s ON s.mes = m.mes AND s.fonte = m.fonte
+                WHERE s.max_record_date IS DISTINCT FROM m.max_record_date
+                   OR s.row_count IS DISTINCT FROM m.row_count
+                   OR s.checksum IS DISTINCT FROM m.checksum
+                UNION
+                SELECT s.mes
+                FROM analysis.fact_client_month_state s
+                WHERE s.mes = ANY(%s::date[])
+                  AND NOT EXISTS (SELECT 1 FROM _fcm_marcas m WHERE m.mes = s.mes AND m.fonte = s.fonte)
+                UNION
+                SELECT u.mes
+                FROM UNNEST(%s::date[]) AS u(mes)
+                WHERE NOT EXISTS (SELECT 1 FROM analysis.fact_client_month_state s WHERE s.mes = u.mes)
+                """, (meses, meses))
+                alterados = sorted(mes for (mes,) in cursor.fetchall())
+
+            if not alterados:
+                conn.commit()
+                logger.info(f"fact_client_month já está atualizada. Meses: {meses[0]:%Y-%m} a {meses[-1]:%Y-%m} ({len(meses)})")
+                return 0
+
+            periodos, params = _periodo_params(alterados)
+            cursor.execute("DELETE FROM analysis.fact_client_month WHERE mes = ANY(%s::date[])", (alterados,))
+            cursor.execute(
+                f"INSERT INTO analysis.fact_client_month ({', '.join(FACT_COLUMNS)}) " + FATOS_SQL.format(**periodos),
+                params
+            )
+            linhas = cursor.rowcount
+
+            cursor.execute("DELETE FROM analysis.fact_client_month_state WHERE mes = ANY(%s::date[])", (alterados,))
+            cursor.execute("""
+            INSERT INTO analysis.fact_client_month_state (mes, fonte, max_record_date, row_count, checksum, built_at)
+            SELECT mes, fonte, max_record_date, row_count, checksum, CURRENT_TIMESTAMP
+            FROM _fcm_marcas
+            WHERE mes = ANY(%s::date[])
+            """, (alterados,))
+
+        conn.commit()
+        logger.info(f"fact_client_month montada. Meses recalculados: {len(alterados)} de {len(meses)} "
+                    f"({alterados[0]:%Y-%m} a {alterados[-1]:%Y-%m}), registros: {linhas}")
+        return linhas
+
+    except Exception as e:
+        logger.error(f"Erro ao montar fact_client_month: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+def ensure_fact_client_month(meses):
+    """
+    Garante que os meses informados estão atualizados em analysis.fact_client_month.
+
+    Cada mês é verificado no máximo uma vez por processo: a primeira chamada
+    recalcula, em uma única transação, os meses cuja origem mudou desde a última
+    montagem (ver refresh_fact_client_month) e as demais, inclusive de KPIs em
+    paralelo, aguardam e reutilizam o resultado.
+
+    Args:
+        meses (list): Meses necessários (qualquer data dentro do mês)
+    """
+    meses = {mes.date().replace(day=1) for mes in pd.to_datetime(list(meses))}
+    with _build_lock:
+        faltantes = meses - _built_months
+        if faltantes:
+            refresh_fact_client_month(faltantes)
+            _built_months.update(faltantes)
+
+def reset_fact_client_month_state():
+    """
+    Esquece os meses verificados no processo (a próxima chamada de
+    ensure_fact_client_month volta a compará-los com a origem).
+    """
+    with _build_lock:
+        _built_months.clear()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Valores monetários em centavos inteiros (int64).
+
+As colunas NUMERIC(15,2) das tabelas de destino são representadas nos DataFrames
+dos KPIs como centavos em Int64 (nullable). A conversão a partir do texto do
+NUMERIC é exata, multiplicações por fatores (0.665, 0.95, percentuais...) são
+feitas em aritmética inteira, e o arredondamento é sempre o do ROUND(x, 2) do
+PostgreSQL (metade para longe do zero). Assim os valores não passam por float
+nem por Decimal e não precisam ser arredondados novamente a cada etapa.
+
+Na carga, format_cents gera o texto com 2 casas enviado ao COPY.
+"""
+
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+
+CENTS_DTYPE = 'Int64'
+
+def _round_div(numerador, denominador):
+    """
+    Divisão inteira com arredondamento metade para longe do zero.
+
+    Args:
+        numerador (numpy.ndarray): Valores int64 (ou object, com inteiros do Python)
+        denominador (int): Divisor positivo
+
+    Returns:
+        numpy.ndarray: Quocientes arredondados, no dtype do numerador
+    """
+    absolutos = np.abs(numerador)
+    quociente = absolutos // denominador
+    quociente += (2 * (absolutos % denominador) >= denominador)
+    return np.where(numerador < 0, -quociente, quociente)
+
+def _mul_exact(valores, fator):
+    """
+    Multiplica inteiros por um fator inteiro sem estouro: quando o produto não
+    cabe em int64, a multiplicação é feita com inteiros do Python (dtype object).
+    """
+    limite = np.iinfo(np.int64).max // max(abs(int(fator)), 1)
+    if valores.dtype != object and len(valores) and np.abs(valores).max() > limite:
+        valores = valores.astype(object)
+    return valores * int(fator)
+
+def _as_int_array(cents):
+    """
+    Separa valores em centavos em (int64, máscara de nulos).
+    """
+    arr = pd.array(cents, dtype=CENTS_DTYPE)
+    return arr.to_numpy(dtype=np.int64, na_value=0), arr.isna()
+
+def _factor_ratio(factor):
+    """
+    Converte um fator decimal exato (str, int ou Decimal) em (numerador, denominador).
+    """
+    sinal, digitos, expoente = Decimal(str(factor)).as_tuple()
+    numerador = int(''.join(map(str, digitos))) * (-1 if sinal else 1)
+    if expoente >= 0:
+        return numerador * 10 ** expoente, 1
+    return numerador, 10 ** -expoente
+
+def parse_cents(values):
+    """
+    Converte valores para centavos, de forma exata a partir da representação decimal.
+
+    Textos de NUMERIC (ex.: '1234.56789') são convertidos sem passar por float;
+    floats usam a menor representação decimal (repr), como o NUMERIC que os gerou.
+
+    Args:
+        values (array-like): Textos, números ou nulos
+
+    Returns:
+        pandas.arrays.IntegerArray: Centavos (Int64), nulos preservados
+    """
+    serie = pd.Series(values, dtype=object)
+    nulos = serie.isna().to_numpy()
+    if nulos.all():
+        return pd.array([pd.NA] * len(serie), dtype=CENTS_DTYPE)
+
+    texto = serie[~nulos].map(lambda v: v if isinstance(v, str) else repr(float(v))).str.strip()
+    negativo = texto.str.startswith('-').to_numpy()
+    texto = texto.str.lstrip('+-')
+
+    # Notação científica (floats muito grandes/pequenos) passa por Decimal
+    cientifica = texto.str.contains('e', case=False, regex=False)
+    if cientifica.any():
+        texto[cientifica] = texto[cientifica].map(lambda v: format(Decimal(v), 'f'))
+
+    partes = texto.str.partition('.')
+    inteiro = partes[0].replace('', '0').astype(np.int64).to_numpy()
+    fracao = partes[2].str.ljust(3, '0')
+    centavos = inteiro * 100 + fracao.str[:2].astype(np.int64).to_numpy()
+    # ROUND(x, 2): o terceiro dígito decide (metade para longe do zero)
+    centavos += (fracao.str[2].astype(np.int64).to_numpy() >= 5)
+
+    resultado = np.zeros(len(serie), dtype=np.int64)
+    resultado[~nulos] = np.where(negativo, -centavos, centavos)
+    return pd.arrays.IntegerArray(resultado, nulos)
+
+def parse_scaled(values):
+    """
+    Converte textos de NUMERIC em inteiros exatos, sem arredondar.
+
+    Usado para agregados sem escala fixa (ex.: somas de receita * 0.665) que ainda
+    serão comparados com metas ou multiplicados por percentuais: os valores são
+    representados em unidades de 10^-casas, com casas igual ao maior número de
+    casas decimais significativas da coluna (no mínimo 2). Valores que não cabem
+    em int64 nessa escala ficam como inteiros do Python (dtype object).
+
+    Args:
+        values (array-like): Textos, números ou nulos
+
+    Returns:
+        tuple: (valores, máscara de nulos, casas), com nulos valendo 0
+    """
+    serie = pd.Series(values, dtype=object)
+    nulos = serie.isna().to_numpy()
+    if nulos.all():
+        return np.zeros(len(serie), dtype=np.int64), nulos, 2
+
+    texto = serie[~nulos].map(lambda v: v if isinstance(v, str) else repr(float(v))).str.strip()
+    negativo = texto.str.startswith('-').to_numpy()
+    texto = texto.str.lstrip('+-')
+
+    cientifica = texto.str.contains('e', case=False, regex=False)
+    if cientifica.any():
+        texto[cientifica] = texto[cientifica].map(lambda v: format(Decimal(v), 'f'))
+
+    partes = texto.str.partition('.')
+    fracao = partes[2].str.rstrip('0')
+    casas = max(2, int(fracao.str.len().max()))
+    digitos = partes[0].replace('', '0') + fracao.str.ljust(casas, '0')
+
+    if digitos.str.len().max() <= 18:
+        absolutos = digitos.astype(np.int64).to_numpy()
+        resultado = np.zeros(len(serie), dtype=np.int64)
+    else:
+        absolutos = np.array([int(d) for d in digitos], dtype=object)
+        resultado = np.zeros(len(serie), dtype=object)
+    resultado[~nulos] = np.where(negativo, -absolutos, absolutos)
+    return resultado, nulos, casas
+
+def rescale(valores, casas, novas_casas):
+    """
+    Converte inteiros em unidades de 10^-casas para 10^-novas_casas (novas_casas >= casas),
+    sem estouro.
+
+    Args:
+        valores (numpy.ndarray): Inteiros (int64 ou object)
+        casas (int): Casas decimais atuais
+        novas_casas (int): Casas decimais desejadas
+
+    Returns:
+        numpy.ndarray: Valores na nova escala
+    """
+    if novas_casas == casas:
+        return valores
+    return _mul_exact(valores, 10 ** (novas_casas - casas))
+
+def percent_of_scaled(valores, nulos, casas, percent):
+    """
+    Calcula percentuais de valores exatos (ver parse_scaled), arredondando uma
+    única vez para centavos.
+
+    Equivale a ROUND(valor * percentual / 100, 2) sobre o NUMERIC sem arredondamento.
+
+    Args:
+        valores (numpy.ndarray): Inteiros em unidades de 10^-casas
+        nulos (numpy.ndarray): Máscara de nulos
+        casas (int): Casas decimais dos valores
+        percent (array-like): Percentuais (ex.: 2.5 para 2,5%); nulos geram nulo
+
+    Returns:
+        pandas.arrays.IntegerArray: Centavos (Int64), nulos preservados
+    """
+    pontos_base, nulos_percentual = _as_int_array(parse_cents(percent))
+    if valores.dtype != object and len(valores):
+        limite = np.iinfo(np.int64).max // max(int(np.abs(pontos_base).max()), 1)
+        if np.abs(valores).max() > limite:
+            valores = valores.astype(object)
+    if valores.dtype == object:
+        pontos_base = pontos_base.astype(object)
+    return _scaled_round(valores * pontos_base, np.asarray(nulos) | nulos_percentual, casas + 4)
+
+def as_cents(values):
+    """
+    Garante valores em centavos: colunas inteiras já são centavos; textos e floats
+    (valores em reais) são convertidos por parse_cents.
+
+    Args:
+        values (array-like): Centavos ou valores em reais
+
+    Returns:
+        pandas.arrays.IntegerArray: Centavos (Int64)
+    """
+    if pd.api.types.is_integer_dtype(getattr(values, 'dtype', None)):
+        return pd.array(values, dtype=CENTS_DTYPE)
+    return parse_cents(values)
+
+def _scaled_round(valores, nulos, casas):
+    """
+    Arredonda inteiros em unidades de 10^-casas reais para centavos (Int64).
+    """
+    centavos = _round_div(valores, 10 ** (casas - 2)) if casas > 2 else valores
+    return pd.arrays.IntegerArray(np.asarray(centavos).astype(np.int64), np.asarray(nulos, dtype=bool))
+
+def scaled_to_cents(values, casas):
+    """
+    Converte valores inteiros em unidades de 10^-casas reais para centavos.
+
+    Permite somar parcelas com escalas diferentes (ex.: receita * 0.665 em
+    unidades de 10^-5) de forma exata e arredondar uma única vez, como o
+    ROUND(x, 2) aplicado ao resultado NUMERIC no PostgreSQL.
+
+    Args:
+        values (array-like): Inteiros (int64, Int64 ou object com inteiros do Python)
+        casas (int): Casas decimais da unidade (>= 2)
+
+    Returns:
+        pandas.arrays.IntegerArray: Centavos (Int64), nulos preservados
+    """
+    serie = pd.Series(values)
+    nulos = serie.isna().to_numpy()
+    if serie.dtype == object:
+        valores = np.array([0 if nulo else int(v) for v, nulo in zip(serie, nulos)], dtype=object)
+    else:
+        valores = serie.to_numpy(dtype=np.int64, na_value=0)
+    return _scaled_round(valores, nulos, casas)
+
+def mul_cents(cents, factor):
+    """
+    Multiplica centavos por um fator decimal exato e arredonda para centavos.
+
+    Equivale a ROUND(valor * fator, 2) no PostgreSQL.
+
+    Args:
+        cents (array-like): Centavos (Int64)
+        factor (str, int or Decimal): Fator exato (ex.: '0.665'); não usar float
+
+    Returns:
+        pandas.arrays.IntegerArray: Centavos (Int64), nulos preservados
+    """
+    numerador, denominador = _factor_ratio(factor)
+    valores, nulos = _as_int_array(cents)
+    return _scaled_round(_mul_exact(valores, numerador), nulos, 2 + len(str(denominador)) - 1)
+
+def percent_of_cents(cents, percent):
+    """
+    Calcula percentuais de valores em centavos, arredondando para centavos.
+
+    Equivale a ROUND(valor * percentual / 100, 2), com o percentual em até
+    2 casas decimais (NUMERIC(5,2)), convertido para pontos-base.
+
+    Args:
+        cents (array-like): Centavos (Int64)
+        percent (array-like): Percentuais (ex.: 2.5 para 2,5%); nulos geram nulo
+
+    Returns:
+        pandas.arrays.IntegerArray: Centavos (Int64), nulos preservados
+    """
+    valores, nulos = _as_int_array(cents)
+    pontos_base, nulos_percentual = _as_int_array(parse_cents(percent))
+    return _scaled_round(valores * pontos_base, nulos | nulos_percentual, 6)
+
+def cents_to_float(cents):
+    """
+    Converte centavos para reais em float64 (NaN para nulos), para exibição ou comparação.
+
+    Args:
+        cents (array-like): Centavos (Int64)
+
+    Returns:
+        numpy.ndarray: Valores em reais
+    """
+    return pd.array(cents, dtype=CENTS_DTYPE).to_numpy(dtype='float64', na_value=np.nan) / 100
+
+def format_cents(cents):
+    """
+    Formata centavos como texto decimal com 2 casas (ex.: -1234 -> '-12.34').
+
+    Args:
+        cents (pandas.Series): Centavos (Int64); floats são tratados como reais (as_cents)
+
+    Returns:
+        pandas.Series: Textos (nulos preservados), com o mesmo índice
+    """
+    valores, nulos = _as_int_array(as_cents(cents))
+    absolutos = np.abs(valores)
+    texto = (
+        pd.Series(np.where(valores < 0, '-', ''), dtype=object)
+        + pd.Series(absolutos // 100).astype(str)
+        + '.'
+        + pd.Series(absolutos % 100).astype(str).str.zfill(2)
+    )
+    texto[nulos] = None
+    texto.index = cents.index
+    return texto
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de recarga de tabelas particionadas por mês (PARTITION BY RANGE (mes)).
+
+As tabelas analysis.receita_cliente, analysis.receita_farmer_m_passado e
+analysis.fechamento_farmer_m_passado têm uma partição por mês
+(<tabela>_pAAAAMM). Em vez de apagar (DELETE) e reinserir as linhas de um mês,
+swap_month_partitions carrega o mês numa tabela nova e avulsa, com o mesmo
+formato da tabela, e troca a partição na mesma transação:
+
+    1. cria a tabela nova com as linhas do mês que devem ser preservadas
+       (ex.: de outros farmers, numa carga filtrada por farmer_id)
+    2. carrega os novos registros por COPY
+    3. DETACH e DROP da partição antiga, ATTACH da tabela nova
+
+O CREATE TABLE ... (LIKE tabela) do passo 1 mantém um lock fraco na tabela
+particionada até o commit, e o DETACH do passo 3 precisa de lock exclusivo nela:
+duas recargas concorrentes (mesmo de meses diferentes) se bloqueariam em
+deadlock. Por isso cada recarga toma um advisory lock por tabela antes do passo
+1, e as recargas de uma mesma tabela são executadas uma de cada vez; a extração
+e a transformação dos meses continuam em paralelo.
+
+O custo é proporcional ao mês recarregado, não ficam tuplas mortas na tabela e
+os leitores veem o mês antigo ou o novo completos, nunca um mês pela metade.
+"""
+
+import logging
+import pandas as pd
+from utils.bulk_load import copy_dataframe
+
+logger = logging.getLogger(__name__)
+
+def month_start(data):
+    """
+    Normaliza uma data para o primeiro dia do mês.
+
+    Args:
+        data (datetime, date or str): Data qualquer do mês
+
+    Returns:
+        datetime.date: Primeiro dia do mês
+    """
+    return pd.Timestamp(data).date().replace(day=1)
+
+def month_bounds(mes):
+    """
+    Limites da partição de um mês: [primeiro dia, primeiro dia do mês seguinte).
+
+    Args:
+        mes (datetime, date or str): Data qualquer do mês
+
+    Returns:
+        tuple: (início, fim) como datetime.date
+    """
+    inicio = month_start(mes)
+    return inicio, (pd.Timestamp(inicio) + pd.DateOffset(months=1)).date()
+
+def partition_name(table, mes):
+    """
+    Nome qualificado da partição de um mês (ex.: analysis.receita_cliente_p202401).
+
+    Args:
+        table (str): Tabela particionada, com schema
+        mes (datetime, date or str): Data qualquer do mês
+
+    Returns:
+        str: Nome da partição, com schema
+    """
+    return f"{table}_p{month_start(mes):%Y%m}"
+
+def month_partitions(cursor, table):
+    """
+    Lista as partições mensais existentes de uma tabela.
+
+    Args:
+        cursor (psycopg2.cursor): Cursor da conexão
+        table (str): Tabela particionada, com schema
+
+    Returns:
+        dict: Mês (datetime.date) -> nome qualificado da partição
+    """
+    schema, nome = table.split('.')
+    cursor.execute("""
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = %s::regclass
+    """, (table,))
+
+    particoes = {}
+    prefixo = f"{nome}_p"
+    for (relname,) in cursor.fetchall():
+        sufixo = relname[len(prefixo):]
+        if relname.startswith(prefixo) and len(sufixo) == 6 and sufixo.isdigit():
+            particoes[pd.Timestamp(f"{sufixo[:4]}-{sufixo[4:]}-01").date()] = f"{schema}.{relname}"
+    return particoes
+
+def ensure_month_partitions(cursor, table, meses):
+    """
+    Cria as partições (vazias) que faltam para os meses informados.
+
+    Usado pelas cargas que escrevem direto na tabela (ex.: merge), que não
+    passam por swap_month_partitions.
+
+    Args:
+        cursor (psycopg2.cursor): Cursor da conexão
+        table (str): Tabela particionada, com schema
+        meses (iterable): Datas quaisquer dos meses
+    """
+    for mes in sorted({month_start(mes) for mes in meses}):
+        inicio, fim = month_bounds(mes)
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, mes)} PARTITION OF {table} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            (inicio, fim)
+        )
+
+def _group_by_month(df, stagings):
+    """
+    Separa um bloco de dados pelos meses da carga.
+
+    Args:
+        df (pandas.DataFrame): Bloco com a coluna mes
+        stagings (dict): Mês -> tabela nova do mês
+
+    Returns:
+        list: Pares (tabela nova, linhas do mês)
+    """
+    meses = pd.to_datetime(df['mes']).dt.to_period('M').dt.to_timestamp().dt.date
+    fora = set(meses.unique()) - set(stagings)
+    if fora:
+        raise ValueError(f"Registros fora dos meses da carga: {', '.join(sorted(f'{mes:%Y-%m}' for mes in fora))}")
+    return [(stagings[mes], df[meses == mes]) for mes in meses.unique()]
+
+def swap_month_partitions(cursor, blocos, table, columns, meses, keep_sql=None, keep_params=None,
+                          defaults=None, cents_columns=()):
+    """
+    Recarrega meses de uma tabela particionada por mês trocando as partições inteiras.
+
+    Para cada mês, uma tabela nova (com as linhas preservadas da partição atual
+    e os novos registros) substitui a partição na transação do chamador.
+
+    Args:
+        cursor (psycopg2.cursor): Cursor da conexão (a transação é controlada pelo chamador)
+        blocos (iterable): DataFrames com os novos registros (coluna mes obrigatória);
+            podem misturar meses e são enviados por COPY um a um
+        table (str): Tabela particionada por mês, com schema
+        columns (list): Colunas carregadas (ver copy_dataframe)
+        meses (iterable): Meses substituídos; os registros devem pertencer a eles
+        keep_sql (str, optional): Predicado das linhas da partição atual que são
+            preservadas (ex.: 'farmer_id IS DISTINCT FROM %s'); se None, nenhuma
+        keep_params (tuple, optional): Parâmetros de keep_sql
+        defaults (dict, optional): Valor usado no lugar de nulos/NaN por coluna
+        cents_columns (iterable, optional): Colunas monetárias em centavos (utils.money)
+
+    Returns:
+        tuple: (registros inseridos, registros das partições substituídas)
+    """
+    meses = sorted({month_start(mes) for mes in meses})
+
+    # Serializa as recargas da tabela antes de qualquer lock nela: o LIKE abaixo
+    # mantém AccessShareLock na tabela até o commit e o DETACH exige ACCESS
+    # EXCLUSIVE, de modo que duas transações concorrentes (mesmo de meses
+    # diferentes, como os do fechamento carregados em paralelo) entrariam em deadlock
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (table,))
+    particoes = month_partitions(cursor, table)
+
+    stagings = {}
+    for mes in meses:
+        inicio, fim = month_bounds(mes)
+        staging = partition_name(table, mes) + '_novo'
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(f"CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        # Restrição igual aos limites da partição: o ATTACH não precisa varrer a tabela
+        cursor.execute(
+            f"ALTER TABLE {staging} ADD CONSTRAINT {staging.split('.')[-1]}_mes_check "
+            f"CHECK (mes IS NOT NULL AND mes >= %s AND mes < %s)",
+            (inicio, fim)
+        )
+        if keep_sql and mes in particoes:
+            cursor.execute(
+                f"INSERT INTO {staging} SELECT * FROM {particoes[mes]} WHERE {keep_sql}",
+                keep_params
+            )
+        stagings[mes] = staging
+
+    inseridos = 0
+    for df in blocos:
+        if df.empty:
+            continue
+        for staging, df_mes in _group_by_month(df, stagings):
+            inseridos += copy_dataframe(cursor, df_mes, staging, columns, defaults, cents_columns)
+
+    substituidos = 0
+    for mes, staging in stagings.items():
+        inicio, fim = month_bounds(mes)
+        if mes in particoes:
+            cursor.execute(f"SELECT COUNT(*) FROM {particoes[mes]}")
+            substituidos += cursor.fetchone()[0]
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {particoes[mes]}")
+            cursor.execute(f"DROP TABLE {particoes[mes]}")
+        cursor.execute(f"ALTER TABLE {staging} RENAME TO {partition_name(table, mes).split('.')[-1]}")
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {partition_name(table, mes)} FOR VALUES FROM (%s) TO (%s)",
+            (inicio, fim)
+        )
+
+    if meses:
+        logger.debug(f"Partições de {table} substituídas: {meses[0]:%Y-%m} a {meses[-1]:%Y-%m} ({len(meses)})")
+    return inseridos, substituidos
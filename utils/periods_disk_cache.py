@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cache em disco dos períodos de responsabilidade farmer-cliente.
+
+Os períodos mudam raramente entre execuções. O resultado completo de
+get_client_farmer_periods é gravado em um arquivo por versão, identificada por
+uma impressão digital das tabelas de origem: um hash de todas as colunas de
+clients e client_transfers usadas nos períodos (as mesmas da assinatura por
+cliente de refresh_client_farmer_periods) e um hash dos nomes de employees.
+Qualquer inserção, remoção ou edição nessas colunas (ex.: mudança de
+clients.farmer_id ou correção de uma transferência) gera uma nova versão.
+Enquanto a impressão digital não muda, as execuções seguintes leem os períodos
+do disco em vez do banco.
+
+Os arquivos são gravados em Parquet quando pyarrow está instalado e em pickle
+caso contrário. Versões antigas são removidas quando o diretório ultrapassa o
+tamanho máximo configurado.
+
+Variáveis de ambiente:
+    ETL_PERIODS_DISK_CACHE: '0' desativa o cache (default: '1')
+    ETL_CACHE_DIR: diretório base do cache (default: <raiz do projeto>/.cache)
+    ETL_PERIODS_CACHE_MAX_MB: tamanho máximo dos arquivos de períodos (default: 200)
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import pandas as pd
+from utils.db_connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pkl'
+
+def disk_cache_enabled():
+    """
+    Indica se o cache em disco dos períodos está ativado.
+
+    Returns:
+        bool: True se ativado
+    """
+    return os.getenv('ETL_PERIODS_DISK_CACHE', '1') != '0'
+
+def get_cache_dir():
+    """
+    Retorna (e cria, se necessário) o diretório dos arquivos de períodos.
+
+    Returns:
+        str: Caminho do diretório
+    """
+    cache_dir = os.path.join(os.getenv('ETL_CACHE_DIR', os.path.join(BASE_DIR, '.cache')), 'client_farmer_periods')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def get_periods_fingerprint():
+    """
+    Calcula a impressão digital das tabelas de origem dos períodos (uma consulta).
+
+    Cobre o conteúdo de todas as colunas que definem os períodos, não apenas
+    quantidades e datas máximas: edições de linhas existentes também mudam a versão.
+
+    Returns:
+        str: Hash que identifica a versão atual dos períodos
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            SELECT
+                (SELECT MD5(STRING_AGG(
+                    CONCAT_WS(':', client_id, transfer_date, old_farmer_id, new_farmer_id), ','
+                    ORDER BY client_id, transfer_date, old_farmer_id, new_farmer_id
+                 ))
+                 FROM gammadata.client_transfers WHERE transfer_type = 'FARMER'),
+                (SELECT MD5(STRING_AGG(CONCAT_WS(':', client_id, farmer_id, creation_date), ',' ORDER BY client_id))
+                 FROM gammadata.clients),
+                (SELECT MD5(STRING_AGG(CONCAT_WS(':', employee_id, name), ',' ORDER BY employee_id))
+                 FROM gammadata.employees)
+            """)
+            partes = cursor.fetchone()
+        return hashlib.sha1('|'.join(str(p) for p in partes).encode('utf-8')).hexdigest()[:16]
+
+    except Exception as e:
+        logger.error(f"Erro ao calcular impressão digital dos períodos: {str(e)}")
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+def _cache_path(fingerprint):
+    """
+    Caminho do arquivo de uma versão dos períodos.
+    """
+    return os.path.join(get_cache_dir(), f"periods_{fingerprint}.{CACHE_FORMAT}")
+
+def load_cached_periods(fingerprint):
+    """
+    Lê os períodos de uma versão, se estiverem em disco.
+
+    Args:
+        fingerprint (str): Impressão digital da versão
+
+    Returns:
+        pandas.DataFrame or None: Períodos, ou None se não houver arquivo válido
+    """
+    path = _cache_path(fingerprint)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path) if CACHE_FORMAT == 'parquet' else pd.read_pickle(path)
+        # Marca o uso recente (a remoção de versões antigas usa a data de modificação)
+        os.utime(path)
+        logger.info(f"Períodos de responsabilidade lidos do cache em disco ({os.path.basename(path)}). Registros: {len(df)}")
+        return df
+    except Exception as e:
+        logger.warning(f"Arquivo de cache de períodos inválido, ignorado: {path} ({str(e)})")
+        return None
+
+def save_cached_periods(fingerprint, df):
+    """
+    Grava os períodos de uma versão e remove versões antigas acima do tamanho máximo.
+
+    Args:
+        fingerprint (str): Impressão digital da versão
+        df (pandas.DataFrame): Períodos completos
+    """
+    path = _cache_path(fingerprint)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if CACHE_FORMAT == 'parquet':
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_pickle(tmp_path)
+        # Troca atômica: leitores nunca veem um arquivo parcial
+        os.replace(tmp_path, path)
+        logger.info(f"Períodos de responsabilidade gravados no cache em disco ({os.path.basename(path)})")
+        evict_old_versions(keep=path)
+    except Exception as e:
+        logger.warning(f"Não foi possível gravar o cache de períodos: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def evict_old_versions(keep=None):
+    """
+    Remove as versões menos recentes até o total ficar abaixo de ETL_PERIODS_CACHE_MAX_MB.
+
+    Args:
+        keep (str, optional): Arquivo que nunca é removido (versão atual)
+
+    Returns:
+        int: Quantidade de arquivos removidos
+    """
+    max_bytes = float(os.getenv('ETL_PERIODS_CACHE_MAX_MB', '200')) * 1024 * 1024
+    arquivos = sorted(
+        glob.glob(os.path.join(get_cache_dir(), 'periods_*.*')),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    arquivos = [a for a in arquivos if not a.endswith('.tmp')]
+
+    total = 0
+    removidos = 0
+    for arquivo in arquivos:
+        tamanho = os.path.getsize(arquivo)
+        if arquivo != keep and total + tamanho > max_bytes:
+            os.remove(arquivo)
+            removidos += 1
+            logger.info(f"Versão antiga do cache de períodos removida: {os.path.basename(arquivo)}")
+            continue
+        total += tamanho
+    return removidos
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo do snapshot de fim de mês do positivador (analysis.positivador_month_end).
+
+Os KPIs usam, para cada mês, apenas as linhas de positivador_historical da última
+record_date do mês. Em vez de cada extração recalcular essa data varrendo todo o
+histórico, a tabela analysis.positivador_month_end guarda as linhas por cliente da
+última data de cada mês e é atualizada de forma incremental: apenas os meses com
+record_dates novas (posteriores à maior data já armazenada) são recarregados.
+"""
+
+import logging
+import threading
+from utils.db_connection import get_connection
+from utils.db_schema_main import create_schema_if_not_exists
+
+logger = logging.getLogger(__name__)
+
+POSITIVADOR_MONTH_END_TABLE = 'analysis.positivador_month_end'
+
+# Colunas copiadas de gammadata.positivador_historical
+POSITIVADOR_COLUMNS = [
+    'client_id', 'bovespa_revenue', 'futures_revenue', 'bank_fixed_income_revenue',
+    'private_fixed_income_revenue', 'public_fixed_income_revenue', 'rent_revenue',
+    'churn', 'patrimony', 'net_capture'
+]
+
+# Atualização feita no máximo uma vez por processo (ver ensure_positivador_month_end)
+_refresh_lock = threading.Lock()
+_refreshed = False
+
+def create_positivador_month_end_table(conn=None):
+    """
+    Cria a tabela analysis.positivador_month_end se não existir.
+
+    Args:
+        conn (psycopg2.connection, optional): Conexão com o banco de dados
+
+    Returns:
+        bool: True se operação foi bem sucedida
+    """
+    close_conn = False
+    try:
+        if conn is None:
+            conn = get_connection()
+            close_conn = True
+
+        create_schema_if_not_exists(conn, 'analysis')
+
+        with conn.cursor() as cursor:
+            # Mesmos tipos de coluna da fonte
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS analysis.positivador_month_end AS
+            SELECT
+                DATE_TRUNC('month', record_date)::date AS mes,
+                record_date,
+                {', '.join(POSITIVADOR_COLUMNS)},
+                CURRENT_TIMESTAMP AS refreshed_at
+            FROM gammadata.positivador_historical
+            WITH NO DATA;
+
+            CREATE INDEX IF NOT EXISTS idx_positivador_month_end_mes
+                ON analysis.positivador_month_end (mes);
+            CREATE INDEX IF NOT EXISTS idx_positivador_month_end_record_date
+                ON analysis.positivador_month_end (record_date);
+            CREATE INDEX IF NOT EXISTS idx_positivador_month_end_client
+                ON analysis.positivador_month_end (client_id, mes);
+            """)
+
+        if close_conn:
+            conn.commit()
+        return True
+
+    except Exception as e:
+        logger.error(f"Erro ao verificar/criar tabela positivador_month_end: {str(e)}")
+        if conn and close_conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn and close_conn:
+            conn.close()
+
+def refresh_positivador_month_end(full_refresh=False):
+    """
+    Atualiza analysis.positivador_month_end a partir de gammadata.positivador_historical.
+
+    No modo incremental, lê da fonte apenas as record_dates posteriores à maior data
+    já armazenada e recarrega os meses afetados (o mês corrente muda de última data
+    a cada nova carga do positivador). Correções em datas já armazenadas só são
+    refletidas com full_refresh.
+
+    Args:
+        full_refresh (bool): Se True, recarrega todos os meses
+
+    Returns:
+        int: Quantidade de meses recarregados
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        if not create_positivador_month_end_table(conn):
+            raise RuntimeError("Falha ao criar/verificar tabela positivador_month_end")
+
+        with conn.cursor() as cursor:
+            # Serializa atualizações concorrentes (outros processos ou KPIs em paralelo)
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (POSITIVADOR_MONTH_END_TABLE,))
+
+            ultima_carregada = None
+            if not full_refresh:
+                cursor.execute("SELECT MAX(record_date) FROM analysis.positivador_month_end")
+                ultima_carregada = cursor.fetchone()[0]
+
+            # Últimas datas dos meses com dados novos (faixa de datas, sem varrer o histórico)
+            query = """
+            SELECT DATE_TRUNC('month', record_date)::date AS mes, MAX(record_date)::date AS ultima_data
+            FROM gammadata.positivador_historical
+            """
+            params = []
+            if ultima_carregada is not None:
+                query += " WHERE record_date > %s"
+                params.append(ultima_carregada)
+            query += " GROUP BY DATE_TRUNC('month', record_date)"
+
+            cursor.execute(query, params)
+            meses_novos = cursor.fetchall()
+
+            if not meses_novos:
+                conn.commit()
+                logger.info("positivador_month_end já está atualizado")
+                return 0
+
+            meses = [mes for mes, _ in meses_novos]
+            ultimas_datas = [ultima_data for _, ultima_data in meses_novos]
+
+            if full_refresh:
+                cursor.execute("TRUNCATE analysis.positivador_month_end")
+            else:
+                cursor.execute("""
+                DELETE FROM analysis.positivador_month_end
+                WHERE mes = ANY(%s::date[])
+                """, (meses,))
+
+            colunas = ', '.join(POSITIVADOR_COLUMNS)
+            cursor.execute(f"""
+            INSERT INTO analysis.positivador_month_end (mes, record_date, {colunas}, refreshed_at)
+            SELECT DATE_TRUNC('month', record_date)::date, record_date, {colunas}, CURRENT_TIMESTAMP
+            FROM gammadata.positivador_historical
+            WHERE record_date = ANY(%s::date[])
+            """, (ultimas_datas,))
+            linhas = cursor.rowcount
+
+        conn.commit()
+        logger.info(f"positivador_month_end atualizado. Meses recarregados: {len(meses)}, registros: {linhas}")
+        return len(meses)
+
+    except Exception as e:
+        logger.error(f"Erro ao atualizar positivador_month_end: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+def ensure_positivador_month_end():
+    """
+    Garante que analysis.positivador_month_end está atualizado antes de uma extração.
+
+    A atualização incremental é feita apenas na primeira chamada do processo; as
+    demais (inclusive de KPIs executados em paralelo pelo orquestrador) aguardam
+    a primeira e retornam em seguida.
+    """
+    global _refreshed
+    with _refresh_lock:
+        if not _refreshed:
+            refresh_positivador_month_end()
+            _refreshed = True
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de verificação dos índices das tabelas de origem (schema gammadata).
+
+As extrações filtram as tabelas de origem por intervalos de datas e fazem o join
+de clients com employees por CAST(farmer_id AS INTEGER). ensure_source_indexes
+verifica se os índices que atendem essas consultas existem e são válidos e,
+opcionalmente, cria os que estiverem faltando.
+"""
+
+import logging
+from utils.db_connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+# (nome do índice, tabela, definição) dos índices usados pelas extrações
+SOURCE_INDEXES = [
+    ('idx_positivador_historical_record_date', 'gammadata.positivador_historical', '(record_date)'),
+    ('idx_positivador_historical_client_date', 'gammadata.positivador_historical', '(client_id, record_date)'),
+    ('idx_revenue_records_historical_record_date', 'gammadata.revenue_records_historical', '(record_date)'),
+    ('idx_revenue_records_historical_client_date', 'gammadata.revenue_records_historical', '(client_id, record_date)'),
+    ('idx_coe_status_date', 'gammadata.coe', '(status, date)'),
+    ('idx_operacoes_estruturadas_data', 'gammadata.operacoes_estruturadas', '(data)'),
+    ('idx_clients_farmer_id_int', 'gammadata.clients', '((CAST(farmer_id AS INTEGER)))'),
+    ('idx_client_transfers_client_date', 'gammadata.client_transfers', "(client_id, transfer_date) WHERE transfer_type = 'FARMER'"),
+    ('idx_compensation_employee_target', 'gammadata.compensation', '(employee_id, target_date)'),
+]
+
+def ensure_source_indexes(create=False):
+    """
+    Verifica (e opcionalmente cria) os índices das tabelas de origem.
+
+    Args:
+        create (bool): Se True, cria os índices ausentes e recria os inválidos
+
+    Returns:
+        dict: Listas de nomes de índice por situação: 'ok', 'missing', 'invalid', 'created'
+    """
+    resultado = {'ok': [], 'missing': [], 'invalid': [], 'created': []}
+    conn = None
+    try:
+        conn = get_connection()
+
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            SELECT c.relname, i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'gammadata'
+            """)
+            existentes = dict(cursor.fetchall())
+
+            for nome, tabela, definicao in SOURCE_INDEXES:
+                if nome in existentes and existentes[nome]:
+                    resultado['ok'].append(nome)
+                    continue
+
+                situacao = 'invalid' if nome in existentes else 'missing'
+                resultado[situacao].append(nome)
+
+                if not create:
+                    logger.warning(f"Índice {'inválido' if situacao == 'invalid' else 'ausente'}: "
+                                   f"{nome} ON {tabela} {definicao}")
+                    continue
+
+                logger.info(f"Criando índice {nome} ON {tabela} {definicao}")
+                if situacao == 'invalid':
+                    cursor.execute(f"DROP INDEX gammadata.{nome}")
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} {definicao}")
+                conn.commit()
+                resultado['created'].append(nome)
+
+        logger.info(f"Índices das tabelas de origem: {len(resultado['ok'])} ok, "
+                    f"{len(resultado['missing'])} ausentes, {len(resultado['invalid'])} inválidos, "
+                    f"{len(resultado['created'])} criados")
+        return resultado
+
+    except Exception as e:
+        logger.error(f"Erro ao verificar índices das tabelas de origem: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Fragmentos SQL compartilhados pelas extrações.
+
+Os predicados de data são gerados como intervalos semiabertos
+(coluna >= início AND coluna < fim), em vez de DATE_TRUNC('month', coluna) = ...,
+para que o banco possa usar os índices das colunas de data em range scans.
+
+Todas as funções retornam uma tupla (sql, params), com os parâmetros no
+formato posicional (%s) na ordem em que aparecem no SQL.
+"""
+
+import pandas as pd
+
+def current_month_predicate(column):
+    """
+    Predicado para registros do mês atual.
+
+    Args:
+        column (str): Expressão SQL da coluna de data
+
+    Returns:
+        tuple: (sql, params)
+    """
+    sql = (f"{column} >= DATE_TRUNC('month', NOW()) "
+           f"AND {column} < DATE_TRUNC('month', NOW()) + INTERVAL '1 month'")
+    return sql, []
+
+def past_months_predicate(column, months_back):
+    """
+    Predicado para os months_back meses anteriores ao mês atual (sem o mês atual).
+
+    Args:
+        column (str): Expressão SQL da coluna de data
+        months_back (int): Quantidade de meses para trás
+
+    Returns:
+        tuple: (sql, params)
+    """
+    sql = (f"{column} >= DATE_TRUNC('month', NOW()) - %s * INTERVAL '1 month' "
+           f"AND {column} < DATE_TRUNC('month', NOW())")
+    return sql, [int(months_back)]
+
+def months_predicate(column, meses):
+    """
+    Predicado para registros de uma lista de meses.
+
+    O intervalo entre o primeiro e o último mês permite o range scan; a lista
+    restringe o resultado aos meses informados quando eles não são contíguos.
+
+    Args:
+        column (str): Expressão SQL da coluna de data
+        meses (list): Meses (qualquer data dentro do mês)
+
+    Returns:
+        tuple: (sql, params)
+    """
+    meses = sorted({mes.date().replace(day=1) for mes in pd.to_datetime(list(meses))})
+    if not meses:
+        return "FALSE", []
+
+    sql = (f"{column} >= %s AND {column} < %s::date + INTERVAL '1 month' "
+           f"AND DATE_TRUNC('month', {column})::date = ANY(%s::date[])")
+    return sql, [meses[0], meses[-1], meses]
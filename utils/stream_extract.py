@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de extração em streaming com cursores nomeados (server-side) do psycopg2.
+
+pd.read_sql materializa todo o resultado em memória (e, para colunas NUMERIC,
+um objeto Decimal por valor) antes de montar o DataFrame. stream_query mantém o
+resultado no servidor e entrega DataFrames de no máximo chunk_size linhas, já
+tipados. A memória usada fica limitada ao tamanho do bloco, independente do
+tamanho do resultado.
+
+A tipagem é a mesma de fetch_dataframe (utils.typed_fetch), inclusive o schema
+de tipos declarado pelo KPI.
+"""
+
+import logging
+import uuid
+from utils.db_connection import get_connection
+from utils.typed_fetch import register_typecasters, build_dataframe
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 50000
+
+def stream_query(query, params=None, chunk_size=DEFAULT_CHUNK_SIZE, schema=None):
+    """
+    Executa uma consulta com cursor nomeado e retorna os resultados em blocos.
+
+    A conexão é obtida na primeira iteração e devolvida ao pool quando o gerador
+    termina (ou é descartado). Consultas sem resultado não geram nenhum bloco.
+
+    Args:
+        query (str): Consulta SQL (parâmetros no formato %s)
+        params (list or tuple, optional): Parâmetros da consulta
+        chunk_size (int): Quantidade máxima de linhas por bloco
+        schema (dict, optional): Coluna -> tipo declarado (ver utils.typed_fetch)
+
+    Yields:
+        pandas.DataFrame: Blocos tipados do resultado
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        # Cursor nomeado: o resultado fica no servidor e é lido em lotes de itersize
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex[:12]}") as cursor:
+            cursor.itersize = chunk_size
+            register_typecasters(cursor)
+            cursor.execute(query, params)
+
+            blocos = 0
+            linhas = 0
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                blocos += 1
+                linhas += len(rows)
+                yield build_dataframe(rows, cursor.description, schema)
+
+        logger.debug(f"Consulta em streaming concluída. Blocos: {blocos}, registros: {linhas}")
+
+    except Exception as e:
+        logger.error(f"Erro na extração em streaming: {str(e)}")
+        raise
+    finally:
+        if conn:
+            conn.close()
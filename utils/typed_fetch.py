@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Camada de leitura tipada das extrações.
+
+pd.read_sql recebe NUMERIC como objetos Decimal (colunas object) e as extrações
+convertiam depois coluna a coluna com pd.to_numeric. fetch_dataframe registra no
+cursor um typecaster que mantém o texto do NUMERIC (sem criar Decimal), monta o
+DataFrame uma vez e aplica o schema de tipos declarado pelo KPI:
+
+    'int32' / 'int64'    inteiros (nullable: Int32/Int64)
+    'float64'            valores numéricos
+    'cents'              valores monetários em centavos (Int64, ver utils.money),
+                         convertidos de forma exata a partir do texto do NUMERIC
+    'numeric_text'       texto exato do NUMERIC, sem arredondar (agregados que ainda
+                         serão comparados ou multiplicados; ver money.parse_scaled)
+    'category'           textos de baixa cardinalidade
+    'string'             textos
+    'datetime64[ns]'     datas
+
+Colunas NUMERIC sem tipo declarado viram float64 e colunas DATE/TIMESTAMP viram
+datetime64, pelo tipo informado pelo banco; as demais ficam como vieram.
+"""
+
+import logging
+import pandas as pd
+import psycopg2.extensions
+from utils.money import parse_cents
+
+logger = logging.getLogger(__name__)
+
+# OIDs dos tipos do PostgreSQL tratados na leitura
+NUMERIC_OIDS = (1700,)
+FLOAT_OIDS = (700, 701)
+INTEGER_OIDS = (20, 21, 23)
+DATE_OIDS = (1082, 1114, 1184)
+
+# NUMERIC lido como texto, sem criar objetos Decimal; a conversão para float64 ou
+# centavos é feita por coluna, de forma vetorizada
+NUMERIC_AS_TEXT = psycopg2.extensions.new_type(
+    NUMERIC_OIDS, 'NUMERIC_AS_TEXT',
+    lambda value, cursor: value
+)
+
+_INTEGER_DTYPES = {'int32': 'Int32', 'int64': 'Int64'}
+
+def register_typecasters(cursor):
+    """
+    Registra no cursor os typecasters da leitura tipada.
+
+    Args:
+        cursor (psycopg2.cursor): Cursor (o registro vale apenas para ele)
+    """
+    psycopg2.extensions.register_type(NUMERIC_AS_TEXT, cursor)
+
+def apply_schema(df, schema):
+    """
+    Aplica o schema de tipos declarado às colunas presentes no DataFrame.
+
+    Args:
+        df (pandas.DataFrame): Dados lidos
+        schema (dict): Coluna -> tipo (ver tipos aceitos no docstring do módulo)
+
+    Returns:
+        pandas.DataFrame: O mesmo DataFrame, com as colunas convertidas
+    """
+    for col, dtype in (schema or {}).items():
+        if col not in df.columns:
+            continue
+        if dtype in _INTEGER_DTYPES:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(_INTEGER_DTYPES[dtype])
+        elif dtype == 'float64':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+        elif dtype == 'cents':
+            df[col] = parse_cents(df[col])
+        elif dtype == 'numeric_text':
+            df[col] = df[col].astype(object)
+        elif dtype == 'category':
+            df[col] = df[col].astype('category')
+        elif dtype == 'string':
+            df[col] = df[col].astype('string')
+        elif dtype.startswith('datetime64'):
+            serie = pd.to_datetime(df[col])
+            # Unidade declarada (ex.: [ns]); colunas com fuso horário ficam como vieram
+            if dtype != 'datetime64' and serie.dt.tz is None:
+                serie = serie.astype(dtype)
+            df[col] = serie
+        else:
+            raise ValueError(f"Tipo não suportado no schema da coluna {col}: {dtype}")
+    return df
+
+def build_dataframe(rows, description, schema=None):
+    """
+    Monta um DataFrame tipado a partir das linhas e da descrição do cursor.
+
+    Args:
+        rows (list): Linhas retornadas por fetchall/fetchmany
+        description (tuple): cursor.description da consulta
+        schema (dict, optional): Coluna -> tipo declarado
+
+    Returns:
+        pandas.DataFrame: Dados com os tipos aplicados
+    """
+    schema = schema or {}
+    df = pd.DataFrame.from_records(rows, columns=[col.name for col in description])
+    for col in description:
+        if col.name in schema:
+            continue
+        if col.type_code in NUMERIC_OIDS + FLOAT_OIDS:
+            df[col.name] = pd.to_numeric(df[col.name], errors='coerce').astype('float64')
+        elif col.type_code in INTEGER_OIDS:
+            df[col.name] = pd.to_numeric(df[col.name], errors='coerce')
+        elif col.type_code in DATE_OIDS:
+            df[col.name] = pd.to_datetime(df[col.name])
+    return apply_schema(df, schema)
+
+def fetch_dataframe(conn, query, params=None, schema=None):
+    """
+    Executa uma consulta e retorna o resultado como DataFrame tipado.
+
+    Substitui pd.read_sql nas extrações: o resultado completo é lido de uma vez
+    e o schema é aplicado em seguida.
+
+    Args:
+        conn (psycopg2.connection): Conexão com o banco de dados
+        query (str): Consulta SQL
+        params (list, tuple or dict, optional): Parâmetros da consulta
+        schema (dict, optional): Coluna -> tipo declarado
+
+    Returns:
+        pandas.DataFrame: Resultado tipado
+    """
+    with conn.cursor() as cursor:
+        register_typecasters(cursor)
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        return build_dataframe(rows, cursor.description, schema)